@@ -1,7 +1,7 @@
 from flask import Flask, render_template, request, jsonify, send_file
 import os
+import json
 from dotenv import load_dotenv
-import requests
 from bs4 import BeautifulSoup
 
 # Import utility modules
@@ -10,12 +10,23 @@ from utils.fraud_rules import FraudRuleEngine
 from utils.salary_analyzer import SalaryAnalyzer
 from utils.company_verifier import CompanyVerifier
 from utils.mca_verifier import MCAVerifier
+from utils.company_registry import CompanyRegistry
 from utils.recruiter_scorer import RecruiterScorer
 from utils.risk_fusion import RiskFusionEngine
 from utils.pdf_generator import ForensicReportGenerator
+from utils.report_service import ReportService
+from utils.report_store import ReportStore
+from utils.batch_analyzer import BatchAnalyzer
+from utils.scam_lexicon import get_default_lexicon
+from utils.deadline_executor import DeadlineExecutor
+from utils.ttl_cache import TTLCache, SQLiteCacheBackend, content_hash
+from utils.http_client import HttpClient
 
 # Import ML classifier
-from models.ml_classifier import MLScamClassifier
+from models.model_registry import ModelRegistry
+from models.training_jobs import TrainingJobManager
+from models.online_learner import FeedbackStore, OnlineLearner
+from models.inference_batcher import MicroBatcher, InferenceTimeout
 
 # Load environment variables
 load_dotenv()
@@ -24,26 +35,139 @@ app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY', 'dev-secret-key-change-in-production')
 
 # Initialize components
-preprocessor = TextPreprocessor()
+http_client = HttpClient(
+    pool_size=int(os.getenv('HTTP_POOL_SIZE', '20')),
+    per_host_limit=int(os.getenv('HTTP_PER_HOST_LIMIT', '8')),
+    max_retries=int(os.getenv('HTTP_MAX_RETRIES', '2')),
+    max_response_bytes=int(os.getenv('HTTP_MAX_RESPONSE_BYTES', str(5 * 1024 * 1024)))
+)
+lexicon = get_default_lexicon()
+
+# Try to load pre-trained models (fast preprocessing needs the bundle's lemma table).
+# New bundles are picked up by the registry and swapped in without a restart.
+# TIERED_INFERENCE: a distilled linear model scores first; only its uncertain cases reach the full model
+model_registry = ModelRegistry(
+    lexicon=lexicon,
+    poll_interval=float(os.getenv('MODEL_POLL_INTERVAL', '5')),
+    tiered=os.getenv('TIERED_INFERENCE', '0') == '1'
+)
+model_registry.load_initial()
+
+# PREPROCESSOR_MODE=auto: fast while the live bundle ships lemmas.json, NLTK for legacy models
+preprocessor = TextPreprocessor(
+    mode=os.getenv('PREPROCESSOR_MODE', 'auto'),
+    lemma_table_path=model_registry.current().lemma_table_path,
+    cache=TTLCache(
+        maxsize=int(os.getenv('PREPROCESS_CACHE_SIZE', '10000')),
+        max_bytes=int(float(os.getenv('PREPROCESS_CACHE_MAX_MB', '32')) * 1024 * 1024)
+    )
+)
 rule_engine = FraudRuleEngine()
 salary_analyzer = SalaryAnalyzer()
-company_verifier = CompanyVerifier(api_key=os.getenv('OPENCORPORATES_API_KEY'))
-mca_verifier = MCAVerifier()
+company_cache = TTLCache(
+    maxsize=int(os.getenv('COMPANY_CACHE_SIZE', '10000')),
+    backend=SQLiteCacheBackend(os.getenv('COMPANY_CACHE_PATH')) if os.getenv('COMPANY_CACHE_PATH') else None
+)
+company_verifier = CompanyVerifier(
+    api_key=os.getenv('OPENCORPORATES_API_KEY'),
+    cache=company_cache,
+    http_client=http_client,
+    hit_ttl=int(os.getenv('COMPANY_CACHE_HIT_TTL', '86400')),
+    miss_ttl=int(os.getenv('COMPANY_CACHE_MISS_TTL', '21600')),
+    error_ttl=int(os.getenv('COMPANY_CACHE_ERROR_TTL', '60'))
+)
+mca_registry_path = os.getenv('MCA_REGISTRY_PATH', 'data/company_registry.db')
+mca_registry = CompanyRegistry(mca_registry_path) if os.path.exists(mca_registry_path) else None
+mca_verifier = MCAVerifier(registry=mca_registry)
 recruiter_scorer = RecruiterScorer()
 risk_fusion = RiskFusionEngine()
-pdf_generator = ForensicReportGenerator()
-ml_classifier = MLScamClassifier()
+report_dir = os.getenv('REPORT_DIR', 'reports')
+pdf_generator = ForensicReportGenerator(output_dir=report_dir)
+# PDFs are rendered from the persisted analysis on first download (or on a worker, REPORT_MODE=background)
+report_service = ReportService(
+    pdf_generator,
+    ReportStore(
+        report_dir,
+        max_age_seconds=float(os.getenv('REPORT_MAX_AGE_DAYS', '30')) * 86400,
+        max_bytes=int(float(os.getenv('REPORT_MAX_MB', '1024')) * 1024 * 1024)
+    ),
+    mode=os.getenv('REPORT_MODE', 'lazy'),
+    workers=int(os.getenv('REPORT_WORKERS', '2'))
+)
+
+# External lookups run on a shared pool, bounded by a per-request deadline
+stage_executor = DeadlineExecutor(max_workers=int(os.getenv('IO_STAGE_WORKERS', '16')))
+ANALYZE_DEADLINE_SECONDS = float(os.getenv('ANALYZE_DEADLINE_SECONDS', '8'))
+
+# Full /analyze responses keyed by a hash of every input field; repeats skip the whole pipeline
+analysis_cache = TTLCache(
+    maxsize=int(os.getenv('ANALYSIS_CACHE_SIZE', '5000')),
+    max_bytes=int(float(os.getenv('ANALYSIS_CACHE_MAX_MB', '64')) * 1024 * 1024)
+)
+ANALYSIS_CACHE_TTL = int(os.getenv('ANALYSIS_CACHE_TTL', '600'))
+
+def on_model_swap(classifier):
+    """Keep model-dependent state in step with the live model"""
+    preprocessor.lemma_table_path = classifier.lemma_table_path
+    preprocessor.reload_lemma_table()
+    # Cached analyses were scored by the previous models. Requests still in flight on them can
+    # add entries after this; those carry the old version and are ignored on read.
+    analysis_cache.clear()
+
+model_registry.on_swap(on_model_swap)
+
+# Concurrent /analyze requests share batched model calls. A lone request is scored immediately; once
+# requests queue up, a batch waits up to INFERENCE_MAX_WAIT_MS for more (latency against batch size)
+inference_batcher = MicroBatcher(
+    model_registry,
+    max_batch=int(os.getenv('INFERENCE_MAX_BATCH', '64')),
+    max_wait=float(os.getenv('INFERENCE_MAX_WAIT_MS', '5')) / 1000
+) if os.getenv('INFERENCE_BATCHING', '1') == '1' else None
 
-# Try to load pre-trained models
-ml_classifier.load_models()
+def deploy_trained_model(result):
+    """Smoke-test a finished training job's bundle and make it current through the registry"""
+    deployed = model_registry.deploy(result['model_version']) == result['model_version']
+    return {'deployed': deployed, 'deploy_error': None if deployed else model_registry.last_error}
 
-def extract_text_from_url(url):
+# Training runs in a separate process per job, off the serving threads
+training_jobs = TrainingJobManager(
+    bundles_dir=model_registry.bundles_dir,
+    lexicon=lexicon,
+    on_success=deploy_trained_model
+)
+
+# Analyst verdicts are learned incrementally and promoted through the registry when they help
+feedback_store = FeedbackStore(os.getenv('FEEDBACK_DB_PATH', 'data/feedback.db'))
+online_learner = OnlineLearner(
+    feedback_store,
+    model_registry,
+    batch_size=int(os.getenv('ONLINE_BATCH_SIZE', '64')),
+    promote_after=int(os.getenv('ONLINE_PROMOTE_AFTER', '100')),
+    interval=float(os.getenv('ONLINE_UPDATE_INTERVAL', '60')),
+    preprocessor=preprocessor
+)
+
+batch_analyzer = BatchAnalyzer(
+    preprocessor=preprocessor,
+    ml_classifier=model_registry,
+    rule_engine=rule_engine,
+    salary_analyzer=salary_analyzer,
+    recruiter_scorer=recruiter_scorer,
+    risk_fusion=risk_fusion,
+    company_verifier=company_verifier,
+    mca_verifier=mca_verifier,
+    stage_executor=stage_executor,
+    deadline_seconds=ANALYZE_DEADLINE_SECONDS,
+    max_batch_size=int(os.getenv('BATCH_MAX_SIZE', '500'))
+)
+
+def extract_text_from_url(url, timeout=10, client=None):
     """Extract job posting text from URL"""
     try:
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
-        response = requests.get(url, headers=headers, timeout=10)
+        response = (client or http_client).get(url, headers=headers, timeout=timeout)
         soup = BeautifulSoup(response.content, 'html.parser')
         
         # Remove script and style elements
@@ -62,6 +186,43 @@ def extract_text_from_url(url):
     except Exception as e:
         raise Exception(f"Failed to extract text from URL: {str(e)}")
 
+# Under the pre-fork server (serve.py) only one worker owns the online learner
+ONLINE_LEARNER_PROCESS = True
+
+def warm_up():
+    """Load what is otherwise loaded on the first request, so pre-forked workers share it"""
+    for text in model_registry.smoke_texts:
+        # Whatever fails here fails (and is handled) on the request path too; never block startup on it
+        try:
+            preprocessed = preprocessor.preprocess(text)
+            model_registry.current().predict(preprocessed, source_text=text)
+            rule_engine.check_rules(text, lexicon.match(text))
+        except Exception as e:
+            print(f"Warm-up error: {e}")
+
+def after_fork(owns_online_learner):
+    """
+    Per-worker setup after serve.py forks: SQLite connections must not be shared across processes.
+    The stores open on first use, so one the parent never touched is simply opened by the worker.
+    """
+    global ONLINE_LEARNER_PROCESS
+    ONLINE_LEARNER_PROCESS = owns_online_learner
+    for store in (feedback_store, report_service.store, company_cache.backend, mca_registry, training_jobs):
+        if store is not None:
+            store.reopen()
+
+def before_worker_exit():
+    """Stop this worker's training job rather than leave its process orphaned"""
+    training_jobs.shutdown()
+
+@app.before_request
+def start_model_watcher():
+    """Start the bundle watcher in the serving process (never at import, so forking stays safe)"""
+    if os.getenv('MODEL_WATCH', '1') == '1':
+        model_registry.start_watcher()
+    if os.getenv('ONLINE_LEARNING', '1') == '1' and ONLINE_LEARNER_PROCESS:
+        online_learner.start()
+
 @app.route('/')
 def index():
     """Main dashboard"""
@@ -73,6 +234,16 @@ def analyze_job():
     try:
         # Get input data
         data = request.json
+        cache_key = content_hash(json.dumps(data, sort_keys=True, default=str))
+        # Entries carry the model version that scored them; one from a replaced model is a miss
+        model_version = model_registry.version()
+        cached = analysis_cache.get(cache_key)
+        if cached is not None and cached['model_version'] == model_version:
+            return jsonify(cached['analysis'])
+        
+        stages = stage_executor.start(ANALYZE_DEADLINE_SECONDS)
+        # Stages that fell back to a default result (timeouts and failed lookups come from stages)
+        fallback_stages = []
         input_type = data.get('input_type', 'text')  # text, link, whatsapp
         job_text = ''
         
@@ -84,8 +255,10 @@ def analyze_job():
             job_link = data.get('job_link', '')
             if not job_link:
                 return jsonify({'error': 'Job link is required'}), 400
+            # The posting text is needed by every later stage, so wait for it
+            stages.submit('url_extraction', None, extract_text_from_url, job_link, timeout=stages.remaining())
             try:
-                job_text = extract_text_from_url(job_link)
+                job_text = stages.wait('url_extraction')
             except Exception as e:
                 return jsonify({'error': str(e)}), 400
         elif input_type == 'whatsapp':
@@ -109,21 +282,42 @@ def analyze_job():
         if len(job_text) < 20:
             return jsonify({'error': 'Job text is too short. Please provide more details.'}), 400
         
+        # Start the registry lookup now so it overlaps with the CPU-bound stages below
+        if company_name:
+            stages.submit(
+                'opencorporates',
+                {'found': False, 'confidence': 0, 'message': 'Verification timed out'},
+                company_verifier.verify_company, company_name, timeout=stages.remaining()
+            )
+        
+        # Match the scam lexicon once; every detector reads from this index
+        match_index = lexicon.match(job_text)
+        
         # 1. Preprocess text
         try:
             preprocessed_text = preprocessor.preprocess(job_text)
-            text_features = preprocessor.extract_features(job_text)
+            text_features = preprocessor.extract_features(job_text, match_index)
         except Exception as e:
             print(f"Preprocessing error: {e}")
+            fallback_stages.append('preprocessing')
             preprocessed_text = job_text.lower()
             text_features = {}
         
         # 2. ML Classification
         try:
-            ml_result = ml_classifier.predict(preprocessed_text)
+            # Suspicious lines come from the original posting; preprocessing drops line breaks
+            ml_result = (inference_batcher or model_registry).predict(preprocessed_text, source_text=job_text)
             spam_lines = ml_result.get('spam_lines', [])
+            if ml_result.get('model') == 'default':
+                # No model loaded: the classifier answered with its neutral default
+                fallback_stages.append('ml_classification')
+        except InferenceTimeout as e:
+            # The model is overloaded: a neutral default score would pass for a real verdict
+            print(f"ML classification error: {e}")
+            return jsonify({'error': 'Model inference timed out, please retry'}), 503
         except Exception as e:
             print(f"ML classification error: {e}")
+            fallback_stages.append('ml_classification')
             ml_result = {
                 'is_scam': False,
                 'probability': 50.0,
@@ -134,10 +328,11 @@ def analyze_job():
         
         # 3. Rule-based detection
         try:
-            rule_result = rule_engine.check_rules(job_text)
-            evidence = rule_engine.get_evidence(job_text, rule_result['triggered_rules'])
+            rule_result = rule_engine.check_rules(job_text, match_index)
+            evidence = rule_engine.get_evidence(job_text, rule_result['triggered_rules'], match_index)
         except Exception as e:
             print(f"Rule engine error: {e}")
+            fallback_stages.append('rule_engine')
             rule_result = {'triggered_rules': [], 'rule_score': 0, 'high_confidence_scam': False}
             evidence = []
         
@@ -147,8 +342,8 @@ def analyze_job():
         
         if company_name:
             try:
-                # Try OpenCorporates first
-                company_result = company_verifier.verify_company(company_name)
+                # Try OpenCorporates first (started in the background above)
+                company_result = stages.result('opencorporates')
                 
                 # Also try MCA for Indian companies
                 mca_result = mca_verifier.verify_indian_company(company_name)
@@ -165,6 +360,7 @@ def analyze_job():
                     company_result['email_match'] = email_match
             except Exception as e:
                 print(f"Company verification error: {e}")
+                fallback_stages.append('company_verification')
                 company_result = {'found': False, 'confidence': 50, 'message': 'Verification unavailable'}
         
         # 5. Salary analysis
@@ -172,6 +368,7 @@ def analyze_job():
             salary_result = salary_analyzer.analyze_salary(job_text, offered_salary)
         except Exception as e:
             print(f"Salary analysis error: {e}")
+            fallback_stages.append('salary_analysis')
             salary_result = {'anomaly_detected': False, 'anomaly_score': 0, 'message': 'Analysis unavailable'}
         
         # 6. Recruiter scoring
@@ -183,6 +380,7 @@ def analyze_job():
             )
         except Exception as e:
             print(f"Recruiter scoring error: {e}")
+            fallback_stages.append('recruiter_scoring')
             recruiter_result = {'trust_score': 50, 'trust_level': 'MODERATE_TRUST', 'factors': []}
         
         # 7. Risk fusion
@@ -199,6 +397,7 @@ def analyze_job():
             explanations = risk_fusion.get_explanation(risk_signals, risk_result)
         except Exception as e:
             print(f"Risk fusion error: {e}")
+            fallback_stages.append('risk_fusion')
             risk_result = {
                 'risk_score': 50.0,
                 'risk_tier': 'MODERATE_RISK',
@@ -223,16 +422,22 @@ def analyze_job():
             'recruiter_score': recruiter_result,
             'explanations': explanations,
             'evidence': evidence,
-            'spam_lines': spam_lines  # Add spam lines to results
+            'spam_lines': spam_lines,  # Add spam lines to results
+            'degraded_stages': stages.timed_out + stages.failed + fallback_stages
         }
         
-        # 8. Generate PDF report
+        # 8. Persist the analysis; its PDF report is rendered off the request path
         try:
-            pdf_path = pdf_generator.generate_report(analysis_result, job_text)
-            analysis_result['pdf_report'] = os.path.basename(pdf_path)
+            analysis_result['pdf_report'] = report_service.submit(analysis_result, job_text)
         except Exception as e:
-            print(f"PDF generation error: {e}")
+            print(f"Report persistence error: {e}")
             analysis_result['pdf_report'] = 'report_unavailable.pdf'
+            analysis_result['degraded_stages'].append('report')
+        
+        # Only complete analyses are cached, so the next identical request retries a degraded one
+        if not analysis_result['degraded_stages']:
+            analysis_cache.set(cache_key, {'model_version': model_version, 'analysis': analysis_result},
+                               ANALYSIS_CACHE_TTL)
         
         return jsonify(analysis_result)
     
@@ -242,40 +447,134 @@ def analyze_job():
         traceback.print_exc()
         return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
 
+@app.route('/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """Analyze many job postings in one request"""
+    try:
+        data = request.json or {}
+        postings = data.get('postings')
+        
+        if not isinstance(postings, list) or not postings:
+            return jsonify({'error': 'A non-empty list of postings is required'}), 400
+        
+        try:
+            results = batch_analyzer.analyze_batch(
+                postings,
+                verify_companies=data.get('verify_companies', True)
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({
+            'count': len(results),
+            'failed': sum(1 for r in results if 'error' in r),
+            'results': results
+        })
+    
+    except Exception as e:
+        print(f"General error in analyze_batch: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': f'Batch analysis failed: {str(e)}'}), 500
+
 @app.route('/download/<filename>')
 def download_report(filename):
-    """Download PDF report"""
+    """Download PDF report, rendering it on first request"""
     try:
-        filepath = os.path.join('reports', filename)
-        return send_file(filepath, as_attachment=True)
+        filepath = report_service.resolve(filename)
     except Exception as e:
-        return jsonify({'error': str(e)}), 404
+        return jsonify({'error': f'Report generation failed: {str(e)}'}), 500
+    if filepath is None:
+        return jsonify({'error': 'Report not found'}), 404
+    return send_file(filepath, as_attachment=True)
 
 @app.route('/train', methods=['POST'])
 def train_models():
-    """Train ML models with sample data"""
+    """Start a background job that trains ML models with sample data"""
     try:
-        from data.sample_dataset import get_training_data
-        
-        texts, labels = get_training_data()
-        results = ml_classifier.train_models(texts, labels)
-        
-        return jsonify({
-            'message': 'Models trained successfully',
-            'best_model': ml_classifier.best_model_name,
-            'results': {name: {'cv_f1': res['cv_f1_mean']} for name, res in results.items()}
-        })
+        job = training_jobs.submit()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 409
     
+    return jsonify({
+        'message': 'Training started',
+        'job_id': job['id'],
+        'status': job['status'],
+        'status_url': f"/train/{job['id']}"
+    }), 202
+
+@app.route('/train/<job_id>', methods=['GET'])
+def training_status(job_id):
+    """Status and progress of a training job"""
+    job = training_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown training job'}), 404
+    return jsonify(job)
+
+@app.route('/train/<job_id>', methods=['DELETE'])
+def cancel_training(job_id):
+    """Cancel a queued or running training job"""
+    try:
+        job = training_jobs.cancel(job_id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 409
+    if job is None:
+        return jsonify({'error': 'Unknown training job'}), 404
+    return jsonify(job)
+
+@app.route('/feedback', methods=['POST'])
+def submit_feedback():
+    """Store confirmed scam/legitimate verdicts: {text, label, source} or {items: [...]}"""
+    data = request.json or {}
+    items = data.get('items') if 'items' in data else [data]
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'A verdict or a non-empty list of items is required'}), 400
+    
+    try:
+        ids = feedback_store.add_many(items)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'stored': len(ids), 'ids': ids}), 201
+
+@app.route('/feedback/status', methods=['GET'])
+def feedback_status():
+    """Online learning progress, drift and promotion state"""
+    return jsonify(online_learner.status())
+
+@app.route('/feedback/update', methods=['POST'])
+def update_online_model():
+    """Learn from pending feedback now; ?promote=1 also promotes the online model unconditionally"""
+    if not ONLINE_LEARNER_PROCESS:
+        return jsonify({'error': 'Online learning runs in another worker process; retry to reach it'}), 409
+    
+    try:
+        result = online_learner.update()
+        if request.args.get('promote') == '1' and not result['promoted']:
+            result['promoted'] = online_learner.promote()
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        print(f"Online update error: {e}")
+        return jsonify({'error': f'Online update failed: {str(e)}'}), 500
+    
+    result['model_version'] = model_registry.version()
+    return jsonify(result)
 
 @app.route('/health')
 def health():
     """Health check endpoint"""
     return jsonify({
         'status': 'healthy',
-        'ml_model_loaded': ml_classifier.best_model is not None,
-        'model_name': ml_classifier.best_model_name
+        'worker_pid': os.getpid(),
+        'ml_model_loaded': model_registry.version() is not None,
+        'model_name': model_registry.current().best_model_name,
+        'model': model_registry.status(),
+        'company_cache': company_verifier.cache_stats(),
+        'mca_registry': mca_registry.stats() if mca_registry else None,
+        'preprocess_cache': preprocessor.cache_stats(),
+        'analysis_cache': analysis_cache.stats(),
+        'reports': report_service.stats(),
+        'online_learning': online_learner.status(),
+        'inference_batching': inference_batcher.stats() if inference_batcher else None
     })
 
 if __name__ == '__main__':
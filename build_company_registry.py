@@ -0,0 +1,38 @@
+"""
+Build the local MCA company registry index from a company master CSV dump
+Usage: python build_company_registry.py <company_master.csv> [output.db]
+"""
+
+import os
+import sys
+import time
+
+from utils.company_registry import CompanyRegistry
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__.strip())
+        sys.exit(1)
+    
+    csv_path = sys.argv[1]
+    db_path = sys.argv[2] if len(sys.argv) > 2 else os.getenv('MCA_REGISTRY_PATH', 'data/company_registry.db')
+    
+    print("=" * 60)
+    print("JobShield AI - Company Registry Build")
+    print("=" * 60)
+    print(f"\nReading {csv_path}...")
+    
+    start = time.time()
+    count = CompanyRegistry.build_from_csv(csv_path, db_path)
+    elapsed = time.time() - start
+    
+    print(f"Indexed {count} companies in {elapsed:.1f}s")
+    print(f"Registry written to {db_path} ({os.path.getsize(db_path) / 1e6:.1f} MB)")
+    
+    start = time.time()
+    registry = CompanyRegistry(db_path)
+    registry.stats()
+    print(f"Opened in {(time.time() - start) * 1000:.1f} ms")
+
+if __name__ == '__main__':
+    main()
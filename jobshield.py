@@ -0,0 +1,74 @@
+"""
+JobShield AI command-line tools
+
+Usage: python jobshield.py scan <shard or directory> [...] -o results.jsonl [--processes N] [--chunk-size N]
+                                [--verify-companies] [--full] [--restart]
+"""
+
+import argparse
+import sys
+import time
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='JobShield AI command-line tools')
+    commands = parser.add_subparsers(dest='command')
+    
+    scan = commands.add_parser('scan', help='Score an offline corpus of postings with the full detection pipeline')
+    scan.add_argument('inputs', nargs='+', metavar='PATH',
+                      help='JSONL/CSV/Parquet shards of postings (files, directories or globs)')
+    scan.add_argument('-o', '--output', required=True, help='Results file (.jsonl or .csv), written incrementally')
+    scan.add_argument('--processes', type=int, default=None, help='Worker processes (default: CPU count)')
+    scan.add_argument('--chunk-size', type=int, default=500, help='Postings per worker task')
+    scan.add_argument('--max-in-flight', type=int, default=None,
+                      help='Chunks queued or running at once (default: 2 per worker)')
+    scan.add_argument('--verify-companies', action='store_true',
+                      help='Check company names against the registries (uses COMPANY_CACHE_PATH and MCA_REGISTRY_PATH)')
+    scan.add_argument('--full', action='store_true', help='Write complete analysis results instead of a summary (JSONL only)')
+    scan.add_argument('--restart', action='store_true', help='Ignore any checkpoint and rescore from the first posting')
+    
+    args = parser.parse_args()
+    if args.command is None:
+        parser.print_help()
+        sys.exit(1)
+    return args
+
+def scan(args):
+    from utils.bulk_scanner import BulkScanner
+    
+    print("=" * 60)
+    print("JobShield AI - Bulk Scan")
+    print("=" * 60)
+    
+    try:
+        scanner = BulkScanner(
+            args.inputs,
+            args.output,
+            processes=args.processes,
+            chunk_size=args.chunk_size,
+            max_in_flight=args.max_in_flight,
+            verify_companies=args.verify_companies,
+            full=args.full
+        )
+        print(f"\nScanning {len(scanner.inputs)} shard(s) with {scanner.processes} worker(s)...")
+        start = time.time()
+        summary = scanner.run(restart=args.restart)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print(f"\nInterrupted; run the same command again to resume from {args.output}.checkpoint")
+        sys.exit(130)
+    
+    elapsed = time.time() - start
+    print(f"\nScanned {summary['scanned']} postings with model {summary['model_version']} in {elapsed:.1f}s")
+    print(f"Flagged (high risk or worse): {summary['flagged']}")
+    print(f"Errors: {summary['errors']}")
+    print(f"Results written to {args.output}")
+
+def main():
+    args = parse_args()
+    if args.command == 'scan':
+        scan(args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+
+class InferenceTimeout(Exception):
+    """A prediction did not come back from its batch within the batcher's timeout"""
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single predictions into batched predict_batch calls.
+    A lone request is scored at once; only when several are already queued (requests arrived
+    while the previous batch ran) does the batch wait up to max_wait seconds for more. A batch
+    never exceeds max_batch items. One dispatcher thread, started on first use, runs the batches.
+    """
+    
+    def __init__(self, predictor, max_batch=64, max_wait=0.005, timeout=30.0):
+        # predictor has predict_batch(texts, source_texts) - an MLScamClassifier or the ModelRegistry
+        self.predictor = predictor
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self._pending = []  # (text, source_text, enqueued_at, future)
+        self._cond = threading.Condition()
+        self._dispatcher = None
+        self._stats = {'requests': 0, 'batches': 0, 'largest_batch': 0, 'queue_seconds': 0.0, 'errors': 0,
+                       'timeouts': 0}
+    
+    def predict(self, text, source_text=None):
+        """
+        Same result as predictor.predict, computed in a shared batch.
+        Raises InferenceTimeout if the batch has not produced it within timeout seconds.
+        """
+        future = Future()
+        item = (text, source_text, time.perf_counter(), future)
+        with self._cond:
+            # The dispatcher thread is started on first use, never at import (fork safety)
+            if self._dispatcher is None or not self._dispatcher.is_alive():
+                self._dispatcher = threading.Thread(target=self._dispatch, name='inference-batcher', daemon=True)
+                self._dispatcher.start()
+            self._pending.append(item)
+            self._cond.notify()
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            with self._cond:
+                # Not scored yet: drop it so the dispatcher does no work for an abandoned request
+                if item in self._pending:
+                    self._pending.remove(item)
+            self._stats['timeouts'] += 1
+            raise InferenceTimeout(f'No prediction within {self.timeout}s')
+    
+    def predict_batch(self, texts, source_texts=None):
+        """Callers that already have a batch go straight to the predictor"""
+        return self.predictor.predict_batch(texts, source_texts)
+    
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            deadline = self._pending[0][2] + self.max_wait
+            # Waiting only pays off under concurrency; a single queued request goes straight through
+            while 1 < len(self._pending) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+            return batch
+    
+    def _dispatch(self):
+        while True:
+            batch = self._next_batch()
+            started = time.perf_counter()
+            texts = [text for text, _, _, _ in batch]
+            # A missing source text means the text itself, as in predict()
+            source_texts = [text if source is None else source for text, source, _, _ in batch]
+            try:
+                results = self.predictor.predict_batch(texts, source_texts)
+            except Exception as e:
+                print(f"Inference batch error: {e}")
+                self._stats['errors'] += 1
+                for _, _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            
+            for (_, _, _, future), result in zip(batch, results):
+                future.set_result(result)
+            self._stats['requests'] += len(batch)
+            self._stats['batches'] += 1
+            self._stats['largest_batch'] = max(self._stats['largest_batch'], len(batch))
+            self._stats['queue_seconds'] += sum(started - enqueued for _, _, enqueued, _ in batch)
+    
+    def stats(self):
+        stats = dict(self._stats)
+        requests = stats.pop('requests')
+        queue_seconds = stats.pop('queue_seconds')
+        with self._cond:
+            queued = len(self._pending)
+        return dict(
+            stats,
+            requests=requests,
+            queued=queued,
+            max_batch=self.max_batch,
+            max_wait_ms=self.max_wait * 1000,
+            mean_batch_size=round(requests / stats['batches'], 2) if stats['batches'] else None,
+            mean_queue_ms=round(queue_seconds / requests * 1000, 3) if requests else None
+        )
@@ -1,6 +1,5 @@
 import numpy as np
-import pandas as pd
-from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
+from sklearn.model_selection import train_test_split, GridSearchCV, StratifiedKFold
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
 from sklearn.tree import DecisionTreeClassifier
@@ -8,16 +7,63 @@ from sklearn.neighbors import KNeighborsClassifier
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, VotingClassifier
 from sklearn.svm import SVC
 from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score, f1_score
-from sklearn.preprocessing import StandardScaler
+from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.pipeline import Pipeline
+from sklearn.base import clone
+from sklearn.utils import Bunch
+from joblib import Parallel, delayed
 import joblib
 import os
 import re
+import sklearn
+import time
+from threading import Lock
+
+from models.model_bundle import ModelBundle, model_key
+from utils.scam_lexicon import get_default_lexicon
+from utils.text_preprocessor import TextPreprocessor, build_lemma_table
+
+# Advanced feature columns that follow the per-category keyword counts
+TEXT_STAT_FEATURES = [
+    'text_length', 'word_count', 'avg_word_length', 'exclamation_count', 'question_count',
+    'uppercase_ratio', 'digit_ratio', 'has_rupee_symbol', 'has_phone_number',
+    'has_lpa_mention', 'has_salary_range'
+]
+
+PHONE_NUMBER_PATTERN = re.compile(r'\+?\d{10,}')
+SALARY_RANGE_PATTERN = re.compile(r'\d+\s*-\s*\d+\s*lpa')
+
+ENSEMBLE_MODEL_NAME = 'Ensemble (Voting)'
+FAST_MODEL_NAME = 'Logistic Regression (Distilled)'
+
+# A distilled fast model only serves if it tracked the best model on enough held-out postings.
+# Rule of three: with no disagreement on n rows the 95% upper bound on the disagreement rate is
+# 3/n, so fewer than 3 / (1 - FAST_PATH_MIN_AGREEMENT) rows cannot show 99% agreement at all.
+FAST_PATH_MIN_TEST_ROWS = 300
+FAST_PATH_MIN_AGREEMENT = 0.99  # share of tiered decisions equal to the best model's
+FAST_PATH_MAX_ABS_ERROR = 10.0  # mean probability gap to the best model, in percentage points
+
+# A line is a spam line with this many distinct scam keywords, or when the model scores it this high
+SPAM_LINE_MIN_KEYWORDS = 2
+SPAM_LINE_MIN_PROBABILITY = 0.8
+# Lines shorter than this (headings, contact lines) are only flagged on keyword hits
+SPAM_LINE_MIN_WORDS = 4
+
+# Code points str.split() treats as whitespace in ASCII text
+ASCII_WHITESPACE = np.array([9, 10, 11, 12, 13, 28, 29, 30, 31, 32], dtype=np.uint32)
+
+def _fit_task(model, X, y, train_index=None, test_index=None):
+    """Fit a fresh clone: on all of X (returns the model) or on one CV fold (returns its F1)"""
+    model = clone(model)
+    if train_index is None:
+        return model.fit(X, y)
+    model.fit(X[train_index], y[train_index])
+    return f1_score(y[test_index], model.predict(X[test_index]))
 
 class MLScamClassifier:
     """Advanced multi-model scam classification system with enhanced features"""
     
-    def __init__(self):
+    def __init__(self, lexicon=None, n_jobs=-1, cv_folds=5, tiered=False, preprocessor_mode='auto'):
         # Enhanced TF-IDF with better parameters
         self.vectorizer = TfidfVectorizer(
             max_features=2000,
@@ -27,56 +73,154 @@ class MLScamClassifier:
             sublinear_tf=True,
             use_idf=True
         )
-        self.models = {}
+        self._models = {}
         self.best_model = None
         self.best_model_name = None
-        self.ensemble_model = None
+        self._ensemble_model = None
+        # Tiered inference: the distilled fast model scores everything, low-confidence cases go to best_model
+        self.fast_model = None
+        self.tiered = tiered
+        self.fast_path_rejected = None  # why a bundle's fast model is not served
+        self._tier_lock = Lock()
+        self._tier_stats = {'postings': [0, 0], 'lines': [0, 0]}  # kind -> [scored, escalated]
         self.model_dir = 'models/saved'
-        os.makedirs(self.model_dir, exist_ok=True)
+        self.bundles_dir = os.path.join(self.model_dir, 'bundles')
+        os.makedirs(self.bundles_dir, exist_ok=True)
+        # Models not needed for prediction are loaded from the bundle on first access
+        self.bundle = None
+        self.training_metadata = {}
+        self.lemma_table_path = os.path.join(self.model_dir, 'lemmas.json')
+        self.lemma_table = None
+        # Preprocessing the serving app uses (PREPROCESSOR_MODE); distillation trains on its output
+        self.preprocessor_mode = preprocessor_mode
+        # Training fans out over models and CV folds on a process pool
+        self.n_jobs = n_jobs
+        self.cv_folds = cv_folds
         
         # Scam keywords for feature engineering
-        self.scam_keywords = {
-            'payment': ['pay', 'fee', 'registration', 'processing', 'verification', 'deposit', 'charges', 'wallet', 'transfer', 'send money'],
-            'urgency': ['urgent', 'immediately', 'hurry', 'limited time', 'expires', 'last chance', 'act now', 'closing soon', 'final call'],
-            'contact': ['whatsapp only', 'telegram only', 'no email', 'no calls', 'contact via whatsapp'],
-            'selection': ['no interview', 'direct selection', 'selected without', 'hired without', 'guaranteed'],
-            'money': ['earn lakhs', 'work from home', 'easy money', 'guaranteed income', 'lpa for freshers'],
-            'suspicious': ['congratulations', 'selected', 'hired', 'won', 'lottery']
-        }
+        self.lexicon = lexicon or get_default_lexicon()
+    
+    @property
+    def models(self):
+        """Individually trained models by name"""
+        if not self._models and self.bundle is not None:
+            self._models = {
+                name: self.bundle.get(key) for name, key in self.bundle.model_names.items()
+                if name != ENSEMBLE_MODEL_NAME
+            }
+        return self._models
+    
+    @models.setter
+    def models(self, models):
+        self._models = models
     
-    def extract_advanced_features(self, texts):
-        """Extract advanced features from texts"""
-        features = []
+    @property
+    def ensemble_model(self):
+        """Voting ensemble, loaded lazily when it is not the best model"""
+        if self._ensemble_model is None:
+            if self.bundle is not None:
+                if self.bundle.has('ensemble'):
+                    self._ensemble_model = self.bundle.get('ensemble')
+            elif os.path.exists(os.path.join(self.model_dir, 'ensemble_model.pkl')):
+                self._ensemble_model = joblib.load(os.path.join(self.model_dir, 'ensemble_model.pkl'))
+        return self._ensemble_model
+    
+    @ensemble_model.setter
+    def ensemble_model(self, model):
+        self._ensemble_model = model
+    
+    @property
+    def scam_keywords(self):
+        """Feature engineering vocabulary from the shared scam lexicon"""
+        return self.lexicon.vocabulary('classifier')
+    
+    @property
+    def advanced_feature_names(self):
+        """Column names of the matrix returned by extract_advanced_features"""
+        return [f'{category}_count' for category in self.scam_keywords] + TEXT_STAT_FEATURES
+    
+    def extract_advanced_features(self, texts, match_indexes=None, batch_size=4096):
+        """Extract advanced features as a dense float32 matrix, one row per text"""
+        texts = list(texts)
+        features = np.zeros((len(texts), len(self.advanced_feature_names)), dtype=np.float32)
         
-        for text in texts:
-            text_lower = text.lower()
-            feat = {}
-            
-            # Keyword category counts
-            for category, keywords in self.scam_keywords.items():
-                feat[f'{category}_count'] = sum(1 for kw in keywords if kw in text_lower)
-            
-            # Text statistics
-            feat['text_length'] = len(text)
-            feat['word_count'] = len(text.split())
-            feat['avg_word_length'] = np.mean([len(word) for word in text.split()]) if text.split() else 0
-            feat['exclamation_count'] = text.count('!')
-            feat['question_count'] = text.count('?')
-            feat['uppercase_ratio'] = sum(1 for c in text if c.isupper()) / len(text) if text else 0
-            feat['digit_ratio'] = sum(1 for c in text if c.isdigit()) / len(text) if text else 0
-            
-            # Specific pattern detection
-            feat['has_rupee_symbol'] = 1 if 'rs' in text_lower or '₹' in text else 0
-            feat['has_phone_number'] = 1 if re.search(r'\+?\d{10,}', text) else 0
-            feat['has_lpa_mention'] = 1 if 'lpa' in text_lower else 0
-            feat['has_salary_range'] = 1 if re.search(r'\d+\s*-\s*\d+\s*lpa', text_lower) else 0
-            
-            features.append(feat)
+        # Work in fixed-size chunks so memory stays bounded for large batches
+        for start in range(0, len(texts), batch_size):
+            end = min(start + batch_size, len(texts))
+            chunk_indexes = match_indexes[start:end] if match_indexes is not None else None
+            self._fill_advanced_features(texts[start:end], chunk_indexes, features[start:end])
         
-        return pd.DataFrame(features)
+        return features
     
-    def train_models(self, texts, labels):
-        """Train multiple advanced classifiers with hyperparameter tuning"""
+    def _fill_advanced_features(self, texts, match_indexes, out):
+        """Compute advanced features for one chunk of texts into out"""
+        if match_indexes is None:
+            match_indexes = [self.lexicon.match(text) for text in texts]
+        
+        # Keyword category counts (distinct keywords per category)
+        columns = {category: j for j, category in enumerate(self.scam_keywords)}
+        for i, match_index in enumerate(match_indexes):
+            for category, count in match_index.category_counts('classifier').items():
+                out[i, columns[category]] = count
+        
+        stats = out[:, len(columns):]
+        lengths = np.fromiter(map(len, texts), dtype=np.float64, count=len(texts))
+        word_counts = np.fromiter((len(text.split()) for text in texts), dtype=np.float64, count=len(texts))
+        
+        # Character classes for all ASCII texts in one vectorized pass over their code points
+        uppercase = np.zeros(len(texts))
+        digits = np.zeros(len(texts))
+        whitespace = np.zeros(len(texts))
+        ascii_rows = [i for i, text in enumerate(texts) if text.isascii() and text]
+        if ascii_rows:
+            codes = np.frombuffer(''.join(texts[i] for i in ascii_rows).encode('ascii'), dtype=np.uint8).astype(np.uint32)
+            offsets = np.concatenate(([0], np.cumsum(lengths[ascii_rows].astype(np.int64))[:-1]))
+            uppercase[ascii_rows] = np.add.reduceat((codes >= 65) & (codes <= 90), offsets)
+            digits[ascii_rows] = np.add.reduceat((codes >= 48) & (codes <= 57), offsets)
+            whitespace[ascii_rows] = np.add.reduceat(np.isin(codes, ASCII_WHITESPACE), offsets)
+        for i, text in enumerate(texts):
+            if not text.isascii():
+                uppercase[i] = sum(1 for c in text if c.isupper())
+                digits[i] = sum(1 for c in text if c.isdigit())
+                whitespace[i] = sum(1 for c in text if c.isspace())
+        
+        safe_lengths = np.maximum(lengths, 1)
+        stats[:, 0] = lengths
+        stats[:, 1] = word_counts
+        stats[:, 2] = np.where(word_counts > 0, (lengths - whitespace) / np.maximum(word_counts, 1), 0)
+        stats[:, 3] = [text.count('!') for text in texts]
+        stats[:, 4] = [text.count('?') for text in texts]
+        stats[:, 5] = uppercase / safe_lengths
+        stats[:, 6] = digits / safe_lengths
+        
+        # Specific pattern detection
+        for i, text in enumerate(texts):
+            text_lower = text.lower()
+            stats[i, 7] = 'rs' in text_lower or '₹' in text
+            stats[i, 8] = PHONE_NUMBER_PATTERN.search(text) is not None
+            stats[i, 9] = 'lpa' in text_lower
+            stats[i, 10] = SALARY_RANGE_PATTERN.search(text_lower) is not None
+    
+    def train_models(self, texts, labels, progress_callback=None, stage=True):
+        """
+        Train multiple advanced classifiers with hyperparameter tuning.
+        progress_callback(percent, message) is called as training moves through its stages.
+        stage=False saves the bundle without staging it, for a caller that deploys it itself.
+        """
+        def report(percent, message):
+            if progress_callback is not None:
+                progress_callback(percent, message)
+        
+        timings = {}
+        stage_start = time.perf_counter()
+        
+        def end_stage(name):
+            nonlocal stage_start
+            now = time.perf_counter()
+            timings[name] = round(now - stage_start, 3)
+            stage_start = now
+        
+        report(0, 'Extracting features')
         # Vectorize text
         X_text = self.vectorizer.fit_transform(texts)
         
@@ -84,13 +228,14 @@ class MLScamClassifier:
         X_advanced = self.extract_advanced_features(texts)
         
         # Combine features
-        from scipy.sparse import hstack
-        X = hstack([X_text, X_advanced.values])
+        from scipy.sparse import hstack, vstack
+        X = hstack([X_text, X_advanced]).tocsr()
         y = np.array(labels)
+        end_stage('features')
         
         # Split data with stratification
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42, stratify=y
+        X_train, X_test, y_train, y_test, train_index, test_index = train_test_split(
+            X, y, np.arange(len(y)), test_size=0.2, random_state=42, stratify=y
         )
         
         # Define optimized models
@@ -129,17 +274,27 @@ class MLScamClassifier:
         results = {}
         best_f1 = 0
         
-        # Train and evaluate each model
+        # Fit every model and every CV fold as independent tasks (same folds as cross_val_score)
+        report(10, f'Training {len(model_configs)} models with {self.cv_folds}-fold CV')
+        print(f"Training {', '.join(model_configs)} ({self.cv_folds}-fold CV, n_jobs={self.n_jobs})...")
+        folds = list(StratifiedKFold(n_splits=self.cv_folds).split(X_train, y_train))
+        tasks = []
         for name, model in model_configs.items():
-            print(f"Training {name}...")
-            model.fit(X_train, y_train)
+            tasks.append(delayed(_fit_task)(model, X_train, y_train))
+            tasks.extend(delayed(_fit_task)(model, X_train, y_train, train_index, test_index)
+                         for train_index, test_index in folds)
+        outputs = Parallel(n_jobs=self.n_jobs)(tasks)
+        end_stage('models')
+        
+        report(70, 'Evaluating models')
+        per_model = 1 + len(folds)
+        for i, name in enumerate(model_configs):
+            model = outputs[i * per_model]
+            cv_scores = np.array(outputs[i * per_model + 1:(i + 1) * per_model])
             
             # Predictions
             y_pred = model.predict(X_test)
             y_proba = model.predict_proba(X_test)[:, 1] if hasattr(model, 'predict_proba') else None
-            
-            # Cross-validation
-            cv_scores = cross_val_score(model, X_train, y_train, cv=5, scoring='f1')
             f1 = f1_score(y_test, y_pred)
             
             results[name] = {
@@ -158,110 +313,307 @@ class MLScamClassifier:
                 self.best_model = model
                 self.best_model_name = name
         
+        end_stage('evaluation')
+        
+        self.training_metadata = {
+            'n_samples': int(len(y)),
+            'n_positive': int(y.sum()),
+            'sklearn_version': sklearn.__version__,
+            'cv_f1': {name: float(res['cv_f1_mean']) for name, res in results.items()},
+            'test_f1': {name: float(res['test_f1']) for name, res in results.items()}
+        }
+        
         # Create ensemble model (Voting Classifier)
+        report(80, 'Training ensemble')
         print("\nCreating Ensemble Model...")
         ensemble_models = [(name, res['model']) for name, res in results.items()]
-        self.ensemble_model = VotingClassifier(
-            estimators=ensemble_models,
-            voting='soft',
-            weights=[2, 3, 3, 2]  # Give more weight to RF and GB
-        )
-        self.ensemble_model.fit(X_train, y_train)
+        self.ensemble_model = self._prefitted_ensemble(ensemble_models, y_train)
         
         # Evaluate ensemble
         ensemble_pred = self.ensemble_model.predict(X_test)
         ensemble_f1 = f1_score(y_test, ensemble_pred)
+        self.training_metadata['test_f1'][ENSEMBLE_MODEL_NAME] = float(ensemble_f1)
+        end_stage('ensemble')
+        self.training_metadata['timings'] = timings
         print(f"Ensemble Model - Test F1: {ensemble_f1:.4f}")
         
         # Use ensemble if it's better
         if ensemble_f1 > best_f1:
             self.best_model = self.ensemble_model
-            self.best_model_name = "Ensemble (Voting)"
+            self.best_model_name = ENSEMBLE_MODEL_NAME
             print(f"\nBest model: Ensemble (F1: {ensemble_f1:.4f})")
         else:
             print(f"\nBest model: {self.best_model_name} (F1: {best_f1:.4f})")
         
         self.models = {name: res['model'] for name, res in results.items()}
         
+        # Lemma lookups for the fast preprocessing mode, matched to this vocabulary. Without
+        # them (NLTK corpora unavailable) the bundle ships no lemmas.json and 'auto' serves it in nltk mode.
+        try:
+            self.lemma_table = build_lemma_table(self.vectorizer.vocabulary_)
+        except Exception as e:
+            self.lemma_table = None
+            print(f"Warning: could not build the lemma table for fast preprocessing, saving without it: {e}")
+        
+        # A linear best model is already the cheap path; anything else gets a distilled one
+        report(90, 'Distilling fast-path model')
+        self.fast_model = None
+        self.fast_path_rejected = None
+        if self.best_model_name != 'Logistic Regression':
+            # Both models are served preprocessed text, so that is what the student learns from
+            # and what the quality gate measures
+            try:
+                preprocessor = self._serving_preprocessor()
+                X_train_served = self._features([preprocessor.preprocess(texts[i]) for i in train_index])
+                X_test_served = self._features([preprocessor.preprocess(texts[i]) for i in test_index])
+            except Exception as e:
+                print(f"Fast-path distillation skipped, serving preprocessing failed: {e}")
+            else:
+                self.fast_model = self._distill(self.best_model, vstack([X_train, X_train_served]).tocsr())
+                self.training_metadata['fast_path'] = self._evaluate_fast_path(X_test_served, y_test)
+                fast_path = self.training_metadata['fast_path']
+                print(f"Distilled fast path - agreement {fast_path['agreement']:.4f}, "
+                      f"escalation rate {fast_path['escalation_rate']:.4f}, tiered test F1 {fast_path['tiered_test_f1']:.4f}")
+        end_stage('distillation')
+        
         # Save models
-        self.save_models()
+        report(95, 'Saving model bundle')
+        self.save_models(stage=stage)
+        end_stage('save')
+        print("Stage timings: " + ', '.join(f'{stage} {seconds:.1f}s' for stage, seconds in timings.items()))
+        report(100, 'Done')
         
         return results
     
-    def predict(self, text):
+    def _prefitted_ensemble(self, fitted_models, y_train):
+        """
+        Soft-voting ensemble over already-fitted models.
+        VotingClassifier.fit would refit clones of all of them on the same data (same
+        random_state, so the same models); set its fitted state directly instead.
+        """
+        ensemble = VotingClassifier(
+            estimators=fitted_models,
+            voting='soft',
+            weights=[2, 3, 3, 2]  # Give more weight to RF and GB
+        )
+        ensemble.le_ = LabelEncoder().fit(y_train)
+        ensemble.classes_ = ensemble.le_.classes_
+        ensemble.estimators_ = [model for _, model in fitted_models]
+        ensemble.named_estimators_ = Bunch(**dict(fitted_models))
+        return ensemble
+    
+    def _serving_preprocessor(self):
+        """The preprocessing the app will serve this bundle with (preprocessor_mode and its lemma table)"""
+        mode = self.preprocessor_mode
+        if mode == 'auto' and self.lemma_table is None:
+            # Served with NLTK, or like fast mode without a table where NLTK is unavailable
+            try:
+                return TextPreprocessor(lexicon=self.lexicon, mode='nltk')
+            except Exception as e:
+                print(f"NLTK unavailable ({type(e).__name__}); distilling on fast preprocessing")
+        if mode == 'nltk':
+            return TextPreprocessor(lexicon=self.lexicon, mode='nltk')
+        # {} stands in for a missing table: fast mode then serves identity lemmas
+        return TextPreprocessor(lexicon=self.lexicon, mode='fast',
+                                lemma_table=self.lemma_table if self.lemma_table is not None else {})
+    
+    def _distill(self, teacher, X):
+        """
+        Logistic regression trained on the teacher's probabilities (soft labels): each sample
+        appears once as scam with weight p and once as legitimate with weight 1 - p.
+        Soft labels need no ground truth, so the transfer set X holds the training texts both raw
+        and as the serving preprocessor turns them into.
+        """
+        from scipy.sparse import vstack
+        p = teacher.predict_proba(X)[:, 1]
+        n = X.shape[0]
+        student = LogisticRegression(max_iter=2000, C=10.0, random_state=42)
+        student.fit(vstack([X, X]).tocsr(), np.r_[np.ones(n), np.zeros(n)], sample_weight=np.r_[p, 1 - p])
+        return student
+    
+    def _evaluate_fast_path(self, X_test, y_test):
+        """
+        How closely the fast model tracks the best model on held-out data, alone and tiered.
+        X_test must be built from preprocessed text, as both models see it when serving.
+        """
+        teacher = self.best_model.predict_proba(X_test)[:, 1]
+        fast = self.fast_model.predict_proba(X_test)[:, 1]
+        escalated = self._escalation_mask(fast)
+        tiered = np.where(escalated, teacher, fast)
+        return {
+            'teacher': self.best_model_name,
+            'test_rows': int(len(y_test)),
+            'agreement': float(np.mean((fast > 0.5) == (teacher > 0.5))),
+            'tiered_agreement': float(np.mean((tiered > 0.5) == (teacher > 0.5))),
+            'mean_abs_error': float(np.mean(np.abs(fast - teacher)) * 100),
+            'escalation_rate': float(escalated.mean()) if len(escalated) else 0.0,
+            'tiered_test_f1': float(f1_score(y_test, (tiered > 0.5).astype(int)))
+        }
+    
+    @staticmethod
+    def _fast_path_rejection(fast_path):
+        """Why a bundle's fast model should not serve (its held-out evaluation), or None"""
+        if not fast_path:
+            return 'no held-out evaluation'
+        if fast_path.get('test_rows', 0) < FAST_PATH_MIN_TEST_ROWS:
+            return f"evaluated on {fast_path.get('test_rows', 'unknown')} rows (< {FAST_PATH_MIN_TEST_ROWS})"
+        if fast_path['tiered_agreement'] < FAST_PATH_MIN_AGREEMENT:
+            return f"tiered agreement {fast_path['tiered_agreement']:.4f} (< {FAST_PATH_MIN_AGREEMENT})"
+        if fast_path['mean_abs_error'] > FAST_PATH_MAX_ABS_ERROR:
+            return f"mean abs error {fast_path['mean_abs_error']:.1f} (> {FAST_PATH_MAX_ABS_ERROR})"
+        return None
+    
+    def _escalation_mask(self, probabilities):
+        """Rows the fast model is not confident about (the 'low' confidence band)"""
+        return np.array([self._get_confidence_level(p * 100) == 'low' for p in probabilities], dtype=bool)
+    
+    def _scam_probabilities(self, X, kind):
+        """
+        Scam probabilities (0-1) for the rows of X, and which rows were escalated (None when not tiered).
+        Tiered, the fast model scores every row and only its low-confidence rows are rescored by best_model.
+        """
+        if not self.tiered or self.fast_model is None:
+            return self.best_model.predict_proba(X)[:, 1], None
+        
+        probabilities = self.fast_model.predict_proba(X)[:, 1]
+        escalated = self._escalation_mask(probabilities)
+        if escalated.any():
+            probabilities[escalated] = self.best_model.predict_proba(X[escalated])[:, 1]
+        with self._tier_lock:
+            self._tier_stats[kind][0] += len(probabilities)
+            self._tier_stats[kind][1] += int(escalated.sum())
+        return probabilities, escalated
+    
+    def tier_stats(self):
+        """Share of postings and spam-line candidates escalated from the fast model"""
+        with self._tier_lock:
+            stats = {kind: {
+                'scored': scored,
+                'escalated': escalated,
+                'escalation_rate': round(escalated / scored, 4) if scored else None
+            } for kind, (scored, escalated) in self._tier_stats.items()}
+        return dict(stats, enabled=bool(self.tiered and self.fast_model is not None), rejected=self.fast_path_rejected)
+    
+    def predict(self, text, source_text=None):
         """Predict scam probability for text with spam line detection"""
+        return self.predict_batch([text], None if source_text is None else [source_text])[0]
+    
+    def predict_batch(self, texts, source_texts=None):
+        """
+        Predict scam probabilities for many texts with one vectorized model call.
+        source_texts are the original postings (with line breaks) the texts were preprocessed
+        from; suspicious lines are picked from them, or from texts when not given.
+        """
         if self.best_model is None:
-            return {
+            return [{
                 'is_scam': False,
                 'probability': 50.0,
                 'confidence': 'low',
                 'model': 'default',
                 'spam_lines': []
-            }
+            } for _ in texts]
         
-        # Vectorize
-        X_text = self.vectorizer.transform([text])
+        if not texts:
+            return []
         
-        # Extract advanced features
-        X_advanced = self.extract_advanced_features([text])
-        
-        # Combine features
-        from scipy.sparse import hstack
-        X = hstack([X_text, X_advanced.values])
+        # Match the scam lexicon once per text, shared by features and spam lines
+        match_indexes = [self.lexicon.match(text) for text in texts]
+        X = self._features(texts, match_indexes)
         
         # Predict
-        prediction = self.best_model.predict(X)[0]
-        
-        if hasattr(self.best_model, 'predict_proba'):
-            probability = self.best_model.predict_proba(X)[0][1] * 100
+        escalated = None
+        if self.tiered and self.fast_model is not None:
+            probabilities, escalated = self._scam_probabilities(X, 'postings')
+            predictions = probabilities > 0.5
+            probabilities = probabilities * 100
         else:
-            probability = 75.0 if prediction == 1 else 25.0
+            predictions = self.best_model.predict(X)
+            if hasattr(self.best_model, 'predict_proba'):
+                probabilities = self.best_model.predict_proba(X)[:, 1] * 100
+            else:
+                probabilities = np.where(predictions == 1, 75.0, 25.0)
         
-        confidence = self._get_confidence_level(probability)
+        if source_texts is None:
+            source_texts, source_indexes = texts, match_indexes
+        else:
+            source_indexes = [self.lexicon.match(text) for text in source_texts]
+        spam_lines = self._detect_spam_lines_batch(source_texts, source_indexes)
         
-        # Detect spam lines
-        spam_lines = self._detect_spam_lines(text)
+        results = []
+        for i, (prediction, probability, lines) in enumerate(zip(predictions, probabilities, spam_lines)):
+            probability = float(probability)
+            result = {
+                'is_scam': bool(prediction),
+                'probability': round(probability, 2),
+                'confidence': self._get_confidence_level(probability),
+                'model': self.best_model_name,
+                'spam_lines': lines
+            }
+            if escalated is not None:
+                result['escalated'] = bool(escalated[i])
+                if not escalated[i]:
+                    result['model'] = FAST_MODEL_NAME
+            results.append(result)
         
-        return {
-            'is_scam': bool(prediction),
-            'probability': round(probability, 2),
-            'confidence': confidence,
-            'model': self.best_model_name,
-            'spam_lines': spam_lines
-        }
+        return results
+    
+    def _features(self, texts, match_indexes=None):
+        """Model input for texts: vectorizer output followed by the advanced features"""
+        from scipy.sparse import hstack
+        X_text = self.vectorizer.transform(texts)
+        X_advanced = self.extract_advanced_features(texts, match_indexes)
+        return hstack([X_text, X_advanced]).tocsr()
     
-    def _detect_spam_lines(self, text):
+    def _detect_spam_lines(self, text, match_index=None):
         """Detect specific spam/scam lines in the text"""
-        spam_lines = []
-        lines = text.split('\n')
+        return self._detect_spam_lines_batch([text], [match_index])[0]
+    
+    def _detect_spam_lines_batch(self, texts, match_indexes):
+        """
+        Suspicious lines of each text, most suspicious first (top 10 per text).
+        Every candidate line of every text is scored by the model in one transform and one
+        predict_proba call; a line is flagged when it has SPAM_LINE_MIN_KEYWORDS keyword hits
+        or a model probability of at least SPAM_LINE_MIN_PROBABILITY, and ranked by both.
+        """
+        candidates = []  # (text position, line, matched patterns)
+        for position, (text, match_index) in enumerate(zip(texts, match_indexes)):
+            if match_index is None:
+                match_index = self.lexicon.match(text)
+            hits = match_index.by_line('classifier')
+            for line_number, line in enumerate(text.split('\n')):
+                line = line.strip()
+                # Count each keyword once per line, in keyword table order
+                matched_patterns = [m.keyword for m in sorted(
+                    {m.order: m for m in hits.get(line_number, [])}.values(), key=lambda m: m.order)]
+                if len(matched_patterns) >= SPAM_LINE_MIN_KEYWORDS or len(line.split()) >= SPAM_LINE_MIN_WORDS:
+                    candidates.append((position, line, matched_patterns))
+        
+        spam_lines = [[] for _ in texts]
+        if not candidates:
+            return spam_lines
         
-        for line in lines:
-            line_lower = line.strip().lower()
-            if not line_lower:
+        if self.best_model is not None and hasattr(self.best_model, 'predict_proba'):
+            line_probabilities, _ = self._scam_probabilities(self._features([c[1] for c in candidates]), 'lines')
+        else:
+            line_probabilities = np.zeros(len(candidates))
+        
+        for (position, line, matched_patterns), probability in zip(candidates, line_probabilities):
+            probability = float(probability)
+            if len(matched_patterns) < SPAM_LINE_MIN_KEYWORDS and probability < SPAM_LINE_MIN_PROBABILITY:
                 continue
-            
-            # Check for scam patterns
-            scam_score = 0
-            matched_patterns = []
-            
-            for category, keywords in self.scam_keywords.items():
-                for keyword in keywords:
-                    if keyword in line_lower:
-                        scam_score += 1
-                        matched_patterns.append(keyword)
-            
-            # If line has multiple scam keywords, mark it as spam
-            if scam_score >= 2:
-                spam_lines.append({
-                    'line': line.strip(),
-                    'score': scam_score,
-                    'patterns': matched_patterns
-                })
-        
-        # Sort by score (most suspicious first)
-        spam_lines.sort(key=lambda x: x['score'], reverse=True)
-        
-        return spam_lines[:10]  # Return top 10 spam lines
+            spam_lines[position].append({
+                'line': line,
+                # 0-100: half from the model, half from keyword hits (saturating at four)
+                'score': int(round(50 * probability + 12.5 * min(len(matched_patterns), 4))),
+                'ml_probability': round(probability * 100, 2),
+                'patterns': matched_patterns
+            })
+        
+        for lines in spam_lines:
+            # Sort by score (most suspicious first)
+            lines.sort(key=lambda x: x['score'], reverse=True)
+            del lines[10:]  # Keep the top 10 spam lines
+        return spam_lines
     
     def _get_confidence_level(self, probability):
         """Get confidence level from probability"""
@@ -272,27 +624,92 @@ class MLScamClassifier:
         else:
             return 'low'
     
-    def save_models(self):
-        """Save trained models and vectorizer"""
-        joblib.dump(self.vectorizer, os.path.join(self.model_dir, 'vectorizer.pkl'))
-        joblib.dump(self.best_model, os.path.join(self.model_dir, 'best_model.pkl'))
-        joblib.dump(self.best_model_name, os.path.join(self.model_dir, 'best_model_name.pkl'))
-        if self.ensemble_model:
-            joblib.dump(self.ensemble_model, os.path.join(self.model_dir, 'ensemble_model.pkl'))
-        print(f"Models saved to {self.model_dir}")
+    def save_models(self, stage=True):
+        """Save trained models and vectorizer as a new model bundle version"""
+        objects = {'vectorizer': self.vectorizer}
+        model_names = {}
+        for name, model in self.models.items():
+            objects[model_key(name)] = model
+            model_names[name] = model_key(name)
+        if self.ensemble_model is not None:
+            objects['ensemble'] = self.ensemble_model
+            model_names[ENSEMBLE_MODEL_NAME] = 'ensemble'
+        if self.fast_model is not None:
+            objects['fast'] = self.fast_model
+        
+        extra_files = {}
+        if self.lemma_table is not None:
+            extra_files['lemmas.json'] = self.lemma_table
+        
+        self.bundle = ModelBundle.save(
+            self.bundles_dir,
+            objects,
+            best_model_name=self.best_model_name,
+            model_names=model_names,
+            feature_schema={
+                'n_tfidf': len(self.vectorizer.vocabulary_),
+                'advanced_feature_names': self.advanced_feature_names,
+                'n_features': len(self.vectorizer.vocabulary_) + len(self.advanced_feature_names)
+            },
+            vocabulary=self.vectorizer.vocabulary_,
+            metadata=self.training_metadata,
+            extra_files=extra_files,
+            stage=stage
+        )
+        if 'lemmas.json' in extra_files:
+            self.lemma_table_path = self.bundle.file_path('lemmas.json')
+        # Staged: ModelRegistry smoke-tests it before pointing CURRENT at it
+        print(f"Models saved to {self.bundle.path}{' (staged)' if stage else ''}")
     
     def load_models(self):
-        """Load trained models"""
+        """Load trained models: the current bundle if there is one, else the legacy pickles"""
+        try:
+            bundle = ModelBundle.load_current(self.bundles_dir)
+            if bundle is not None:
+                self.use_bundle(bundle)
+                print(f"Models loaded: {self.best_model_name} (bundle {bundle.version})")
+                return True
+        except Exception as e:
+            print(f"Model bundle error: {e}")
+        
         try:
             self.vectorizer = joblib.load(os.path.join(self.model_dir, 'vectorizer.pkl'))
             self.best_model = joblib.load(os.path.join(self.model_dir, 'best_model.pkl'))
             self.best_model_name = joblib.load(os.path.join(self.model_dir, 'best_model_name.pkl'))
-            try:
-                self.ensemble_model = joblib.load(os.path.join(self.model_dir, 'ensemble_model.pkl'))
-            except:
-                pass
+            self.fast_model = None
+            self.bundle = None
+            self._models = {}
+            self._ensemble_model = None
             print(f"Models loaded: {self.best_model_name}")
             return True
         except:
             print("No saved models found. Using default predictions.")
             return False
+    
+    def use_bundle(self, bundle):
+        """Serve predictions from a bundle; only the vectorizer and best model are loaded now"""
+        bundle.check_schema(self.advanced_feature_names)
+        vectorizer = bundle.get('vectorizer')
+        best_model_name = bundle.manifest['best_model']
+        best_model = bundle.get(bundle.model_names[best_model_name])
+        
+        self.vectorizer = vectorizer
+        self.best_model = best_model
+        self.best_model_name = best_model_name
+        # Loaded now rather than lazily: in tiered mode it scores every request, so it must
+        # have tracked the best model closely on held-out data to be used at all
+        fast_model = None
+        self.fast_path_rejected = None
+        if self.tiered and bundle.has('fast'):
+            self.fast_path_rejected = self._fast_path_rejection(bundle.manifest.get('metadata', {}).get('fast_path'))
+            if self.fast_path_rejected:
+                print(f"Fast-path model not used: {self.fast_path_rejected}")
+            else:
+                fast_model = bundle.get('fast')
+        self.fast_model = fast_model
+        self.bundle = bundle
+        self.training_metadata = bundle.manifest.get('metadata', {})
+        self._models = {}
+        self._ensemble_model = None
+        if bundle.has('lemmas.json'):
+            self.lemma_table_path = bundle.file_path('lemmas.json')
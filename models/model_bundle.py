@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+from threading import Lock
+
+import joblib
+
+BUNDLE_FORMAT_VERSION = 1
+CURRENT_POINTER = 'CURRENT'
+PREVIOUS_POINTER = 'PREVIOUS'
+STAGED_POINTER = 'STAGED'
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Streaming sha256 of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def model_key(name):
+    """File-safe key for a model name ('Random Forest' -> 'random_forest')"""
+    return ''.join(c if c.isalnum() else '_' for c in name.lower()).strip('_')
+
+
+class ModelBundle:
+    """
+    Versioned model artifact directory: manifest.json plus one joblib file per object.
+    Files are dumped uncompressed so numpy arrays load with mmap_mode='r'. Only plain array
+    attributes are memory-mapped (the LR/SVC coefficients); tree models are not, since sklearn's
+    Tree.__setstate__ copies the node arrays into memory it owns. Objects are loaded on first
+    use and checksum-verified.
+    """
+    
+    def __init__(self, path, manifest, mmap_mode='r', verify=True):
+        self.path = path
+        self.manifest = manifest
+        self.mmap_mode = mmap_mode
+        self.verify = verify
+        self._loaded = {}
+        self._verified = set()
+        self._lock = Lock()
+    
+    @property
+    def version(self):
+        return self.manifest['version']
+    
+    @property
+    def feature_schema(self):
+        return self.manifest['feature_schema']
+    
+    @property
+    def model_names(self):
+        """Model name -> object key, for every model in the bundle"""
+        return self.manifest['models']
+    
+    @classmethod
+    def save(cls, bundles_dir, objects, best_model_name, model_names, feature_schema,
+             vocabulary, metadata=None, extra_files=None, stage=True):
+        """
+        Write a new bundle version. It is not served until ModelRegistry has smoke-tested it and
+        pointed CURRENT at it; stage=True marks it (STAGED) for the registry to pick up.
+        objects: key -> estimator; model_names: model name -> key in objects;
+        extra_files: file name -> JSON-serializable content (e.g. the lemma table).
+        """
+        version = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+        path = os.path.join(bundles_dir, version)
+        tmp_path = path + '.tmp'
+        os.makedirs(tmp_path)
+        
+        files = {}
+        for key, obj in objects.items():
+            filename = f'{key}.joblib'
+            joblib.dump(obj, os.path.join(tmp_path, filename))
+            files[key] = {'path': filename, 'sha256': file_sha256(os.path.join(tmp_path, filename))}
+        for filename, content in (extra_files or {}).items():
+            with open(os.path.join(tmp_path, filename), 'w', encoding='utf-8') as f:
+                json.dump(content, f, sort_keys=True)
+            files[filename] = {'path': filename, 'sha256': file_sha256(os.path.join(tmp_path, filename))}
+        
+        manifest = {
+            'format_version': BUNDLE_FORMAT_VERSION,
+            'version': version,
+            'created_at': time.time(),
+            'best_model': best_model_name,
+            'models': model_names,
+            'feature_schema': feature_schema,
+            # Terms in column order, so the TF-IDF layout can be checked without unpickling
+            'vocabulary': sorted(vocabulary, key=vocabulary.get),
+            'metadata': metadata or {},
+            'files': files
+        }
+        with open(os.path.join(tmp_path, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, default=str)
+        
+        # The directory only appears under its final name once complete
+        os.replace(tmp_path, path)
+        if stage:
+            cls._write_pointer(bundles_dir, STAGED_POINTER, version)
+        return cls(path, manifest)
+    
+    @staticmethod
+    def _write_pointer(bundles_dir, pointer, version):
+        """Atomically write a pointer file"""
+        pointer = os.path.join(bundles_dir, pointer)
+        with open(pointer + '.tmp', 'w') as f:
+            f.write(version)
+        os.replace(pointer + '.tmp', pointer)
+    
+    @staticmethod
+    def _read_pointer(bundles_dir, pointer):
+        try:
+            with open(os.path.join(bundles_dir, pointer)) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+    
+    @classmethod
+    def set_current(cls, bundles_dir, version):
+        """Atomically point CURRENT at a bundle version, remembering the one it replaces as PREVIOUS"""
+        current = cls.current_version(bundles_dir)
+        if current is not None and current != version:
+            cls._write_pointer(bundles_dir, PREVIOUS_POINTER, current)
+        cls._write_pointer(bundles_dir, CURRENT_POINTER, version)
+    
+    @classmethod
+    def staged_version(cls, bundles_dir):
+        """The version waiting for the registry's smoke test, or None"""
+        return cls._read_pointer(bundles_dir, STAGED_POINTER)
+    
+    @classmethod
+    def clear_staged(cls, bundles_dir, version):
+        """Remove STAGED if it still names version (a newer bundle may have been staged since)"""
+        if cls.staged_version(bundles_dir) == version:
+            try:
+                os.remove(os.path.join(bundles_dir, STAGED_POINTER))
+            except FileNotFoundError:
+                pass
+    
+    @staticmethod
+    def clear_current(bundles_dir):
+        """Remove CURRENT, so loaders fall back to the legacy (pre-bundle) models"""
+        try:
+            os.remove(os.path.join(bundles_dir, CURRENT_POINTER))
+        except FileNotFoundError:
+            pass
+    
+    @classmethod
+    def current_version(cls, bundles_dir):
+        return cls._read_pointer(bundles_dir, CURRENT_POINTER)
+    
+    @classmethod
+    def load(cls, path, mmap_mode='r', verify=True):
+        """Read a bundle's manifest; objects are loaded lazily through get()"""
+        with open(os.path.join(path, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('format_version') != BUNDLE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported bundle format {manifest.get('format_version')} in {path}")
+        return cls(path, manifest, mmap_mode=mmap_mode, verify=verify)
+    
+    @classmethod
+    def load_current(cls, bundles_dir, **kwargs):
+        """The bundle CURRENT points at, or None"""
+        version = cls.current_version(bundles_dir)
+        if version is None:
+            return None
+        return cls.load(os.path.join(bundles_dir, version), **kwargs)
+    
+    def file_path(self, key):
+        """Absolute path of a bundle file, checksum-verified on first access"""
+        entry = self.manifest['files'][key]
+        path = os.path.join(self.path, entry['path'])
+        if self.verify and key not in self._verified:
+            if file_sha256(path) != entry['sha256']:
+                raise ValueError(f"Checksum mismatch for {entry['path']} in bundle {self.version}")
+            self._verified.add(key)
+        return path
+    
+    def get(self, key):
+        """Load (once) and return the object stored under key"""
+        with self._lock:
+            if key not in self._loaded:
+                self._loaded[key] = joblib.load(self.file_path(key), mmap_mode=self.mmap_mode)
+            return self._loaded[key]
+    
+    def has(self, key):
+        return key in self.manifest['files']
+    
+    def read_json(self, filename):
+        with open(self.file_path(filename), encoding='utf-8') as f:
+            return json.load(f)
+    
+    def check_schema(self, advanced_feature_names):
+        """Raise if the bundle was trained on a different feature layout"""
+        schema = self.feature_schema
+        if list(schema['advanced_feature_names']) != list(advanced_feature_names):
+            raise ValueError(f"Bundle {self.version} was trained on different advanced features; retrain the models")
+        # Hashed text features have no vocabulary to check
+        if schema.get('vectorizer') != 'hashing' and schema['n_tfidf'] != len(self.manifest['vocabulary']):
+            raise ValueError(f"Bundle {self.version} manifest vocabulary does not match its feature schema")
+    
+    @classmethod
+    def prune(cls, bundles_dir, keep=3, protect=(), stale_after=3600):
+        """
+        Delete old bundle versions, keeping the newest few, CURRENT, PREVIOUS, STAGED and any in
+        protect (versions this process serves). Pre-forked workers lag CURRENT by up to a poll
+        interval, so the version it replaced is kept too. Leftover .tmp directories from
+        interrupted saves are removed once older than stale_after seconds.
+        """
+        kept = {cls.current_version(bundles_dir), cls._read_pointer(bundles_dir, PREVIOUS_POINTER),
+                cls.staged_version(bundles_dir)} | set(protect)
+        versions = []
+        for name in os.listdir(bundles_dir):
+            path = os.path.join(bundles_dir, name)
+            if name.endswith('.tmp') and os.path.isdir(path):
+                try:
+                    if time.time() - os.path.getmtime(path) > stale_after:
+                        shutil.rmtree(path, ignore_errors=True)
+                except OSError:
+                    pass
+            elif os.path.isfile(os.path.join(path, 'manifest.json')):
+                versions.append(name)
+        versions.sort()
+        for version in versions[:-keep] if keep else versions:
+            if version not in kept:
+                shutil.rmtree(os.path.join(bundles_dir, version), ignore_errors=True)
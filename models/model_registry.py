@@ -0,0 +1,227 @@
+import math
+import os
+import threading
+import time
+
+from models.ml_classifier import MLScamClassifier
+from models.model_bundle import ModelBundle
+
+# A candidate model must score the scam clearly above the legitimate posting before it goes live
+SMOKE_TEST_TEXTS = [
+    'congratulation selected pay registration fee whatsapp immediately earn lakh work home',
+    'invite interview office monday bring resume technical round hr discussion'
+]
+
+
+class ModelRegistry:
+    """
+    Owns the live MLScamClassifier. New bundle versions are loaded off the request path,
+    smoke-tested and swapped in with a single reference assignment, so a request always
+    sees one consistent vectorizer/model pair. Rejected versions are never retried.
+    Trainers only stage a bundle (STAGED); CURRENT is moved here, once the smoke test passes.
+    """
+    
+    def __init__(self, bundles_dir=None, lexicon=None, poll_interval=5.0, smoke_texts=None, tiered=False):
+        self.lexicon = lexicon
+        self.tiered = tiered
+        self.bundles_dir = bundles_dir
+        self.poll_interval = poll_interval
+        self.smoke_texts = smoke_texts or SMOKE_TEST_TEXTS
+        self._current = None
+        self._previous = None
+        self._rejected = {}  # version -> reason
+        self._listeners = []
+        self._lock = threading.Lock()
+        # Serializes update checks from the watcher and from /train
+        self._update_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+        self.loaded_at = None
+        self.last_error = None
+    
+    def load_initial(self):
+        """
+        Load whatever is on disk (current bundle or legacy pickles), smoke-tested like any swap,
+        then promote a bundle staged while the app was down. A model failing the test is not
+        served: predictions fall back to the classifier's defaults until a good one is staged.
+        """
+        classifier = MLScamClassifier(lexicon=self.lexicon, tiered=self.tiered)
+        if self.bundles_dir:
+            classifier.bundles_dir = self.bundles_dir
+        classifier.load_models()
+        self.bundles_dir = classifier.bundles_dir
+        version = self.version(classifier)
+        if version is not None:
+            try:
+                self._smoke_test(classifier)
+            except Exception as e:
+                self._reject(version, e)
+                classifier = MLScamClassifier(lexicon=self.lexicon, tiered=self.tiered)
+                classifier.bundles_dir = self.bundles_dir
+        self._install(classifier)
+        self.check_for_update()
+        return self._current
+    
+    def current(self):
+        """The live classifier; take one reference per request and use it throughout"""
+        return self._current
+    
+    def version(self, classifier=None):
+        classifier = classifier or self._current
+        if classifier is None or classifier.best_model is None:
+            return None
+        return classifier.bundle.version if classifier.bundle is not None else 'legacy'
+    
+    def predict(self, text, source_text=None):
+        return self._current.predict(text, source_text)
+    
+    def predict_batch(self, texts, source_texts=None):
+        return self._current.predict_batch(texts, source_texts)
+    
+    def on_swap(self, callback):
+        """Call callback(classifier) after every swap (e.g. to reload the lemma table)"""
+        self._listeners.append(callback)
+    
+    def _install(self, classifier):
+        with self._lock:
+            self._previous = self._current
+            self._current = classifier
+            self.loaded_at = time.time()
+        for callback in self._listeners:
+            try:
+                callback(classifier)
+            except Exception as e:
+                print(f"Model swap listener error: {e}")
+    
+    def check_for_update(self):
+        """
+        Promote a staged bundle, or follow CURRENT if another process moved it: either way the
+        new version is loaded, smoke-tested and swapped in.
+        Returns the new version, or None when nothing changed or the candidate was rejected.
+        """
+        with self._update_lock:
+            return self._check_for_update()
+    
+    def deploy(self, version):
+        """
+        Smoke-test an unstaged bundle version and make it CURRENT and live if it passes.
+        Returns the version, or None if it was rejected.
+        """
+        with self._update_lock:
+            if version == self.version():
+                return version
+            candidate = self._load_candidate(version)
+            if candidate is not None:
+                ModelBundle.set_current(self.bundles_dir, version)
+            return self._go_live(version, candidate)
+    
+    def _check_for_update(self):
+        staged = ModelBundle.staged_version(self.bundles_dir)
+        if staged is not None and staged != self.version() and staged not in self._rejected:
+            candidate = self._load_candidate(staged)
+            if candidate is not None:
+                ModelBundle.set_current(self.bundles_dir, staged)
+            ModelBundle.clear_staged(self.bundles_dir, staged)
+            return self._go_live(staged, candidate)
+        
+        version = ModelBundle.current_version(self.bundles_dir)
+        if version is None or version == self.version() or version in self._rejected:
+            return None
+        candidate = self._load_candidate(version)
+        if candidate is None:
+            # Point CURRENT back at the live version so other workers do not pick it up
+            self._point_current_at(self.version())
+        return self._go_live(version, candidate)
+    
+    def _load_candidate(self, version):
+        """The bundle's classifier if it passes the smoke test, else None (and the version is rejected)"""
+        try:
+            candidate = MLScamClassifier(lexicon=self.lexicon, tiered=self.tiered)
+            candidate.bundles_dir = self.bundles_dir
+            candidate.use_bundle(ModelBundle.load(os.path.join(self.bundles_dir, version)))
+            self._smoke_test(candidate)
+            return candidate
+        except Exception as e:
+            self._reject(version, e)
+            return None
+    
+    def _go_live(self, version, candidate):
+        if candidate is None:
+            return None
+        self._install(candidate)
+        print(f"Model {version} is live ({candidate.best_model_name})")
+        try:
+            # Never the versions this process can still swap back to
+            ModelBundle.prune(self.bundles_dir, protect={version, self.version(self._previous)})
+        except OSError as e:
+            print(f"Model bundle prune error: {e}")
+        return version
+    
+    def _reject(self, version, error):
+        print(f"Model {version} rejected: {error}")
+        self._rejected[version] = str(error)
+        self.last_error = f"{version}: {error}"
+    
+    def _smoke_test(self, classifier):
+        """Raise unless the candidate produces sane, correctly ordered predictions"""
+        results = classifier.predict_batch(self.smoke_texts)
+        probabilities = [r['probability'] for r in results]
+        if not all(math.isfinite(p) and 0 <= p <= 100 for p in probabilities):
+            raise ValueError(f"Smoke test produced invalid probabilities: {probabilities}")
+        if probabilities[0] <= probabilities[-1]:
+            raise ValueError(f"Smoke test failed: scam scored {probabilities[0]}, legitimate {probabilities[-1]}")
+    
+    def rollback(self):
+        """Swap the previous classifier back in and reject the current version"""
+        with self._lock:
+            previous = self._previous
+        if previous is None:
+            raise ValueError('No previous model to roll back to')
+        bad_version = self.version()
+        self._rejected[bad_version] = 'rolled back'
+        self._install(previous)
+        self._previous = None
+        version = self.version(previous)
+        self._point_current_at(version)
+        return version
+    
+    def _point_current_at(self, version):
+        """Make CURRENT name the live version, so restarts and other workers load it too"""
+        if version == 'legacy':
+            # The legacy models are what loaders use when there is no CURRENT
+            ModelBundle.clear_current(self.bundles_dir)
+        elif version:
+            ModelBundle.set_current(self.bundles_dir, version)
+    
+    def start_watcher(self):
+        """Poll for new bundles in a daemon thread (call after forking, never at import)"""
+        with self._lock:
+            if self._watcher is not None and self._watcher.is_alive():
+                return
+            self._stop.clear()
+            self._watcher = threading.Thread(target=self._watch, name='model-registry', daemon=True)
+            self._watcher.start()
+    
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check_for_update()
+            except Exception as e:
+                print(f"Model watcher error: {e}")
+    
+    def stop(self):
+        self._stop.set()
+    
+    def status(self):
+        """Live model details for monitoring"""
+        classifier = self._current
+        return {
+            'version': self.version(classifier),
+            'model_name': classifier.best_model_name if classifier else None,
+            'loaded_at': self.loaded_at,
+            'previous_version': self.version(self._previous) if self._previous else None,
+            'rejected_versions': dict(self._rejected),
+            'last_error': self.last_error,
+            'watching': self._watcher is not None and self._watcher.is_alive(),
+            'tiered_inference': classifier.tier_stats() if classifier else None
+        }
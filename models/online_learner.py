@@ -0,0 +1,390 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+import joblib
+import numpy as np
+import sklearn
+from scipy.stats import binom
+
+from models.ml_classifier import MLScamClassifier
+from models.streaming_trainer import StreamingTrainer, parse_label
+from utils.text_preprocessor import load_lemma_table
+
+
+class FeedbackStore:
+    """SQLite log of analyst verdicts (text + scam/legitimate label), consumed in id order"""
+    
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        # Opened on first use, so importing the app creates no database files
+        self._connection = None
+    
+    @property
+    def _conn(self):
+        # Always read under self._lock, which also serializes the first open
+        if self._connection is None:
+            self._connection = self._open()
+        return self._connection
+    
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS feedback (id INTEGER PRIMARY KEY AUTOINCREMENT, text TEXT NOT NULL, '
+            'label INTEGER NOT NULL, source TEXT, created_at REAL NOT NULL)'
+        )
+        conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        conn.commit()
+        return conn
+    
+    def reopen(self):
+        """Fresh connection after a fork: SQLite handles must not be shared with the parent process"""
+        self._lock = threading.Lock()
+        if self._connection is not None:
+            self._inherited_conn = self._connection
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+    
+    def add_many(self, items):
+        """
+        Store verdicts given as dicts with text, label and optional source.
+        Raises ValueError (storing nothing) if any item is missing its text or has an unreadable label.
+        """
+        rows = []
+        now = time.time()
+        for i, item in enumerate(items):
+            text = (item.get('text') or '').strip() if isinstance(item, dict) else ''
+            label = parse_label(item.get('label')) if isinstance(item, dict) else None
+            if not text or label is None:
+                raise ValueError(f'Feedback item {i} needs a text and a scam/legitimate label')
+            rows.append((text, label, item.get('source'), now))
+        with self._lock:
+            cursor = self._conn.executemany(
+                'INSERT INTO feedback (text, label, source, created_at) VALUES (?, ?, ?, ?)', rows
+            )
+            self._conn.commit()
+            last_id = self._conn.execute('SELECT MAX(id) FROM feedback').fetchone()[0]
+        return list(range(last_id - cursor.rowcount + 1, last_id + 1)) if rows else []
+    
+    def fetch_after(self, last_id, limit):
+        """Up to limit (id, text, label) rows newer than last_id"""
+        with self._lock:
+            return self._conn.execute(
+                'SELECT id, text, label FROM feedback WHERE id > ? ORDER BY id LIMIT ?', (last_id, limit)
+            ).fetchall()
+    
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+    
+    def set_meta(self, key, value):
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (key, str(value)))
+            self._conn.commit()
+    
+    def stats(self):
+        with self._lock:
+            total, scams = self._conn.execute('SELECT COUNT(*), COALESCE(SUM(label), 0) FROM feedback').fetchone()
+        return {'total': total, 'scam': scams, 'legitimate': total - scams}
+    
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+
+
+class DriftMonitor:
+    """
+    Windowed error-rate drift check: the model's error on the latest window of feedback
+    (scored before learning from it) is compared with the best window seen so far.
+    """
+    
+    def __init__(self, window=200, threshold=0.1):
+        self.window = window
+        self.threshold = threshold
+        self._errors = deque(maxlen=window)
+        self._labels = deque(maxlen=window)
+        self.best_error = None
+        self.drift = False
+        self.drift_events = 0
+    
+    def add(self, errors, labels):
+        """Record per-sample errors (0/1) and labels; returns True when drift is newly detected"""
+        self._errors.extend(int(e) for e in errors)
+        self._labels.extend(int(l) for l in labels)
+        if len(self._errors) < self.window:
+            return False
+        error = self.error_rate
+        if self.best_error is None or error < self.best_error:
+            self.best_error = error
+        drifting = error > self.best_error + self.threshold
+        newly = drifting and not self.drift
+        self.drift = drifting
+        if newly:
+            self.drift_events += 1
+        return newly
+    
+    def reset(self):
+        """Start a fresh reference after the model has been replaced"""
+        self._errors.clear()
+        self._labels.clear()
+        self.best_error = None
+        self.drift = False
+    
+    @property
+    def error_rate(self):
+        return sum(self._errors) / len(self._errors) if self._errors else None
+    
+    def status(self):
+        return {
+            'window': self.window,
+            'samples': len(self._errors),
+            'error_rate': self.error_rate,
+            'best_error_rate': self.best_error,
+            'scam_rate': sum(self._labels) / len(self._labels) if self._labels else None,
+            'drift': self.drift,
+            'drift_events': self.drift_events
+        }
+
+
+def mcnemar_p_value(online_only, serving_only):
+    """
+    One-sided exact McNemar test: the probability of the online model being right at least
+    online_only times out of the online_only + serving_only verdicts the two models disagreed on,
+    if both were equally accurate
+    """
+    disagreements = online_only + serving_only
+    if disagreements == 0:
+        return 1.0
+    # Binomial tail P(X >= online_only), X ~ Bin(disagreements, 0.5); constant time at any count
+    return float(binom.sf(online_only - 1, disagreements, 0.5))
+
+
+def _new_comparison():
+    # Prequential counts since the last promotion: online model vs serving model on the same verdicts
+    return {'samples': 0, 'online_correct': 0, 'serving_correct': 0, 'online_only': 0, 'serving_only': 0}
+
+
+class OnlineLearner:
+    """
+    Incrementally trained model fed by analyst feedback.
+    New verdicts are preprocessed as /analyze does and consumed in mini-batches: each batch is first
+    scored by the online model and by the serving model (prequential evaluation, which also feeds
+    drift monitoring), then learned from with partial_fit. The online model is promoted - written as
+    a bundle and swapped in through the ModelRegistry - once it is significantly more accurate than
+    the serving model on enough fresh feedback (McNemar test on the verdicts they disagree on).
+    """
+    
+    def __init__(self, store, registry, state_path='models/saved/online/learner.joblib', batch_size=64,
+                 min_batch=16, promote_after=100, promote_alpha=0.05, comparison_window=5000, drift_window=200,
+                 drift_threshold=0.1, interval=60.0, max_backoff=86400.0, preprocessor=None):
+        self.store = store
+        self.registry = registry
+        self.state_path = state_path
+        self.batch_size = batch_size
+        self.min_batch = min_batch
+        self.promote_after = promote_after
+        self.promote_alpha = promote_alpha
+        # A comparison that has not led to a promotion after this many verdicts starts over
+        self.comparison_window = comparison_window
+        self.interval = interval
+        # After the registry rejects an online bundle, automatic promotion waits (doubling, up to max_backoff)
+        self.max_backoff = max_backoff
+        self._rejections = 0
+        self._retry_at = 0.0
+        # The TextPreprocessor serving uses; feedback is learned from and scored in the same form
+        self.preprocessor = preprocessor
+        # Built on first use (start, update or promote), not at import in every serving process
+        self.trainer = None
+        self.drift = DriftMonitor(window=drift_window, threshold=drift_threshold)
+        self._comparison = _new_comparison()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = None
+        self.last_update = None
+        self.last_promotion = None
+        self.last_error = None
+    
+    def _ensure_trainer(self):
+        """Resume the online model, or bootstrap it from the sample dataset (called with _lock held)"""
+        if self.trainer is not None:
+            return
+        classifier = MLScamClassifier(lexicon=self.registry.lexicon)
+        classifier.bundles_dir = self.registry.bundles_dir
+        self.trainer = StreamingTrainer(classifier=classifier)
+        try:
+            if os.path.exists(self.state_path):
+                state = joblib.load(self.state_path)
+                self.trainer.set_state(state['trainer'])
+                # State saved before the disagreement counts were kept starts a fresh comparison
+                if set(state['comparison']) == set(_new_comparison()):
+                    self._comparison = state['comparison']
+                self.drift = state['drift']
+                return
+        except Exception as e:
+            print(f"Online learner state error: {e}")
+        
+        from data.sample_dataset import get_training_data
+        texts, labels = get_training_data()
+        texts = self._preprocess(texts)
+        for _ in range(5):
+            self.trainer.partial_fit(texts, labels)
+    
+    def _preprocess(self, texts):
+        if self.preprocessor is None:
+            return list(texts)
+        return [self.preprocessor.preprocess(text) for text in texts]
+    
+    def _save_state(self):
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        state = {'trainer': self.trainer.get_state(), 'comparison': self._comparison, 'drift': self.drift}
+        joblib.dump(state, self.state_path + '.tmp')
+        os.replace(self.state_path + '.tmp', self.state_path)
+    
+    def update(self):
+        """
+        Learn from all feedback not seen yet, in mini-batches, then promote if the online model is ready.
+        Returns a summary of what was done.
+        """
+        with self._lock:
+            self._ensure_trainer()
+            last_id = int(self.store.get_meta('last_trained_id', 0))
+            consumed = 0
+            while True:
+                rows = self.store.fetch_after(last_id, self.batch_size)
+                # A partial batch waits for more feedback unless it has been pending a whole interval
+                if not rows or (len(rows) < self.min_batch and consumed == 0 and not self._batch_is_due()):
+                    break
+                self._learn([row[1] for row in rows], [row[2] for row in rows])
+                last_id = rows[-1][0]
+                consumed += len(rows)
+                self.store.set_meta('last_trained_id', last_id)
+                if len(rows) < self.batch_size:
+                    break
+            
+            if consumed:
+                self.last_update = time.time()
+                self._save_state()
+            promoted = self._maybe_promote()
+            return {'learned': consumed, 'promoted': promoted, 'last_feedback_id': last_id}
+    
+    def _batch_is_due(self):
+        return self.last_update is None or time.time() - self.last_update >= self.interval
+    
+    def _learn(self, texts, labels):
+        labels = np.asarray(labels)
+        preprocessed = self._preprocess(texts)
+        online = (self.trainer.predict_proba(preprocessed) >= 0.5).astype(int)
+        serving = np.array([int(r['is_scam']) for r in self.registry.current().predict_batch(preprocessed, texts)])
+        
+        online_right, serving_right = online == labels, serving == labels
+        self._comparison['samples'] += len(labels)
+        self._comparison['online_correct'] += int(online_right.sum())
+        self._comparison['serving_correct'] += int(serving_right.sum())
+        self._comparison['online_only'] += int((online_right & ~serving_right).sum())
+        self._comparison['serving_only'] += int((serving_right & ~online_right).sum())
+        if self.drift.add(serving != labels, labels):
+            print(f"Model drift detected: serving error rate {self.drift.error_rate:.3f} "
+                  f"(best {self.drift.best_error:.3f}) on recent feedback")
+        
+        self.trainer.partial_fit(preprocessed, labels)
+    
+    def _maybe_promote(self, force=False):
+        comparison = self._comparison
+        if not force:
+            if comparison['samples'] < self.promote_after or time.time() < self._retry_at:
+                return False
+            # A tie (e.g. right after a promotion, against its own snapshot) never promotes
+            p_value = mcnemar_p_value(comparison['online_only'], comparison['serving_only'])
+            if comparison['online_only'] <= comparison['serving_only'] or p_value >= self.promote_alpha:
+                if comparison['samples'] >= self.comparison_window:
+                    self._comparison = _new_comparison()
+                return False
+        
+        self.trainer.metadata = {
+            'online': True,
+            'last_feedback_id': int(self.store.get_meta('last_trained_id', 0)),
+            'sklearn_version': sklearn.__version__,
+            'prequential': {
+                'samples': comparison['samples'],
+                'online_accuracy': comparison['online_correct'] / comparison['samples'] if comparison['samples'] else None,
+                'serving_accuracy': comparison['serving_correct'] / comparison['samples'] if comparison['samples'] else None,
+                'mcnemar_p_value': mcnemar_p_value(comparison['online_only'], comparison['serving_only'])
+            },
+            'drift': self.drift.status()
+        }
+        # The online model learns from text preprocessed with the serving lemmas, so it ships them too
+        # (never rebuilt here: that would load WordNet on the request or learner thread)
+        bundle = self.trainer.save(lemma_table=load_lemma_table(self.registry.current().lemma_table_path),
+                                   build_lemmas=False)
+        self.registry.check_for_update()
+        if self.registry.version() != bundle.version:
+            self.last_error = self.registry.last_error
+            self._rejections += 1
+            self._retry_at = time.time() + min(self.interval * 2 ** self._rejections, self.max_backoff)
+            return False
+        
+        self._rejections = 0
+        self._retry_at = 0.0        
+        self.last_promotion = {'version': bundle.version, 'at': time.time(), **self.trainer.metadata['prequential']}
+        self._comparison = _new_comparison()
+        self.drift.reset()
+        self._save_state()
+        return True
+    
+    def promote(self):
+        """Promote the online model now, regardless of the comparison; returns True if it went live"""
+        with self._lock:
+            self._ensure_trainer()
+            return self._maybe_promote(force=True)
+    
+    def start(self):
+        """Run update() every interval seconds in a daemon thread (call after forking, never at import)"""
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._stop.clear()
+            self._worker = threading.Thread(target=self._run, name='online-learner', daemon=True)
+            self._worker.start()
+    
+    def _run(self):
+        try:
+            with self._lock:
+                self._ensure_trainer()
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Online learner error: {e}")
+        while not self._stop.wait(self.interval):
+            try:
+                self.update()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Online learner error: {e}")
+    
+    def stop(self):
+        self._stop.set()
+    
+    def status(self):
+        comparison = dict(self._comparison)
+        return {
+            'feedback': self.store.stats(),
+            'last_trained_id': int(self.store.get_meta('last_trained_id', 0)),
+            'last_update': self.last_update,
+            'since_promotion': dict(comparison, mcnemar_p_value=mcnemar_p_value(comparison['online_only'],
+                                                                                comparison['serving_only'])),
+            'last_promotion': self.last_promotion,
+            'drift': self.drift.status(),
+            'last_error': self.last_error,
+            'promotion_retry_at': self._retry_at or None,
+            'loaded': self.trainer is not None,
+            'running': self._worker is not None and self._worker.is_alive()
+        }
@@ -0,0 +1,312 @@
+import copy
+import csv
+import glob
+import json
+import os
+import random
+import re
+import time
+
+import numpy as np
+import sklearn
+from scipy.sparse import hstack
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+
+from models.ml_classifier import MLScamClassifier
+from models.model_bundle import ModelBundle, model_key
+from utils.text_preprocessor import TOKEN_PATTERN, build_lemma_table
+
+STREAMING_MODEL_NAME = 'SGD (Streaming)'
+
+# Column aliases for labelled postings (matched case-insensitively, ignoring punctuation)
+TEXT_COLUMN_ALIASES = ['text', 'job_text', 'description', 'job_description', 'posting', 'content']
+LABEL_COLUMN_ALIASES = ['label', 'is_scam', 'fraudulent', 'scam', 'target', 'class']
+
+LABEL_VALUES = {
+    '1': 1, 'true': 1, 'yes': 1, 'scam': 1, 'fraud': 1, 'fraudulent': 1, 'fake': 1,
+    '0': 0, 'false': 0, 'no': 0, 'legit': 0, 'legitimate': 0, 'genuine': 0, 'real': 0
+}
+
+CLASSES = np.array([0, 1])
+
+SHARD_FORMATS = {'.jsonl': 'jsonl', '.json': 'jsonl', '.csv': 'csv', '.parquet': 'parquet'}
+
+
+def parse_label(value):
+    """0/1 label from the usual spellings, or None if it cannot be read"""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return 1 if value >= 0.5 else 0
+    return LABEL_VALUES.get(str(value).strip().lower())
+
+
+def _resolve_column(names, aliases, kind):
+    normalized = [re.sub(r'[^a-z0-9]+', '_', str(n).strip().lower()).strip('_') for n in names]
+    for alias in aliases:
+        if alias in normalized:
+            return names[normalized.index(alias)]
+    raise ValueError(f'No {kind} column found in {list(names)}')
+
+
+def expand_shards(paths):
+    """Shard files for a list of files, directories and glob patterns, in sorted order"""
+    shards = []
+    for path in paths:
+        if os.path.isdir(path):
+            candidates = [os.path.join(path, name) for name in os.listdir(path)]
+        else:
+            candidates = glob.glob(path) or [path]
+        shards.extend(sorted(c for c in candidates if os.path.splitext(c)[1].lower() in SHARD_FORMATS))
+    if not shards:
+        raise ValueError(f'No JSONL, CSV or Parquet shards found in {paths}')
+    return shards
+
+
+def _read_jsonl(path):
+    text_key = label_key = None
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if text_key is None:
+                text_key = _resolve_column(list(record), TEXT_COLUMN_ALIASES, 'text')
+                label_key = _resolve_column(list(record), LABEL_COLUMN_ALIASES, 'label')
+            yield record.get(text_key), record.get(label_key)
+
+
+def _read_csv(path):
+    # Job descriptions can be longer than the csv module's default field limit
+    csv.field_size_limit(16 * 1024 * 1024)
+    with open(path, newline='', encoding='utf-8', errors='replace') as f:
+        reader = csv.DictReader(f)
+        text_key = _resolve_column(reader.fieldnames or [], TEXT_COLUMN_ALIASES, 'text')
+        label_key = _resolve_column(reader.fieldnames or [], LABEL_COLUMN_ALIASES, 'label')
+        for row in reader:
+            yield row.get(text_key), row.get(label_key)
+
+
+def _read_parquet(path, batch_size=10000):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError(f'Reading {path} needs pyarrow (pip install pyarrow)')
+    parquet_file = pq.ParquetFile(path)
+    names = parquet_file.schema_arrow.names
+    text_key = _resolve_column(names, TEXT_COLUMN_ALIASES, 'text')
+    label_key = _resolve_column(names, LABEL_COLUMN_ALIASES, 'label')
+    # Only the two needed columns are decoded, one row group batch at a time
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=[text_key, label_key]):
+        yield from zip(batch.column(text_key).to_pylist(), batch.column(label_key).to_pylist())
+
+
+def iter_labelled_chunks(paths, chunk_size=5000):
+    """
+    Stream (texts, labels) chunks of at most chunk_size rows from JSONL/CSV/Parquet shards.
+    Rows with an empty text or an unreadable label are skipped.
+    """
+    readers = {'jsonl': _read_jsonl, 'csv': _read_csv, 'parquet': _read_parquet}
+    texts, labels = [], []
+    for path in expand_shards(paths):
+        for text, label in readers[SHARD_FORMATS[os.path.splitext(path)[1].lower()]](path):
+            label = parse_label(label)
+            if not text or label is None:
+                continue
+            texts.append(str(text))
+            labels.append(label)
+            if len(texts) >= chunk_size:
+                yield texts, labels
+                texts, labels = [], []
+    if texts:
+        yield texts, labels
+
+
+class StreamingTrainer:
+    """
+    Out-of-core training on labelled corpora too large for memory.
+    Text is hashed (no vocabulary to fit), the advanced features are standardized with running
+    statistics and an SGD logistic regression is updated chunk by chunk, so memory depends on
+    chunk_size and n_features, never on corpus size. Each chunk is scored before the model
+    learns from it (progressive validation). The result is a model bundle MLScamClassifier serves.
+    """
+    
+    def __init__(self, classifier=None, n_features=2 ** 20, ngram_range=(1, 2), alpha=1e-4,
+                 eta0=0.1, chunk_size=5000, epochs=1, max_lemma_words=100000, random_state=42):
+        # Supplies the advanced features, the lexicon and the bundles directory
+        self.classifier = classifier or MLScamClassifier()
+        self.chunk_size = chunk_size
+        self.epochs = epochs
+        self.max_lemma_words = max_lemma_words
+        self.random_state = random_state
+        self.vectorizer = HashingVectorizer(
+            n_features=n_features,
+            ngram_range=ngram_range,
+            alternate_sign=False,
+            norm='l2'
+        )
+        # Only the small dense advanced block is standardized, so it can be centered too
+        self.scaler = StandardScaler()
+        # A constant step keeps the weights bounded on small batches and keeps tracking recent data
+        self.model = SGDClassifier(loss='log_loss', alpha=alpha, learning_rate='constant', eta0=eta0,
+                                   random_state=random_state)
+        self._words = set()
+        self.metadata = {}
+    
+    def _features(self, texts, fit_scaler=False):
+        X_advanced = self.classifier.extract_advanced_features(texts)
+        if fit_scaler:
+            self.scaler.partial_fit(X_advanced)
+        X_advanced = self.scaler.transform(X_advanced)
+        return hstack([self.vectorizer.transform(texts), X_advanced]).tocsr()
+    
+    def _collect_words(self, texts):
+        """Remember corpus words (up to a cap) for the fast-mode lemma table"""
+        if len(self._words) >= self.max_lemma_words:
+            return
+        for text in texts:
+            self._words.update(TOKEN_PATTERN.findall(text.lower()))
+        if len(self._words) > self.max_lemma_words:
+            self._words = set(sorted(self._words)[:self.max_lemma_words])
+    
+    @property
+    def is_fitted(self):
+        return hasattr(self.model, 'coef_')
+    
+    def partial_fit(self, texts, labels):
+        """Learn from one in-memory chunk (e.g. a mini-batch of analyst feedback)"""
+        X = self._features(texts, fit_scaler=True)
+        self.model.partial_fit(X, np.asarray(labels), classes=CLASSES)
+        self._collect_words(texts)
+    
+    def predict_proba(self, texts):
+        """Scam probability (0-1) per text from the model as trained so far"""
+        return self.model.predict_proba(self._features(texts))[:, 1]
+    
+    def get_state(self):
+        """Learned state, for resuming training in another process"""
+        return {'vectorizer': self.vectorizer, 'scaler': self.scaler, 'model': self.model, 'words': self._words}
+    
+    def set_state(self, state):
+        self.vectorizer = state['vectorizer']
+        self.scaler = state['scaler']
+        self.model = state['model']
+        self._words = state['words']
+    
+    def train(self, paths):
+        """Stream the shards epochs times, then save and return the model bundle"""
+        start = time.perf_counter()
+        rng = random.Random(self.random_state)
+        totals = {'samples': 0, 'positive': 0, 'chunks': 0}
+        progressive = {'scored': 0, 'correct': 0, 'log_loss': 0.0, 'tp': 0, 'fp': 0, 'fn': 0}
+        
+        for epoch in range(self.epochs):
+            for texts, labels in iter_labelled_chunks(paths, self.chunk_size):
+                # Shards are often sorted by label; shuffle within the chunk so SGD sees a mix
+                order = list(range(len(texts)))
+                rng.shuffle(order)
+                texts = [texts[i] for i in order]
+                y = np.array([labels[i] for i in order])
+                
+                X = self._features(texts, fit_scaler=epoch == 0)
+                if epoch == 0 and totals['chunks'] > 0:
+                    self._score_chunk(X, y, progressive)
+                self.model.partial_fit(X, y, classes=CLASSES)
+                
+                totals['chunks'] += 1
+                if epoch == 0:
+                    totals['samples'] += len(y)
+                    totals['positive'] += int(y.sum())
+                    self._collect_words(texts)
+                print(f"Epoch {epoch + 1}/{self.epochs}, chunk {totals['chunks']}: {totals['samples']} samples, "
+                      f"progressive accuracy {self._summary(progressive)['accuracy']:.4f}")
+        
+        if totals['samples'] == 0:
+            raise ValueError(f'No labelled rows found in {paths}')
+        if totals['positive'] in (0, totals['samples']):
+            raise ValueError('Training data needs both scam and legitimate postings')
+        
+        self.metadata = {
+            'streaming': True,
+            'n_samples': totals['samples'],
+            'n_positive': totals['positive'],
+            'chunks': totals['chunks'],
+            'epochs': self.epochs,
+            'sklearn_version': sklearn.__version__,
+            'progressive_validation': self._summary(progressive),
+            'timings': {'train': round(time.perf_counter() - start, 3)}
+        }
+        return self.save()
+    
+    def _score_chunk(self, X, y, progressive):
+        """Test-then-train: score a chunk with the model as it was before seeing it"""
+        probabilities = np.clip(self.model.predict_proba(X)[:, 1], 1e-15, 1 - 1e-15)
+        predictions = (probabilities >= 0.5).astype(int)
+        progressive['scored'] += len(y)
+        progressive['correct'] += int((predictions == y).sum())
+        progressive['log_loss'] -= float(np.sum(y * np.log(probabilities) + (1 - y) * np.log(1 - probabilities)))
+        progressive['tp'] += int(((predictions == 1) & (y == 1)).sum())
+        progressive['fp'] += int(((predictions == 1) & (y == 0)).sum())
+        progressive['fn'] += int(((predictions == 0) & (y == 1)).sum())
+    
+    @staticmethod
+    def _summary(progressive):
+        scored = progressive['scored']
+        tp, fp, fn = progressive['tp'], progressive['fp'], progressive['fn']
+        return {
+            'scored': scored,
+            'accuracy': progressive['correct'] / scored if scored else 0.0,
+            'log_loss': progressive['log_loss'] / scored if scored else 0.0,
+            'f1': 2 * tp / (2 * tp + fp + fn) if tp else 0.0
+        }
+    
+    def serving_model(self):
+        """
+        The SGD model with the advanced-feature standardization folded into its weights and
+        intercept, so it takes the same unscaled feature matrix MLScamClassifier.predict_batch builds
+        """
+        n_hashed = self.vectorizer.n_features
+        model = copy.deepcopy(self.model)
+        model.coef_[:, n_hashed:] /= self.scaler.scale_
+        model.intercept_ -= model.coef_[:, n_hashed:] @ self.scaler.mean_
+        return model
+    
+    def save(self, lemma_table=None, build_lemmas=True):
+        """
+        Write the hashing vectorizer and model as a new bundle version.
+        lemma_table is shipped as the bundle's lemmas.json; without one it is built from the corpus
+        words (loading WordNet) unless build_lemmas is False.
+        """
+        advanced_feature_names = self.classifier.advanced_feature_names
+        key = model_key(STREAMING_MODEL_NAME)
+        
+        extra_files = {}
+        if lemma_table is not None:
+            extra_files['lemmas.json'] = lemma_table
+        elif build_lemmas:
+            # Best effort: a bundle without lemmas.json is served in nltk mode under 'auto'
+            try:
+                extra_files['lemmas.json'] = build_lemma_table(self._words)
+            except Exception as e:
+                print(f"Warning: could not build the lemma table for fast preprocessing, saving without it: {e}")
+        
+        bundle = ModelBundle.save(
+            self.classifier.bundles_dir,
+            {'vectorizer': self.vectorizer, key: self.serving_model()},
+            best_model_name=STREAMING_MODEL_NAME,
+            model_names={STREAMING_MODEL_NAME: key},
+            feature_schema={
+                'vectorizer': 'hashing',
+                'n_hashed': self.vectorizer.n_features,
+                'advanced_feature_names': advanced_feature_names,
+                'n_features': self.vectorizer.n_features + len(advanced_feature_names)
+            },
+            vocabulary={},
+            metadata=self.metadata,
+            extra_files=extra_files
+        )
+        print(f"Model saved to {bundle.path} (staged)")
+        return bundle
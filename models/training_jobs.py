@@ -0,0 +1,327 @@
+import atexit
+import json
+import multiprocessing
+import os
+import queue
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+
+ACTIVE_STATUSES = ('queued', 'running', 'deploying')
+ACTIVE_PLACEHOLDERS = ', '.join('?' * len(ACTIVE_STATUSES))
+# Once a finished job starts deploying its bundle it can no longer be cancelled
+CANCELLABLE_STATUSES = ('queued', 'running')
+
+
+def run_training_job(progress_queue, bundles_dir, classifier_vocabulary=None):
+    """
+    Training process entry point: train on the sample dataset and write a new model bundle.
+    The bundle is not staged; the dispatcher deploys it only if the job was not cancelled.
+    """
+    try:
+        from data.sample_dataset import get_training_data
+        from models.ml_classifier import MLScamClassifier
+        from utils.scam_lexicon import ScamLexicon
+        
+        # Train on the same keyword features the serving process uses
+        lexicon = ScamLexicon()
+        if classifier_vocabulary is not None:
+            lexicon.set_vocabulary('classifier', classifier_vocabulary)
+        
+        # Distil the fast-path model on the preprocessing the app serves with
+        classifier = MLScamClassifier(lexicon=lexicon, preprocessor_mode=os.getenv('PREPROCESSOR_MODE', 'auto'))
+        classifier.bundles_dir = bundles_dir
+        progress_queue.put(('progress', (0, 'Loading training data')))
+        texts, labels = get_training_data()
+        results = classifier.train_models(
+            texts, labels,
+            progress_callback=lambda percent, message: progress_queue.put(('progress', (percent, message))),
+            stage=False
+        )
+        progress_queue.put(('done', {
+            'model_version': classifier.bundle.version,
+            'best_model': classifier.best_model_name,
+            'samples': len(texts),
+            'results': {name: {'cv_f1': float(res['cv_f1_mean'])} for name, res in results.items()},
+            'timings': classifier.training_metadata.get('timings', {})
+        }))
+    except Exception as e:
+        traceback.print_exc()
+        progress_queue.put(('error', str(e)))
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class TrainingJobStore:
+    """
+    SQLite record of training jobs, shared by every process serving the app (serve.py workers),
+    so a job can be polled or cancelled through any of them. Jobs are owned by the process that
+    runs them; an active job whose owner has exited is failed the next time jobs are read.
+    """
+    
+    FIELDS = ('id', 'status', 'progress', 'stage', 'created_at', 'started_at', 'finished_at', 'result', 'error')
+    
+    def __init__(self, path, history=50):
+        self.path = path
+        self.history = history
+        self._lock = threading.Lock()
+        # Opened on first use, so importing the app creates no database files
+        self._connection = None
+    
+    @property
+    def _conn(self):
+        # Always read under self._lock, which also serializes the first open
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = self._connect()
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, progress INTEGER NOT NULL, '
+                'stage TEXT, created_at REAL NOT NULL, started_at REAL, finished_at REAL, result TEXT, error TEXT, '
+                'owner_pid INTEGER NOT NULL)'
+            )
+            self._connection = conn
+        return self._connection
+    
+    def _connect(self):
+        # Autocommit; multi-statement changes take the database write lock with BEGIN IMMEDIATE
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+    
+    def reopen(self):
+        """Fresh connection after a fork: SQLite handles must not be shared with the parent process"""
+        self._lock = threading.Lock()
+        if self._connection is not None:
+            self._inherited_conn = self._connection
+            self._connection = self._connect()
+    
+    def create(self, job_id, owner_pid):
+        """Insert a queued job; raises ValueError if one is already queued or running in any process"""
+        with self._lock:
+            # The write lock makes check-then-insert atomic across processes
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._fail_orphans()
+                active = self._conn.execute(
+                    f'SELECT id, status FROM jobs WHERE status IN ({ACTIVE_PLACEHOLDERS})',
+                    ACTIVE_STATUSES
+                ).fetchone()
+                if active is not None:
+                    raise ValueError(f"Training job {active[0]} is already {active[1]}")
+                self._conn.execute(
+                    'INSERT INTO jobs (id, status, progress, stage, created_at, owner_pid) VALUES (?, ?, ?, ?, ?, ?)',
+                    (job_id, 'queued', 0, 'Queued', time.time(), owner_pid)
+                )
+                self._conn.execute(
+                    'DELETE FROM jobs WHERE id NOT IN (SELECT id FROM jobs ORDER BY created_at DESC LIMIT ?)',
+                    (self.history,)
+                )
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+    
+    def get(self, job_id):
+        """Snapshot of a job, or None"""
+        with self._lock:
+            self._fail_orphans()
+            row = self._conn.execute(
+                f"SELECT {', '.join(self.FIELDS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(self.FIELDS, row))
+        job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        return job
+    
+    def update(self, job_id, statuses=None, **fields):
+        """Set fields on a job, only while its status is one of statuses if given; True if it was updated"""
+        if fields.get('result') is not None:
+            fields['result'] = json.dumps(fields['result'], default=str)
+        sql = f"UPDATE jobs SET {', '.join(f'{name} = ?' for name in fields)} WHERE id = ?"
+        params = list(fields.values()) + [job_id]
+        if statuses:
+            sql += f" AND status IN ({', '.join('?' * len(statuses))})"
+            params.extend(statuses)
+        with self._lock:
+            return self._conn.execute(sql, params).rowcount > 0
+    
+    def _fail_orphans(self):
+        """Fail active jobs whose owning process is gone (a recycled or crashed worker)"""
+        rows = self._conn.execute(
+            f'SELECT id, owner_pid FROM jobs WHERE status IN ({ACTIVE_PLACEHOLDERS})',
+            ACTIVE_STATUSES
+        ).fetchall()
+        for job_id, owner_pid in rows:
+            if not _process_alive(owner_pid):
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', stage = 'Failed', finished_at = ?, error = ? "
+                    f"WHERE id = ? AND status IN ({ACTIVE_PLACEHOLDERS})",
+                    (time.time(), f'Serving process {owner_pid} exited before the job finished', job_id) + ACTIVE_STATUSES
+                )
+    
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+
+
+class TrainingJobManager:
+    """
+    Queue of model training jobs, each run in its own process so serving threads are never blocked.
+    One dispatcher thread runs jobs one at a time; progress comes back over a multiprocessing queue.
+    Job state lives in a TrainingJobStore next to the bundles, shared with the other serving processes.
+    """
+    
+    def __init__(self, bundles_dir, lexicon=None, on_success=None, history=50, mp_context='spawn', store_path=None):
+        self.bundles_dir = bundles_dir
+        self.lexicon = lexicon
+        # on_success(result) deploys a succeeded, uncancelled job's bundle (training never stages it);
+        # it runs in the dispatcher and a returned dict is merged into the result
+        self.on_success = on_success
+        self.store = TrainingJobStore(store_path or os.path.join(bundles_dir, 'training_jobs.db'), history=history)
+        self._ctx = multiprocessing.get_context(mp_context)
+        self._processes = {}
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._dispatcher = None
+        atexit.register(self.shutdown)
+    
+    def reopen(self):
+        """Per-process state after a fork: jobs queued or running in the parent are not ours"""
+        self.store.reopen()
+        self._processes = {}
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._dispatcher = None
+    
+    def submit(self):
+        """Queue a training job; raises ValueError if one is already queued or running"""
+        job_id = uuid.uuid4().hex
+        self.store.create(job_id, os.getpid())
+        with self._lock:
+            # The dispatcher thread is started on first use, never at import (fork safety)
+            if self._dispatcher is None or not self._dispatcher.is_alive():
+                self._dispatcher = threading.Thread(target=self._dispatch, name='training-dispatcher', daemon=True)
+                self._dispatcher.start()
+        self._queue.put(job_id)
+        return self.store.get(job_id)
+    
+    def get(self, job_id):
+        """Snapshot of a job, or None"""
+        return self.store.get(job_id)
+    
+    def cancel(self, job_id):
+        """Cancel a queued or running job; returns the job snapshot"""
+        cancelled = self.store.update(
+            job_id, CANCELLABLE_STATUSES, status='cancelled', stage='Cancelled', finished_at=time.time()
+        )
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        if not cancelled:
+            raise ValueError(f"Training job {job_id} is already {job['status']}")
+        # A job run by another process is terminated by its own dispatcher, which watches the status
+        with self._lock:
+            process = self._processes.get(job_id)
+        if process is not None and process.is_alive():
+            process.terminate()
+        return job
+    
+    def _dispatch(self):
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                return
+            try:
+                self._run(job_id)
+            except Exception as e:
+                print(f"Training job error: {e}")
+                self._finish(job_id, 'failed', error=str(e))
+    
+    def _run(self, job_id):
+        progress = self._ctx.Queue()
+        vocabulary = None
+        if self.lexicon is not None:
+            vocabulary = {category: list(keywords) for category, keywords in self.lexicon.vocabulary('classifier').items()}
+        # Not a daemon: the trainer may start its own worker processes
+        process = self._ctx.Process(
+            target=run_training_job, args=(progress, self.bundles_dir, vocabulary), name=f"train-{job_id[:8]}"
+        )
+        if not self.store.update(job_id, ('queued',), status='running', started_at=time.time()):
+            return
+        with self._lock:
+            self._processes[job_id] = process
+        process.start()
+        
+        outcome = None
+        while outcome is None:
+            if self.store.get(job_id)['status'] == 'cancelled':
+                process.terminate()
+                break
+            try:
+                kind, payload = progress.get(timeout=0.5)
+            except queue.Empty:
+                if not process.is_alive():
+                    break
+                continue
+            if kind == 'progress':
+                self.store.update(job_id, ('running',), progress=payload[0], stage=payload[1])
+            else:
+                outcome = (kind, payload)
+        
+        process.join(timeout=30)
+        with self._lock:
+            self._processes.pop(job_id, None)
+        
+        if outcome is None:
+            self._finish(job_id, 'failed', error=f'Training process exited with code {process.exitcode}')
+        elif outcome[0] == 'error':
+            self._finish(job_id, 'failed', error=outcome[1])
+        else:
+            result = outcome[1]
+            # Claimed atomically, so a cancel that lands first keeps the trained bundle off CURRENT
+            if not self.store.update(job_id, ('running',), status='deploying', stage='Deploying'):
+                return
+            if self.on_success is not None:
+                try:
+                    result.update(self.on_success(result) or {})
+                except Exception as e:
+                    print(f"Training job callback error: {e}")
+            if result.get('deployed') is False:
+                # Trained, but the registry rejected the bundle: the old model is still serving
+                self._finish(job_id, 'not_deployed', result=result,
+                             error=f"Model {result['model_version']} was not deployed: {result.get('deploy_error')}")
+            else:
+                self._finish(job_id, 'succeeded', result=result)
+    
+    def _finish(self, job_id, status, result=None, error=None):
+        # A cancelled job stays cancelled even if the process managed to report back
+        stages = {'succeeded': 'Done', 'not_deployed': 'Not deployed'}
+        fields = {'status': status, 'stage': stages.get(status, 'Failed'),
+                  'finished_at': time.time(), 'result': result, 'error': error}
+        if status == 'succeeded':
+            fields['progress'] = 100
+        self.store.update(job_id, ACTIVE_STATUSES, **fields)
+    
+    def shutdown(self):
+        """Terminate running training processes (called at interpreter exit)"""
+        with self._lock:
+            processes = dict(self._processes)
+        for job_id, process in processes.items():
+            if process.is_alive():
+                process.terminate()
+                self._finish(job_id, 'failed', error='Training stopped: the serving process exited')
+        self._queue.put(None)
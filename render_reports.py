@@ -0,0 +1,40 @@
+"""
+Render PDF reports for stored analyses in bulk, one generator per worker process
+Usage: python render_reports.py [report_dir] [processes]
+"""
+
+import os
+import sys
+import time
+
+from utils.report_service import ReportService
+from utils.report_store import ReportStore
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] in ('-h', '--help'):
+        print(__doc__.strip())
+        sys.exit(0)
+    
+    report_dir = sys.argv[1] if len(sys.argv) > 1 else os.getenv('REPORT_DIR', 'reports')
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    
+    print("=" * 60)
+    print("JobShield AI - Bulk Report Rendering")
+    print("=" * 60)
+    
+    # Retention is left to the server; this only fills in missing PDFs
+    store = ReportStore(report_dir, max_age_seconds=float('inf'), max_bytes=None, sweep_interval=float('inf'))
+    service = ReportService(generator=None, store=store)
+    
+    start = time.time()
+    summary = service.render_all(processes=processes)
+    elapsed = time.time() - start
+    
+    print(f"\nRendered {summary['rendered']} of {summary['requested']} reports in {elapsed:.1f}s "
+          f"({summary['failed']} failed)")
+    if summary['rendered']:
+        print(f"{summary['rendered'] / elapsed:.1f} reports/s")
+    service.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+"""
+Production server: a pre-fork pool of WSGI workers sharing one listening socket.
+The parent loads the app (models, lexicon, registries) once, freezes it out of the garbage
+collector and forks workers, so the loaded objects are shared copy-on-write instead of being
+loaded per worker. CPU-bound inference then runs in parallel across cores.
+
+Usage: python serve.py [--host HOST] [--port PORT] [--workers N] [--max-requests N]
+
+Signals (to the parent): TERM/INT drain in-flight requests and stop, HUP recycles every worker.
+"""
+
+import argparse
+import gc
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Run JobShield AI with a pre-fork worker pool')
+    parser.add_argument('--host', default=os.getenv('SERVE_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('SERVE_PORT', '5000')))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('SERVE_WORKERS', '0')) or os.cpu_count() or 1,
+                        help='Worker processes (default: CPU count)')
+    parser.add_argument('--max-requests', type=int, default=int(os.getenv('SERVE_MAX_REQUESTS', '10000')),
+                        help='Recycle a worker after this many requests (0: never)')
+    parser.add_argument('--max-requests-jitter', type=int, default=int(os.getenv('SERVE_MAX_REQUESTS_JITTER', '500')),
+                        help='Random extra requests per worker, so workers are not all recycled at once')
+    parser.add_argument('--graceful-timeout', type=float, default=float(os.getenv('SERVE_GRACEFUL_TIMEOUT', '30')),
+                        help='Seconds a stopping worker gets to finish in-flight requests')
+    return parser.parse_args()
+
+class RequestHandler(WSGIRequestHandler):
+    # One request per connection: an idle keep-alive client would otherwise hold up a worker's graceful exit
+    protocol_version = 'HTTP/1.0'
+
+def exit_code(status):
+    return os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+
+class Worker:
+    """One forked serving process: serves the shared socket until stopped or recycled"""
+    
+    def __init__(self, application, listener, max_requests):
+        self.application = application
+        self.listener = listener
+        self.max_requests = max_requests
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self.server = None
+    
+    def __call__(self, environ, start_response):
+        with self._lock:
+            self.requests += 1
+            recycle = self.max_requests and self.requests >= self.max_requests
+        if recycle:
+            self.stop()
+        return self.application(environ, start_response)
+    
+    def stop(self, *_):
+        """Stop accepting; serve_forever returns once the current poll ends (never blocks the caller)"""
+        if self.server is not None and not self._stopping.is_set():
+            self._stopping.set()
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+    
+    def run(self):
+        host, port = self.listener.getsockname()[:2]
+        self.server = make_server(host, port, self, threaded=True, request_handler=RequestHandler,
+                                  fd=self.listener.fileno())
+        # In-flight requests are finished (joined in server_close) before the worker exits
+        self.server.daemon_threads = False
+        self.server.block_on_close = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        self.server.serve_forever()
+        self.server.server_close()
+
+class Arbiter:
+    """Parent process: forks the workers, replaces any that exit and stops them on shutdown"""
+    
+    def __init__(self, listener, workers, max_requests, max_requests_jitter, graceful_timeout):
+        self.listener = listener
+        self.workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self._children = {}  # pid -> (slot, started_at)
+        self._stopping = False
+        self._recycle = False
+    
+    def spawn(self, slot):
+        max_requests = self.max_requests
+        if max_requests and self.max_requests_jitter:
+            max_requests += random.randint(0, self.max_requests_jitter)
+        pid = os.fork()
+        if pid:
+            self._children[pid] = (slot, time.time())
+            return
+        
+        # Child: the parent's handlers must not run here while the worker is starting
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        code = 0
+        try:
+            import app as jobshield_app
+            # Slot 0 runs the online learner, so feedback is learned from exactly once
+            jobshield_app.after_fork(owns_online_learner=slot == 0)
+            Worker(jobshield_app.app, self.listener, max_requests).run()
+            jobshield_app.before_worker_exit()
+        except Exception as e:
+            print(f"Worker error: {e}")
+            code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+    
+    def run(self):
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_recycle)
+        
+        while not self._stopping:
+            self._reap()
+            if self._recycle:
+                self._recycle = False
+                self._signal_all(signal.SIGTERM)
+            used = {slot for slot, _ in self._children.values()}
+            for slot in range(self.workers):
+                if slot not in used and not self._stopping:
+                    self.spawn(slot)
+            time.sleep(0.5)
+        
+        self._signal_all(signal.SIGTERM)
+        deadline = time.time() + self.graceful_timeout
+        while self._children and time.time() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        self._signal_all(signal.SIGKILL)
+        while self._children:
+            self._reap(block=True)
+    
+    def _reap(self, block=False):
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, 0 if block else os.WNOHANG)
+            except ChildProcessError:
+                self._children.clear()
+                return
+            if pid == 0:
+                return
+            slot, started_at = self._children.pop(pid, (None, None))
+            if slot is None:
+                continue
+            if not self._stopping and exit_code(status) != 0:
+                print(f"Worker {pid} (slot {slot}) exited with status {exit_code(status)}")
+                # A worker that dies right after starting would otherwise be respawned in a tight loop
+                if time.time() - started_at < 1:
+                    time.sleep(1)
+            if block:
+                return
+    
+    def _signal_all(self, signum):
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+    
+    def _handle_stop(self, *_):
+        self._stopping = True
+    
+    def _handle_recycle(self, *_):
+        self._recycle = True
+
+def main():
+    args = parse_args()
+    
+    print("=" * 50)
+    print("JobShield AI - Recruitment Scam Detection System")
+    print("=" * 50)
+    
+    os.makedirs('reports', exist_ok=True)
+    os.makedirs('models/saved', exist_ok=True)
+    
+    # Bind before loading the app, so a port conflict fails fast
+    listener = socket.socket(socket.AF_INET6 if ':' in args.host else socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((args.host, args.port))
+    listener.listen(1024)
+    listener.set_inheritable(True)
+    
+    print("\nLoading models...")
+    start = time.time()
+    import app as jobshield_app
+    jobshield_app.warm_up()
+    # Objects loaded so far are never collected; keeping the collector off them avoids
+    # writing to their pages, which would unshare them from the workers
+    gc.collect()
+    gc.freeze()
+    print(f"Loaded in {time.time() - start:.1f}s (model {jobshield_app.model_registry.version()})")
+    
+    print(f"Serving on http://{args.host}:{args.port} with {args.workers} workers (parent pid {os.getpid()})")
+    print("=" * 50)
+    Arbiter(
+        listener,
+        workers=args.workers,
+        max_requests=args.max_requests,
+        max_requests_jitter=args.max_requests_jitter,
+        graceful_timeout=args.graceful_timeout
+    ).run()
+    print("Server stopped")
+
+if __name__ == '__main__':
+    main()
@@ -568,12 +568,12 @@ function displayResults(data) {
             </h5>
             <div class="alert alert-danger">
                 <i class="fas fa-info-circle me-2"></i>
-                <strong>These lines contain multiple scam indicators and should be treated with extreme caution.</strong>
+                <strong>These lines contain multiple scam indicators or read as scam text to the ML model, and should be treated with extreme caution.</strong>
             </div>
         `;
         
         data.spam_lines.slice(0, 10).forEach((spam, index) => {
-            const patterns = spam.patterns.slice(0, 5).join(', ');
+            const patterns = spam.patterns.length ? spam.patterns.slice(0, 5).join(', ') : 'none';
             html += `
                 <div class="card border-danger mb-3">
                     <div class="card-body">
@@ -590,6 +590,7 @@ function displayResults(data) {
                         <small class="text-muted">
                             <i class="fas fa-search me-1"></i>
                             Matched patterns: <strong>${patterns}</strong>
+                            ${spam.ml_probability !== undefined ? `&middot; ML scam probability: <strong>${spam.ml_probability}%</strong>` : ''}
                         </small>
                     </div>
                 </div>
@@ -656,10 +657,18 @@ async function trainModels(event) {
     
     try {
         const response = await fetch('/train', { method: 'POST' });
-        const result = await response.json();
+        const started = await response.json();
         
-        if (response.ok) {
-            showToast('success', `Models trained successfully! Best Model: ${result.best_model} | Samples: 120`);
+        if (!response.ok) {
+            throw new Error(started.error || 'Training failed');
+        }
+        
+        // Training runs as a background job; poll until it finishes
+        const job = await pollTrainingJob(started.status_url, btn);
+        const result = job.result || {};
+        
+        if (job.status === 'succeeded') {
+            showToast('success', `Models trained successfully! Best Model: ${result.best_model} | Samples: ${result.samples}`);
             document.getElementById('navStatusText').textContent = 'Ready ✓';
             document.getElementById('navStatusSpinner').style.display = 'none';
             
@@ -672,7 +681,7 @@ async function trainModels(event) {
                 }
             }, 2000);
         } else {
-            throw new Error(result.error || 'Training failed');
+            throw new Error(job.error || `Training ${job.status}`);
         }
     } catch (error) {
         showToast('error', 'Error training models: ' + error.message);
@@ -684,6 +693,25 @@ async function trainModels(event) {
     }
 }
 
+// Poll a training job until it succeeds, fails or is cancelled
+async function pollTrainingJob(statusUrl, btn) {
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, 2000));
+        const response = await fetch(statusUrl);
+        const job = await response.json();
+        
+        if (!response.ok) {
+            throw new Error(job.error || 'Lost track of training job');
+        }
+        if (!['queued', 'running'].includes(job.status)) {
+            return job;
+        }
+        
+        btn.innerHTML = `<i class="fas fa-spinner fa-spin me-1"></i> Training... ${job.progress}%`;
+        document.getElementById('navStatusText').textContent = `Training (${job.stage})...`;
+    }
+}
+
 // Check model status on page load
 window.addEventListener('DOMContentLoaded', async () => {
     try {
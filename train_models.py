@@ -1,35 +1,70 @@
 """
 Standalone script to train ML models
 Run this before starting the Flask app
+
+Usage: python train_models.py
+       python train_models.py --stream <shard or directory> [...] [--chunk-size N] [--epochs N]
 """
 
+import argparse
+import os
+
 from models.ml_classifier import MLScamClassifier
 from data.sample_dataset import get_training_data
 
+def parse_args():
+    parser = argparse.ArgumentParser(description='Train the JobShield AI scam classifier')
+    parser.add_argument('--stream', nargs='+', metavar='PATH',
+                        help='Train out-of-core on labelled JSONL/CSV/Parquet shards (files, directories or globs)')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='Rows per streaming chunk')
+    parser.add_argument('--epochs', type=int, default=1, help='Passes over the streamed shards')
+    return parser.parse_args()
+
+def train_streaming(classifier, args):
+    """Hashing vectorizer + incremental SGD over the shards; memory stays flat"""
+    from models.streaming_trainer import StreamingTrainer
+    
+    print(f"\nStreaming training data from {', '.join(args.stream)}...")
+    print("-" * 60)
+    trainer = StreamingTrainer(classifier=classifier, chunk_size=args.chunk_size, epochs=args.epochs)
+    bundle = trainer.train(args.stream)
+    metadata = trainer.metadata
+    validation = metadata['progressive_validation']
+    print(f"Trained on {metadata['n_samples']} samples ({metadata['n_positive']} scam)")
+    print(f"Progressive validation: accuracy {validation['accuracy']:.4f}, "
+          f"F1 {validation['f1']:.4f}, log loss {validation['log_loss']:.4f}")
+    classifier.use_bundle(bundle)
+
 def main():
+    args = parse_args()
+    
     print("=" * 60)
     print("JobShield AI - Model Training")
     print("=" * 60)
     
     # Initialize classifier
-    classifier = MLScamClassifier()
+    classifier = MLScamClassifier(preprocessor_mode=os.getenv('PREPROCESSOR_MODE', 'auto'))
     
-    # Load training data
-    print("\nLoading training data...")
-    texts, labels = get_training_data()
-    print(f"Loaded {len(texts)} samples")
-    print(f"Scam samples: {sum(labels)}")
-    print(f"Legitimate samples: {len(labels) - sum(labels)}")
-    
-    # Train models
-    print("\nTraining multiple classifiers...")
-    print("-" * 60)
-    results = classifier.train_models(texts, labels)
+    if args.stream:
+        train_streaming(classifier, args)
+    else:
+        # Load training data
+        print("\nLoading training data...")
+        texts, labels = get_training_data()
+        print(f"Loaded {len(texts)} samples")
+        print(f"Scam samples: {sum(labels)}")
+        print(f"Legitimate samples: {len(labels) - sum(labels)}")
+        
+        # Train models
+        print("\nTraining multiple classifiers...")
+        print("-" * 60)
+        results = classifier.train_models(texts, labels)
     
     print("\n" + "=" * 60)
     print("Training Complete!")
     print(f"Best Model: {classifier.best_model_name}")
     print("=" * 60)
+    print("The bundle is staged: the app smoke-tests it and makes it current at start-up or through its model watcher")
     
     # Test predictions
     print("\nTesting predictions on sample texts...")
@@ -0,0 +1,245 @@
+# Posting fields that must be strings when given (anything else would fail deep in the pipeline)
+POSTING_TEXT_FIELDS = ('input_type', 'job_text', 'whatsapp_text', 'whatsapp_number', 'company_name',
+                       'recruiter_email', 'contact_method', 'linkedin_url')
+
+
+class BatchAnalyzer:
+    """Run many job postings through the detection pipeline as one batch"""
+    
+    def __init__(self, preprocessor, ml_classifier, rule_engine, salary_analyzer,
+                 recruiter_scorer, risk_fusion, company_verifier=None, mca_verifier=None,
+                 stage_executor=None, deadline_seconds=8.0, max_batch_size=500):
+        self.preprocessor = preprocessor
+        self.ml_classifier = ml_classifier
+        self.rule_engine = rule_engine
+        self.salary_analyzer = salary_analyzer
+        self.recruiter_scorer = recruiter_scorer
+        self.risk_fusion = risk_fusion
+        self.company_verifier = company_verifier
+        self.mca_verifier = mca_verifier
+        self.stage_executor = stage_executor
+        self.deadline_seconds = deadline_seconds
+        self.max_batch_size = max_batch_size
+    
+    def analyze_batch(self, postings, verify_companies=True):
+        """
+        Analyze a list of postings and return one result per posting, in order.
+        Each posting is a dict with the same fields accepted by /analyze.
+        Invalid postings get an {'error': ...} entry instead of failing the batch.
+        """
+        if len(postings) > self.max_batch_size:
+            raise ValueError(f'Batch too large: {len(postings)} postings (max {self.max_batch_size})')
+        
+        results = [None] * len(postings)
+        jobs = []
+        
+        # Validate input and resolve job text
+        for i, posting in enumerate(postings):
+            job_text, error = self._get_job_text(posting)
+            if error:
+                results[i] = {'id': posting.get('id') if isinstance(posting, dict) else None, 'error': error}
+            else:
+                jobs.append((i, posting, job_text))
+        
+        if not jobs:
+            return results
+        
+        texts = [job_text for _, _, job_text in jobs]
+        
+        # Start registry lookups (once per distinct company) so they overlap with the ML stage
+        names = set()
+        if verify_companies:
+            names = {posting.get('company_name', '') for _, posting, _ in jobs} - {''}
+        stages = None
+        if self.stage_executor is not None and self.company_verifier is not None and names:
+            stages = self.stage_executor.start(self.deadline_seconds)
+            for name in names:
+                stages.submit(
+                    name,
+                    {'found': False, 'confidence': 0, 'message': 'Verification timed out'},
+                    self.company_verifier.verify_company, name, timeout=stages.remaining()
+                )
+        
+        # 1. Preprocess text
+        preprocessed_texts = []
+        for text in texts:
+            try:
+                preprocessed_texts.append(self.preprocessor.preprocess(text))
+            except Exception as e:
+                print(f"Preprocessing error: {e}")
+                preprocessed_texts.append(text.lower())
+        
+        # 2. ML Classification (single vectorized call for the whole batch)
+        try:
+            ml_results = self.ml_classifier.predict_batch(preprocessed_texts, source_texts=texts)
+        except Exception as e:
+            print(f"ML classification error: {e}")
+            ml_results = [{
+                'is_scam': False,
+                'probability': 50.0,
+                'confidence': 'low',
+                'model': 'default',
+                'spam_lines': []
+            } for _ in texts]
+        
+        # 4. Company verification, once per distinct company name
+        company_results = {}
+        for name in names:
+            registry_result = stages.result(name) if stages is not None else None
+            company_results[name] = self._verify_company(name, registry_result)
+        
+        analyses = []
+        for (i, posting, job_text), ml_result in zip(jobs, ml_results):
+            company_name = posting.get('company_name', '')
+            recruiter_email = posting.get('recruiter_email', '')
+            
+            # 3. Rule-based detection
+            try:
+                match_index = self.rule_engine.lexicon.match(job_text)
+                rule_result = self.rule_engine.check_rules(job_text, match_index)
+                evidence = self.rule_engine.get_evidence(job_text, rule_result['triggered_rules'], match_index)
+            except Exception as e:
+                print(f"Rule engine error: {e}")
+                rule_result = {'triggered_rules': [], 'rule_score': 0, 'high_confidence_scam': False}
+                evidence = []
+            
+            company_result = {'found': False, 'confidence': 50}
+            mca_result = {'found': False, 'confidence': 0}
+            if company_name in company_results:
+                company_result, mca_result = company_results[company_name]
+                company_result = dict(company_result)
+                if recruiter_email and self.company_verifier is not None:
+                    try:
+                        company_result['email_match'] = self.company_verifier.verify_email_domain(
+                            recruiter_email, company_name)
+                    except Exception as e:
+                        print(f"Company verification error: {e}")
+            
+            # 5. Salary analysis
+            try:
+                salary_result = self.salary_analyzer.analyze_salary(job_text, posting.get('offered_salary'))
+            except Exception as e:
+                print(f"Salary analysis error: {e}")
+                salary_result = {'anomaly_detected': False, 'anomaly_score': 0, 'message': 'Analysis unavailable'}
+            
+            # 6. Recruiter scoring
+            try:
+                recruiter_result = self.recruiter_scorer.score_recruiter(
+                    email=recruiter_email,
+                    contact_method=posting.get('contact_method', ''),
+                    linkedin_url=posting.get('linkedin_url', '')
+                )
+            except Exception as e:
+                print(f"Recruiter scoring error: {e}")
+                recruiter_result = {'trust_score': 50, 'trust_level': 'MODERATE_TRUST', 'factors': []}
+            
+            analyses.append({
+                'index': i,
+                'posting': posting,
+                'ml_result': ml_result,
+                'rule_result': rule_result,
+                'evidence': evidence,
+                'company_result': company_result,
+                'mca_result': mca_result,
+                'salary_result': salary_result,
+                'recruiter_result': recruiter_result
+            })
+        
+        # 7. Risk fusion (vectorized over the batch)
+        risk_signals = [{
+            'ml_probability': a['ml_result']['probability'],
+            'rule_score': a['rule_result']['rule_score'],
+            'company_confidence': a['company_result'].get('confidence', 50),
+            'salary_anomaly_score': a['salary_result'].get('anomaly_score', 0),
+            'recruiter_trust_score': a['recruiter_result']['trust_score']
+        } for a in analyses]
+        
+        try:
+            risk_results = self.risk_fusion.calculate_risk_scores(risk_signals)
+        except Exception as e:
+            print(f"Risk fusion error: {e}")
+            risk_results = [{
+                'risk_score': 50.0,
+                'risk_tier': 'MODERATE_RISK',
+                'recommendation': 'Unable to complete full analysis',
+                'component_scores': {}
+            } for _ in analyses]
+        
+        for a, signals, risk_result in zip(analyses, risk_signals, risk_results):
+            posting = a['posting']
+            try:
+                explanations = self.risk_fusion.get_explanation(signals, risk_result)
+            except Exception as e:
+                print(f"Risk fusion error: {e}")
+                explanations = []
+            
+            results[a['index']] = {
+                'id': posting.get('id'),
+                'input_type': posting.get('input_type', 'text'),
+                'risk_score': risk_result['risk_score'],
+                'risk_tier': risk_result['risk_tier'],
+                'recommendation': risk_result['recommendation'],
+                'component_scores': risk_result['component_scores'],
+                'ml_result': a['ml_result'],
+                'rule_result': a['rule_result'],
+                'triggered_rules': a['rule_result']['triggered_rules'],
+                'company_verification': a['company_result'],
+                'mca_verification': a['mca_result'] if posting.get('company_name') else None,
+                'salary_analysis': a['salary_result'],
+                'recruiter_score': a['recruiter_result'],
+                'explanations': explanations,
+                'evidence': a['evidence'],
+                'spam_lines': a['ml_result'].get('spam_lines', [])
+            }
+        
+        return results
+    
+    def _get_job_text(self, posting):
+        """Resolve the posting text the same way /analyze does (and reject malformed postings)"""
+        if not isinstance(posting, dict):
+            return None, 'Posting must be an object'
+        for field in POSTING_TEXT_FIELDS:
+            if posting.get(field) is not None and not isinstance(posting[field], str):
+                return None, f'{field} must be a string'
+        
+        input_type = posting.get('input_type', 'text')
+        if input_type == 'link':
+            return None, 'Link inputs are not supported in batch mode'
+        elif input_type == 'whatsapp':
+            job_text = posting.get('whatsapp_text', '')
+            whatsapp_number = posting.get('whatsapp_number', '')
+            if whatsapp_number:
+                job_text = f"WhatsApp Number: {whatsapp_number}\n\n{job_text}"
+        else:
+            job_text = posting.get('job_text', '')
+        
+        if not job_text:
+            return None, 'Job text is required'
+        if len(job_text) < 20:
+            return None, 'Job text is too short. Please provide more details.'
+        return job_text, None
+    
+    def _verify_company(self, company_name, registry_result=None):
+        """Verify a company against OpenCorporates (unless already looked up) and MCA"""
+        company_result = {'found': False, 'confidence': 50}
+        mca_result = {'found': False, 'confidence': 0}
+        if self.company_verifier is None or self.mca_verifier is None:
+            return company_result, mca_result
+        
+        try:
+            if registry_result is None:
+                registry_result = self.company_verifier.verify_company(company_name)
+            company_result = dict(registry_result)
+            mca_result = self.mca_verifier.verify_indian_company(company_name)
+            
+            # Combine results - use higher confidence
+            if mca_result['confidence'] > company_result.get('confidence', 0):
+                company_result = dict(mca_result)
+                company_result['verification_source'] = 'MCA (India)'
+            else:
+                company_result['verification_source'] = 'OpenCorporates'
+        except Exception as e:
+            print(f"Company verification error: {e}")
+            company_result = {'found': False, 'confidence': 50, 'message': 'Verification unavailable'}
+        
+        return company_result, mca_result
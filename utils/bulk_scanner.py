@@ -0,0 +1,377 @@
+import csv
+import json
+import multiprocessing
+import os
+import re
+import time
+from collections import deque
+
+from models.streaming_trainer import SHARD_FORMATS, TEXT_COLUMN_ALIASES, expand_shards
+from utils.batch_analyzer import POSTING_TEXT_FIELDS
+
+SCAN_OUTPUT_FORMATS = ('jsonl', 'csv')
+FLAGGED_TIERS = ('CRITICAL_FRAUD', 'HIGH_SCAM_LIKELIHOOD')
+
+# Posting fields understood by the pipeline, with the column names they are read from
+POSTING_COLUMN_ALIASES = {
+    'id': ['id', 'job_id', 'posting_id'],
+    'company_name': ['company_name', 'company'],
+    'recruiter_email': ['recruiter_email', 'email'],
+    'contact_method': ['contact_method'],
+    'linkedin_url': ['linkedin_url', 'linkedin'],
+    'offered_salary': ['offered_salary', 'salary'],
+    'input_type': ['input_type'],
+    'whatsapp_text': ['whatsapp_text'],
+    'whatsapp_number': ['whatsapp_number']
+}
+
+CSV_COLUMNS = ['row', 'id', 'risk_score', 'risk_tier', 'recommendation', 'ml_is_scam', 'ml_probability',
+               'ml_model', 'rule_score', 'triggered_rules', 'salary_anomaly_score', 'recruiter_trust_score',
+               'company_confidence', 'error']
+
+
+def _normalize(name):
+    return re.sub(r'[^a-z0-9]+', '_', str(name).strip().lower()).strip('_')
+
+
+def _column_map(names):
+    """Posting field -> source column for the columns present in a shard"""
+    normalized = {_normalize(n): n for n in names}
+    mapping = {}
+    for alias in TEXT_COLUMN_ALIASES:
+        if alias in normalized:
+            mapping['job_text'] = normalized[alias]
+            break
+    for field, aliases in POSTING_COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in normalized:
+                mapping[field] = normalized[alias]
+                break
+    if 'job_text' not in mapping and 'whatsapp_text' not in mapping:
+        raise ValueError(f'No text column found in {list(names)}')
+    return mapping
+
+
+def _read_jsonl_rows(path):
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def _read_csv_rows(path):
+    # Job descriptions can be longer than the csv module's default field limit
+    csv.field_size_limit(16 * 1024 * 1024)
+    with open(path, newline='', encoding='utf-8', errors='replace') as f:
+        yield from csv.DictReader(f)
+
+
+def _read_parquet_rows(path, batch_size=10000):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError(f'Reading {path} needs pyarrow (pip install pyarrow)')
+    parquet_file = pq.ParquetFile(path)
+    # Only the columns the pipeline uses are decoded, one batch at a time
+    columns = list(_column_map(parquet_file.schema_arrow.names).values())
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        yield from batch.to_pylist()
+
+
+def iter_postings(paths, skip=0):
+    """
+    Stream postings (dicts of /analyze fields plus 'row', their position in the corpus)
+    from JSONL/CSV/Parquet shards. The first skip rows are passed over without being parsed
+    into postings, which is how a resumed scan picks up where it stopped.
+    """
+    readers = {'jsonl': _read_jsonl_rows, 'csv': _read_csv_rows, 'parquet': _read_parquet_rows}
+    row = 0
+    for path in expand_shards(paths):
+        mapping = None
+        name = os.path.basename(path)
+        for line_number, record in enumerate(readers[SHARD_FORMATS[os.path.splitext(path)[1].lower()]](path)):
+            row += 1
+            if row <= skip:
+                continue
+            if mapping is None:
+                mapping = _column_map(list(record))
+            posting = {field: record.get(column) for field, column in mapping.items()}
+            posting = {field: value for field, value in posting.items() if value not in (None, '')}
+            # Parquet and JSONL cells keep their types; the pipeline expects text
+            for field in POSTING_TEXT_FIELDS + ('id',):
+                if field in posting:
+                    posting[field] = str(posting[field])
+            if 'offered_salary' in posting:
+                # CSV cells are strings; an unreadable salary falls back to extraction from the text
+                try:
+                    posting['offered_salary'] = float(str(posting['offered_salary']).replace(',', ''))
+                except ValueError:
+                    del posting['offered_salary']
+            posting.setdefault('id', f'{name}:{line_number + 1}')
+            posting['row'] = row
+            yield posting
+
+
+def iter_chunks(postings, chunk_size):
+    chunk = []
+    for posting in postings:
+        chunk.append(posting)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def build_batch_analyzer(model_version=None, bundles_dir=None, verify_companies=False, max_batch_size=500):
+    """The /analyze pipeline, wired for offline use (no request deadline, local caches only)"""
+    from models.ml_classifier import MLScamClassifier
+    from models.model_bundle import ModelBundle
+    from utils.batch_analyzer import BatchAnalyzer
+    from utils.company_registry import CompanyRegistry
+    from utils.company_verifier import CompanyVerifier
+    from utils.fraud_rules import FraudRuleEngine
+    from utils.mca_verifier import MCAVerifier
+    from utils.recruiter_scorer import RecruiterScorer
+    from utils.risk_fusion import RiskFusionEngine
+    from utils.salary_analyzer import SalaryAnalyzer
+    from utils.scam_lexicon import get_default_lexicon
+    from utils.text_preprocessor import TextPreprocessor
+    from utils.ttl_cache import SQLiteCacheBackend, TTLCache
+    
+    lexicon = get_default_lexicon()
+    classifier = MLScamClassifier(lexicon=lexicon, tiered=os.getenv('TIERED_INFERENCE', '0') == '1')
+    if bundles_dir:
+        classifier.bundles_dir = bundles_dir
+    if model_version is not None:
+        # Every worker scores with the same bundle, even if CURRENT moves during the scan
+        classifier.use_bundle(ModelBundle.load(os.path.join(classifier.bundles_dir, model_version)))
+    else:
+        classifier.load_models()
+    
+    company_verifier = mca_verifier = None
+    if verify_companies:
+        cache_path = os.getenv('COMPANY_CACHE_PATH')
+        company_verifier = CompanyVerifier(
+            api_key=os.getenv('OPENCORPORATES_API_KEY'),
+            cache=TTLCache(maxsize=100000, backend=SQLiteCacheBackend(cache_path) if cache_path else None)
+        )
+        registry_path = os.getenv('MCA_REGISTRY_PATH', 'data/company_registry.db')
+        mca_verifier = MCAVerifier(registry=CompanyRegistry(registry_path) if os.path.exists(registry_path) else None)
+    
+    return BatchAnalyzer(
+        preprocessor=TextPreprocessor(
+            lexicon=lexicon,
+            mode=os.getenv('PREPROCESSOR_MODE', 'auto'),
+            lemma_table_path=classifier.lemma_table_path
+        ),
+        ml_classifier=classifier,
+        rule_engine=FraudRuleEngine(),
+        salary_analyzer=SalaryAnalyzer(),
+        recruiter_scorer=RecruiterScorer(),
+        risk_fusion=RiskFusionEngine(),
+        company_verifier=company_verifier,
+        mca_verifier=mca_verifier,
+        max_batch_size=max_batch_size
+    )
+
+
+def summarize_result(row, result):
+    """Flat record of a scan result for CSV/compact JSONL output"""
+    if 'error' in result:
+        return {'row': row, 'id': result.get('id'), 'error': result['error']}
+    ml_result = result['ml_result']
+    return {
+        'row': row,
+        'id': result.get('id'),
+        'risk_score': result['risk_score'],
+        'risk_tier': result['risk_tier'],
+        'recommendation': result['recommendation'],
+        'ml_is_scam': bool(ml_result['is_scam']),
+        'ml_probability': ml_result['probability'],
+        'ml_model': ml_result.get('model'),
+        'rule_score': result['rule_result']['rule_score'],
+        'triggered_rules': [rule['category'] for rule in result['triggered_rules']],
+        'salary_anomaly_score': result['salary_analysis'].get('anomaly_score', 0),
+        'recruiter_trust_score': result['recruiter_score']['trust_score'],
+        'company_confidence': result['company_verification'].get('confidence')
+    }
+
+
+# Per-process state of scan workers
+_worker_analyzer = None
+_worker_options = {}
+
+
+def _init_scan_worker(model_version, bundles_dir, verify_companies, chunk_size, full):
+    """Scan worker setup: the pipeline and models are loaded once per process"""
+    global _worker_analyzer, _worker_options
+    _worker_analyzer = build_batch_analyzer(model_version, bundles_dir, verify_companies, max_batch_size=chunk_size)
+    _worker_options = {'verify_companies': verify_companies, 'full': full}
+
+
+def _scan_chunk(postings):
+    """Analyze one chunk; returns the output records for its postings, in order"""
+    rows = [posting.pop('row') for posting in postings]
+    try:
+        results = _worker_analyzer.analyze_batch(postings, verify_companies=_worker_options['verify_companies'])
+    except Exception as e:
+        print(f"Scan error: {e}")
+        results = [{'id': posting.get('id'), 'error': f'Analysis failed: {e}'} for posting in postings]
+    
+    if _worker_options['full']:
+        return [dict(result, row=row) for row, result in zip(rows, results)]
+    return [summarize_result(row, result) for row, result in zip(rows, results)]
+
+
+class BulkScanner:
+    """
+    Rescore an offline corpus of postings with the full detection pipeline.
+    Shards are streamed in chunks to a process pool (each worker loads the pipeline once) with
+    a bounded number of chunks in flight, so memory does not grow with the corpus. Results are
+    appended to the output in corpus order and a checkpoint beside it records how many rows are
+    safely written; an interrupted scan resumes from there with the same model version.
+    """
+    
+    def __init__(self, inputs, output, processes=None, chunk_size=500, max_in_flight=None,
+                 verify_companies=False, full=False, bundles_dir=None, progress_interval=10.0):
+        output_format = os.path.splitext(output)[1].lower().lstrip('.')
+        if output_format not in SCAN_OUTPUT_FORMATS:
+            raise ValueError(f'Output must be a .jsonl or .csv file: {output}')
+        if full and output_format != 'jsonl':
+            raise ValueError('Full results can only be written as JSONL')
+        self.inputs = expand_shards(inputs)
+        self.output = output
+        self.output_format = output_format
+        self.checkpoint_path = output + '.checkpoint'
+        self.processes = processes or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.max_in_flight = max_in_flight or 2 * self.processes
+        self.verify_companies = verify_companies
+        self.full = full
+        self.bundles_dir = bundles_dir
+        self.progress_interval = progress_interval
+        self.checkpoint = None
+    
+    def _current_model_version(self):
+        from models.ml_classifier import MLScamClassifier
+        from models.model_bundle import ModelBundle
+        
+        bundles_dir = self.bundles_dir or MLScamClassifier().bundles_dir
+        return ModelBundle.current_version(bundles_dir)
+    
+    def _load_checkpoint(self, restart):
+        if restart or not os.path.exists(self.checkpoint_path):
+            if not restart and os.path.exists(self.output):
+                raise ValueError(f'{self.output} exists without a checkpoint; pass --restart to overwrite it')
+            return None
+        with open(self.checkpoint_path, encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        if checkpoint['inputs'] != self.inputs:
+            raise ValueError(f'{self.checkpoint_path} belongs to a scan of other inputs; pass --restart to start over')
+        if checkpoint['full'] != self.full:
+            raise ValueError(f'{self.checkpoint_path} belongs to a scan with a different output mode')
+        return checkpoint
+    
+    def _save_checkpoint(self):
+        self.checkpoint['updated_at'] = time.time()
+        with open(self.checkpoint_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.checkpoint, f, indent=2)
+        os.replace(self.checkpoint_path + '.tmp', self.checkpoint_path)
+    
+    def _open_output(self):
+        """Output file positioned after the last checkpointed row (anything later is discarded)"""
+        if self.checkpoint['output_bytes'] == 0:
+            f = open(self.output, 'w', newline='', encoding='utf-8')
+            if self.output_format == 'csv':
+                csv.writer(f).writerow(CSV_COLUMNS)
+            return f
+        f = open(self.output, 'r+', newline='', encoding='utf-8')
+        f.truncate(self.checkpoint['output_bytes'])
+        f.seek(self.checkpoint['output_bytes'])
+        return f
+    
+    def _write(self, f, records):
+        if self.output_format == 'csv':
+            writer = csv.writer(f)
+            for record in records:
+                if isinstance(record.get('triggered_rules'), list):
+                    record['triggered_rules'] = ';'.join(record['triggered_rules'])
+                writer.writerow([record.get(column, '') for column in CSV_COLUMNS])
+        else:
+            for record in records:
+                f.write(json.dumps(record, default=str) + '\n')
+        
+        self.checkpoint['rows_done'] = records[-1]['row'] if records else self.checkpoint['rows_done']
+        self.checkpoint['scanned'] += len(records)
+        self.checkpoint['errors'] += sum(1 for record in records if record.get('error'))
+        self.checkpoint['flagged'] += sum(1 for record in records if record.get('risk_tier') in FLAGGED_TIERS)
+        # The checkpoint only ever points at rows that are on disk
+        f.flush()
+        os.fsync(f.fileno())
+        self.checkpoint['output_bytes'] = f.tell()
+        self._save_checkpoint()
+    
+    def run(self, restart=False):
+        """Scan (or resume scanning) the inputs; returns the checkpoint summary"""
+        model_version = self._current_model_version()
+        self.checkpoint = self._load_checkpoint(restart)
+        if self.checkpoint is not None:
+            if self.checkpoint.get('complete'):
+                print(f"Scan already complete: {self.checkpoint['scanned']} postings in {self.output}")
+                return self.checkpoint
+            if self.checkpoint['model_version'] != model_version:
+                raise ValueError(
+                    f"Scan was started with model {self.checkpoint['model_version']} but the current model is "
+                    f"{model_version}; pass --restart to rescore from the beginning"
+                )
+            print(f"Resuming after row {self.checkpoint['rows_done']} ({self.checkpoint['scanned']} postings scanned)")
+        else:
+            self.checkpoint = {
+                'inputs': self.inputs,
+                'model_version': model_version,
+                'full': self.full,
+                'rows_done': 0,
+                'output_bytes': 0,
+                'scanned': 0,
+                'flagged': 0,
+                'errors': 0,
+                'complete': False,
+                'started_at': time.time()
+            }
+        
+        ctx = multiprocessing.get_context('spawn')
+        start = last_report = time.time()
+        scanned_before = self.checkpoint['scanned']
+        with self._open_output() as f, ctx.Pool(
+            self.processes,
+            initializer=_init_scan_worker,
+            initargs=(model_version, self.bundles_dir, self.verify_companies, self.chunk_size, self.full)
+        ) as pool:
+            if self.checkpoint['output_bytes'] == 0:
+                f.flush()
+                self.checkpoint['output_bytes'] = f.tell()
+                self._save_checkpoint()
+            # Chunks are written in submission order; at most max_in_flight are queued or running
+            pending = deque()
+            for chunk in iter_chunks(iter_postings(self.inputs, skip=self.checkpoint['rows_done']), self.chunk_size):
+                pending.append(pool.apply_async(_scan_chunk, (chunk,)))
+                while len(pending) >= self.max_in_flight:
+                    self._write(f, pending.popleft().get())
+                    if time.time() - last_report >= self.progress_interval:
+                        last_report = time.time()
+                        self._report_progress(scanned_before, start)
+            while pending:
+                self._write(f, pending.popleft().get())
+        
+        self.checkpoint['complete'] = True
+        self.checkpoint['elapsed_seconds'] = time.time() - start
+        self._save_checkpoint()
+        return self.checkpoint
+    
+    def _report_progress(self, scanned_before, start):
+        scanned = self.checkpoint['scanned'] - scanned_before
+        rate = scanned / max(time.time() - start, 1e-9)
+        print(f"Scanned {self.checkpoint['scanned']} postings ({rate:.0f}/s), "
+              f"{self.checkpoint['flagged']} flagged, {self.checkpoint['errors']} errors")
@@ -0,0 +1,231 @@
+import csv
+import os
+import re
+import sqlite3
+from collections import Counter
+from threading import Lock
+
+# Header aliases seen in MCA company master dumps (matched case-insensitively, ignoring punctuation)
+CSV_COLUMN_ALIASES = {
+    'cin': ['cin', 'corporate_identification_number', 'corporateidentificationnumber'],
+    'name': ['company_name', 'companyname', 'name'],
+    'status': ['company_status', 'companystatus', 'status'],
+    'incorporation_date': ['date_of_registration', 'date_of_incorporation', 'companyregistrationdate_date',
+                           'registration_date', 'incorporation_date']
+}
+
+# Legal-form words dropped from normalized names so "Infosys Ltd" and "INFOSYS LIMITED" match
+LEGAL_SUFFIXES = {
+    'PRIVATE', 'PVT', 'LIMITED', 'LTD', 'LLP', 'OPC', 'INC', 'INCORPORATED',
+    'CORP', 'CORPORATION', 'CO', 'COMPANY', 'PLC', 'THE'
+}
+
+ACTIVE_STATUSES = {'ACTIVE', 'ACTV'}
+
+
+def normalize_company_name(name):
+    """Uppercase, strip punctuation and legal-form words"""
+    words = re.sub(r'[^A-Z0-9]+', ' ', (name or '').upper()).split()
+    core = [w for w in words if w not in LEGAL_SUFFIXES]
+    return ' '.join(core or words)
+
+
+def name_trigrams(norm_name):
+    """Distinct character trigrams of a normalized name, padded at word boundaries"""
+    padded = f' {norm_name} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CompanyRegistry:
+    """Read-only local company master index (SQLite) with CIN, exact-name and fuzzy lookups"""
+    
+    # Only the rarest trigrams of a query are used to gather candidates
+    QUERY_TRIGRAMS = 12
+    
+    def __init__(self, path):
+        self.path = path
+        self._lock = Lock()
+        # Opening is O(1): the index is queried in place, pages come through the OS cache via mmap
+        self._conn = self._connect()
+    
+    def _connect(self):
+        conn = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA mmap_size=1073741824')
+        conn.execute('PRAGMA query_only=1')
+        return conn
+    
+    def reopen(self):
+        """Reconnect after a fork (the database is read-only, so only the handle changes)"""
+        self._lock = Lock()
+        self._inherited_conn = self._conn
+        self._conn = self._connect()
+    
+    @classmethod
+    def build_from_csv(cls, csv_path, db_path, batch_size=50000):
+        """
+        Build a registry from a company master CSV (CIN, name, status, incorporation date).
+        Writes to a temporary file and renames it into place, so readers never see a partial index.
+        Returns the number of companies indexed.
+        """
+        tmp_path = db_path + '.tmp'
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        
+        conn = sqlite3.connect(tmp_path)
+        conn.execute('PRAGMA journal_mode=OFF')
+        conn.execute('PRAGMA synchronous=OFF')
+        conn.execute(
+            'CREATE TABLE companies (id INTEGER PRIMARY KEY, cin TEXT, name TEXT NOT NULL, '
+            'norm_name TEXT NOT NULL, status TEXT, incorporation_date TEXT, ngrams INTEGER NOT NULL)'
+        )
+        conn.execute('CREATE TABLE trigram_load (trigram TEXT NOT NULL, company_id INTEGER NOT NULL)')
+        
+        document_frequency = Counter()
+        count = 0
+        with open(csv_path, newline='', encoding='utf-8', errors='replace') as f:
+            reader = csv.reader(f)
+            columns = cls._resolve_columns(next(reader, []))
+            
+            companies = []
+            postings = []
+            for row in reader:
+                name = cls._field(row, columns['name'])
+                norm_name = normalize_company_name(name)
+                if not norm_name:
+                    continue
+                count += 1
+                grams = name_trigrams(norm_name)
+                document_frequency.update(grams)
+                companies.append((
+                    count, cls._field(row, columns['cin']).upper() or None, name, norm_name,
+                    cls._field(row, columns['status']) or None,
+                    cls._field(row, columns['incorporation_date']) or None, len(grams)
+                ))
+                postings.extend((gram, count) for gram in grams)
+                
+                if len(companies) >= batch_size:
+                    cls._insert(conn, companies, postings)
+                    companies, postings = [], []
+            cls._insert(conn, companies, postings)
+        
+        conn.execute('CREATE TABLE trigram_df (trigram TEXT PRIMARY KEY, df INTEGER NOT NULL) WITHOUT ROWID')
+        conn.executemany('INSERT INTO trigram_df VALUES (?, ?)', sorted(document_frequency.items()))
+        # Postings are clustered by trigram in one sorted pass instead of maintaining a b-tree per insert
+        conn.execute(
+            'CREATE TABLE trigrams (trigram TEXT NOT NULL, company_id INTEGER NOT NULL, '
+            'PRIMARY KEY (trigram, company_id)) WITHOUT ROWID'
+        )
+        conn.execute('INSERT INTO trigrams SELECT trigram, company_id FROM trigram_load ORDER BY trigram, company_id')
+        conn.execute('DROP TABLE trigram_load')
+        conn.execute('CREATE INDEX idx_companies_cin ON companies (cin)')
+        conn.execute('CREATE INDEX idx_companies_norm_name ON companies (norm_name)')
+        conn.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)')
+        conn.execute("INSERT INTO meta VALUES ('companies', ?)", (str(count),))
+        conn.commit()
+        conn.execute('ANALYZE')
+        conn.execute('VACUUM')
+        conn.close()
+        
+        os.replace(tmp_path, db_path)
+        return count
+    
+    @staticmethod
+    def _resolve_columns(header):
+        """Map each field to its column index in the CSV header"""
+        normalized = [re.sub(r'[^a-z0-9]+', '_', h.strip().lower()).strip('_') for h in header]
+        columns = {}
+        for field, aliases in CSV_COLUMN_ALIASES.items():
+            columns[field] = next((normalized.index(a) for a in aliases if a in normalized), None)
+        if columns['name'] is None:
+            raise ValueError(f'No company name column found in CSV header: {header}')
+        return columns
+    
+    @staticmethod
+    def _field(row, index):
+        if index is None or index >= len(row):
+            return ''
+        return row[index].strip()
+    
+    @staticmethod
+    def _insert(conn, companies, postings):
+        conn.executemany('INSERT INTO companies VALUES (?, ?, ?, ?, ?, ?, ?)', companies)
+        conn.executemany('INSERT INTO trigram_load VALUES (?, ?)', postings)
+    
+    def lookup_cin(self, cin):
+        """Company record for a CIN, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT * FROM companies WHERE cin = ?', ((cin or '').strip().upper(),)
+            ).fetchone()
+        return self._record(row) if row else None
+    
+    def lookup_name(self, name):
+        """Companies whose normalized name matches exactly, active ones first"""
+        norm_name = normalize_company_name(name)
+        if not norm_name:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT * FROM companies WHERE norm_name = ? LIMIT 20', (norm_name,)
+            ).fetchall()
+        records = [self._record(row) for row in rows]
+        return sorted(records, key=lambda r: not r['active'])
+    
+    def candidates(self, name, limit=5, min_score=0.4):
+        """Fuzzy matches by trigram similarity (Dice coefficient), best first"""
+        norm_name = normalize_company_name(name)
+        grams = name_trigrams(norm_name) if norm_name else set()
+        if not grams:
+            return []
+        
+        with self._lock:
+            placeholders = ','.join('?' * len(grams))
+            frequencies = self._conn.execute(
+                f'SELECT trigram, df FROM trigram_df WHERE trigram IN ({placeholders})', list(grams)
+            ).fetchall()
+            # Gather candidates through the most selective trigrams only
+            rare = [row['trigram'] for row in sorted(frequencies, key=lambda r: r['df'])[:self.QUERY_TRIGRAMS]]
+            if not rare:
+                return []
+            placeholders = ','.join('?' * len(rare))
+            shortlist = self._conn.execute(
+                f'SELECT company_id FROM trigrams WHERE trigram IN ({placeholders}) '
+                f'GROUP BY company_id ORDER BY COUNT(*) DESC LIMIT ?', rare + [limit * 20]
+            ).fetchall()
+            ids = [row['company_id'] for row in shortlist]
+            if not ids:
+                return []
+            placeholders = ','.join('?' * len(ids))
+            rows = self._conn.execute(
+                f'SELECT * FROM companies WHERE id IN ({placeholders})', ids
+            ).fetchall()
+        
+        scored = []
+        for row in rows:
+            shared = len(grams & name_trigrams(row['norm_name']))
+            score = 2.0 * shared / (len(grams) + row['ngrams'])
+            if score >= min_score:
+                record = self._record(row)
+                record['score'] = round(score, 4)
+                scored.append(record)
+        scored.sort(key=lambda r: (-r['score'], not r['active']))
+        return scored[:limit]
+    
+    def _record(self, row):
+        status = row['status'] or ''
+        return {
+            'cin': row['cin'],
+            'company_name': row['name'],
+            'status': status or None,
+            'active': status.upper() in ACTIVE_STATUSES,
+            'incorporation_date': row['incorporation_date']
+        }
+    
+    def stats(self):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'companies'").fetchone()
+        return {'path': self.path, 'companies': int(row[0]) if row else 0}
+    
+    def close(self):
+        self._conn.close()
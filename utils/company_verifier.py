@@ -1,16 +1,72 @@
-import requests
 import re
 from urllib.parse import quote
 
+from utils.http_client import get_default_http_client
+from utils.fuzzy_matcher import get_default_name_matcher, name_similarity
+
 class CompanyVerifier:
     """Company legitimacy verification using OpenCorporates API"""
     
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, cache=None, hit_ttl=86400, miss_ttl=21600, error_ttl=60,
+                 http_client=None, base_url="https://api.opencorporates.com/v0.4", name_matcher=None):
         self.api_key = api_key
-        self.base_url = "https://api.opencorporates.com/v0.4"
+        self.base_url = base_url
+        self.http_client = http_client or get_default_http_client()
+        # Flags near-miss spellings of well-known employers ("Gooogle Inc")
+        self.name_matcher = name_matcher or get_default_name_matcher()
+        # Registry lookups are cached by normalized name; misses and errors are cached too
+        self.cache = cache
+        self.cache_ttls = {'hit': hit_ttl, 'miss': miss_ttl, 'error': error_ttl}
     
-    def verify_company(self, company_name, jurisdiction=None):
+    def verify_company(self, company_name, jurisdiction=None, timeout=10):
         """Verify company existence and legitimacy"""
+        key = self._cache_key(company_name, jurisdiction)
+        lookup = self.cache.get(key) if self.cache is not None else None
+        
+        if lookup is None:
+            lookup = self._search_registry(company_name, jurisdiction, timeout)
+            if self.cache is not None:
+                self.cache.set(key, lookup, self.cache_ttls[lookup['status']])
+        
+        if lookup['status'] == 'hit':
+            best_match = lookup['company']
+            result = {
+                'found': True,
+                'confidence': self._calculate_confidence(company_name, best_match),
+                'company_name': best_match.get('name'),
+                'jurisdiction': best_match.get('jurisdiction_code'),
+                'status': best_match.get('current_status'),
+                'incorporation_date': best_match.get('incorporation_date'),
+                'company_number': best_match.get('company_number'),
+                'address': best_match.get('registered_address_in_full')
+            }
+        else:
+            result = {
+                'found': False,
+                'confidence': 0,
+                'message': lookup['message']
+            }
+        
+        # A registered company with this very name is not impersonating anyone
+        impersonation = None if self._is_same_name(company_name, lookup) else self.name_matcher.check(company_name)
+        if impersonation:
+            result['impersonation'] = impersonation
+            result['confidence'] = min(result['confidence'], 10)
+            result['message'] = f"Name closely resembles {impersonation['brand']} - possible impersonation"
+        
+        return result
+    
+    def _is_same_name(self, company_name, lookup):
+        """Registry hit whose name equals the searched one, exactly or up to legal form"""
+        if lookup['status'] != 'hit':
+            return False
+        registered_name = lookup['company'].get('name') or ''
+        search_name_clean = re.sub(r'[^\w\s]', '', company_name.lower()).strip()
+        registered_name_clean = re.sub(r'[^\w\s]', '', registered_name.lower()).strip()
+        return search_name_clean == registered_name_clean or name_similarity(company_name, registered_name) == 1.0
+    
+    def _search_registry(self, company_name, jurisdiction=None, timeout=10):
+        """Query OpenCorporates; returns a cacheable hit/miss/error record"""
         try:
             # Search for company
             search_url = f"{self.base_url}/companies/search"
@@ -25,54 +81,47 @@ class CompanyVerifier:
             if jurisdiction:
                 params['jurisdiction_code'] = jurisdiction
             
-            response = requests.get(search_url, params=params, timeout=10)
+            response = self.http_client.get(search_url, params=params, timeout=timeout)
             
             if response.status_code == 200:
                 data = response.json()
                 companies = data.get('results', {}).get('companies', [])
                 
                 if companies:
-                    best_match = companies[0]['company']
-                    return {
-                        'found': True,
-                        'confidence': self._calculate_confidence(company_name, best_match),
-                        'company_name': best_match.get('name'),
-                        'jurisdiction': best_match.get('jurisdiction_code'),
-                        'status': best_match.get('current_status'),
-                        'incorporation_date': best_match.get('incorporation_date'),
-                        'company_number': best_match.get('company_number'),
-                        'address': best_match.get('registered_address_in_full')
-                    }
+                    return {'status': 'hit', 'company': companies[0]['company']}
                 else:
-                    return {
-                        'found': False,
-                        'confidence': 0,
-                        'message': 'Company not found in registry'
-                    }
+                    return {'status': 'miss', 'message': 'Company not found in registry'}
             else:
-                return {
-                    'found': False,
-                    'confidence': 0,
-                    'message': 'API request failed'
-                }
+                return {'status': 'error', 'message': 'API request failed'}
         
         except Exception as e:
-            return {
-                'found': False,
-                'confidence': 0,
-                'message': f'Verification error: {str(e)}'
-            }
+            return {'status': 'error', 'message': f'Verification error: {str(e)}'}
+    
+    def _cache_key(self, company_name, jurisdiction=None):
+        """Normalize name and jurisdiction into a cache key"""
+        name = re.sub(r'[^\w\s]', '', company_name.lower())
+        name = re.sub(r'\s+', ' ', name).strip()
+        return f"{(jurisdiction or '').lower()}|{name}"
+    
+    def cache_stats(self):
+        """Registry cache counters, or None when caching is disabled"""
+        return self.cache.stats() if self.cache is not None else None
     
     def _calculate_confidence(self, search_name, company_data):
         """Calculate confidence score based on name match"""
         search_name_clean = re.sub(r'[^\w\s]', '', search_name.lower())
         company_name_clean = re.sub(r'[^\w\s]', '', company_data.get('name', '').lower())
         
-        # Simple similarity check
+        # Exact, same name up to legal form, substring, then near-miss spelling
+        similarity = name_similarity(search_name, company_data.get('name', ''))
         if search_name_clean == company_name_clean:
             confidence = 95
+        elif similarity == 1.0:
+            confidence = 90
         elif search_name_clean in company_name_clean or company_name_clean in search_name_clean:
             confidence = 75
+        elif similarity >= 0.8:
+            confidence = 60
         else:
             confidence = 50
         
@@ -0,0 +1,61 @@
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+
+class DeadlineExecutor:
+    """Shared thread pool that runs I/O-bound pipeline stages under a per-request deadline"""
+    
+    def __init__(self, max_workers=16):
+        # Threads are started lazily on first submit
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='io-stage')
+    
+    def start(self, budget_seconds):
+        """Begin a request: every stage submitted to the group shares one deadline"""
+        return StageGroup(self._executor, budget_seconds)
+    
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait)
+
+
+class StageGroup:
+    """Stages of one request; results past the deadline degrade to their fallbacks"""
+    
+    def __init__(self, executor, budget_seconds):
+        self._executor = executor
+        self.deadline = time.monotonic() + budget_seconds
+        self._stages = {}
+        self.timed_out = []
+        self.failed = []
+    
+    def remaining(self):
+        """Seconds left in the request budget"""
+        return max(0.0, self.deadline - time.monotonic())
+    
+    def submit(self, name, fallback, fn, *args, **kwargs):
+        """Start a stage in the background; fallback is returned if it fails or misses the deadline"""
+        future = self._executor.submit(fn, *args, **kwargs)
+        self._stages[name] = (future, fallback)
+        return future
+    
+    def wait(self, name):
+        """Wait for a stage until the deadline; raises its error, or TimeoutError past the deadline"""
+        future, _ = self._stages[name]
+        try:
+            return future.result(timeout=self.remaining())
+        except FutureTimeoutError:
+            future.cancel()
+            self.timed_out.append(name)
+            raise TimeoutError(f"Stage '{name}' missed the request deadline")
+    
+    def result(self, name):
+        """Wait for a stage until the deadline and return its result or its fallback"""
+        _, fallback = self._stages[name]
+        try:
+            return self.wait(name)
+        except TimeoutError as e:
+            print(e)
+        except Exception as e:
+            print(f"Stage '{name}' failed: {e}")
+            self.failed.append(name)
+        return copy.deepcopy(fallback)
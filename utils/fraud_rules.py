@@ -1,57 +1,67 @@
+from utils.scam_lexicon import get_default_lexicon
+
 class FraudRuleEngine:
     """Deterministic fraud detection rules"""
     
-    def __init__(self):
-        self.scam_patterns = {
-            'payment_request': [
-                'pay registration fee',
-                'interview fee',
-                'processing fee',
-                'deposit required',
-                'send money',
-                'wallet transfer'
-            ],
-            'instant_offer': [
-                'instant offer',
-                'no interview',
-                'selected without',
-                'congratulations you are selected'
-            ],
-            'urgency': [
-                'join within 24 hours',
-                'urgent joining',
-                'immediate start',
-                'offer expires today'
-            ],
-            'suspicious_contact': [
-                'whatsapp only',
-                'telegram only',
-                'contact via whatsapp',
-                'no email communication'
-            ],
-            'unrealistic_salary': [
-                'earn lakhs',
-                'guaranteed income',
-                'no work high pay',
-                'easy money'
-            ]
+    def __init__(self, lexicon=None):
+        self.severity_map = {
+            'payment_request': 30,
+            'instant_offer': 20,
+            'urgency': 15,
+            'suspicious_contact': 20,
+            'unrealistic_salary': 15
         }
+        self.lexicon = lexicon or get_default_lexicon()
+    
+    @property
+    def scam_patterns(self):
+        """Read-only view of the pattern table; assign a new table or use add_patterns/remove_pattern"""
+        return self.lexicon.vocabulary('rules')
+    
+    @scam_patterns.setter
+    def scam_patterns(self, patterns):
+        self._own_lexicon().set_vocabulary('rules', patterns)
+    
+    def add_patterns(self, category, patterns, severity=None):
+        """Add patterns to a category (created if new); the matcher is rebuilt on next use"""
+        if severity is not None:
+            self.severity_map[category] = severity
+        self._own_lexicon().add_keywords('rules', category, patterns)
+    
+    def remove_pattern(self, category, pattern):
+        """Remove a single pattern from a category"""
+        self._own_lexicon().remove_keyword('rules', category, pattern)
     
-    def check_rules(self, text):
+    def _own_lexicon(self):
+        """
+        The lexicon to change patterns in: the process-wide one is copied on first change, so
+        this engine's patterns do not change matching for every other detector
+        """
+        if self.lexicon is get_default_lexicon():
+            self.lexicon = self.lexicon.copy()
+        return self.lexicon
+    
+    def _match(self, text, match_index):
+        """match_index if it came from this engine's lexicon, else a fresh match"""
+        if match_index is None or match_index.lexicon is not self.lexicon:
+            return self.lexicon.match(text)
+        return match_index
+    
+    def check_rules(self, text, match_index=None):
         """Check text against fraud rules"""
-        text_lower = text.lower()
+        match_index = self._match(text, match_index)
         triggered_rules = []
         rule_score = 0
         
-        for category, patterns in self.scam_patterns.items():
-            for pattern in patterns:
-                if pattern in text_lower:
-                    triggered_rules.append({
-                        'category': category,
-                        'pattern': pattern,
-                        'severity': self._get_severity(category)
-                    })
-                    rule_score += self._get_severity(category)
+        # Rules are reported in pattern table order
+        for (category, pattern), positions in match_index.positions('rules').items():
+            triggered_rules.append({
+                'category': category,
+                'pattern': pattern,
+                'severity': self._get_severity(category),
+                'positions': positions
+            })
+            rule_score += self._get_severity(category)
         
         return {
             'triggered_rules': triggered_rules,
@@ -61,24 +71,25 @@ class FraudRuleEngine:
     
     def _get_severity(self, category):
         """Get severity score for each category"""
-        severity_map = {
-            'payment_request': 30,
-            'instant_offer': 20,
-            'urgency': 15,
-            'suspicious_contact': 20,
-            'unrealistic_salary': 15
-        }
-        return severity_map.get(category, 10)
+        return self.severity_map.get(category, 10)
     
-    def get_evidence(self, text, triggered_rules):
+    def get_evidence(self, text, triggered_rules, match_index=None):
         """Highlight suspicious phrases in text"""
         evidence = []
+        found = None
         for rule in triggered_rules:
             pattern = rule['pattern']
-            if pattern in text.lower():
+            positions = rule.get('positions')
+            if positions is None:
+                # Rules not produced by check_rules: match the text once for all of them
+                if found is None:
+                    found = self._match(text, match_index).positions('rules')
+                positions = found.get((rule['category'], pattern))
+            if positions:
                 evidence.append({
                     'phrase': pattern,
                     'category': rule['category'],
-                    'severity': rule['severity']
+                    'severity': rule['severity'],
+                    'positions': positions
                 })
         return evidence
@@ -0,0 +1,185 @@
+import re
+
+import numpy as np
+
+# Employers that recruitment scams most often impersonate
+KNOWN_EMPLOYERS = [
+    'Google', 'Amazon', 'Microsoft', 'Apple', 'Meta', 'Facebook', 'Netflix', 'IBM',
+    'Oracle', 'Adobe', 'Salesforce', 'Intel', 'Cisco', 'Samsung', 'Dell', 'Uber',
+    'LinkedIn', 'Twitter', 'Accenture', 'Deloitte', 'KPMG', 'PwC', 'Ernst Young',
+    'Goldman Sachs', 'JP Morgan', 'Tata Consultancy Services', 'TCS', 'Infosys',
+    'Wipro', 'HCL', 'Tech Mahindra', 'Cognizant', 'Capgemini', 'Mindtree', 'Mphasis',
+    'Flipkart', 'Paytm', 'Swiggy', 'Zomato', 'Reliance', 'Byjus', 'Ola', 'Airtel',
+    'HDFC Bank', 'ICICI Bank', 'State Bank of India'
+]
+
+# Real companies and common words one edit away from a known employer ("Intex" is not Intel)
+LOOKALIKE_ALLOWLIST = {
+    'INTEX', 'AIRCEL', 'AIRTEX', 'ABODE', 'APPLY', 'AMPLE', 'GOGGLE', 'GOGGLES', 'TOMATO',
+    'DISCO', 'CRISCO', 'SISCO', 'METAL', 'DELLA', 'UBERT', 'ORACLES', 'SWIGGLY'
+}
+
+# Legal-form and filler words that say nothing about which brand a name refers to
+NOISE_WORDS = {
+    'PRIVATE', 'PVT', 'LIMITED', 'LTD', 'LLP', 'OPC', 'INC', 'INCORPORATED', 'CORP',
+    'CORPORATION', 'CO', 'COMPANY', 'PLC', 'LLC', 'GMBH', 'THE', 'AND',
+    'INDIA', 'INDIAN', 'GLOBAL', 'INTERNATIONAL', 'GROUP', 'HOLDINGS',
+    'CAREERS', 'CAREER', 'JOBS', 'HIRING', 'RECRUITMENT', 'HR', 'TEAM', 'OFFICIAL'
+}
+
+
+def normalize_brand_name(name):
+    """Uppercase, strip punctuation, legal forms and filler words"""
+    words = re.sub(r'[^A-Z0-9]+', ' ', (name or '').upper()).split()
+    core = [w for w in words if w not in NOISE_WORDS]
+    return ' '.join(core or words)
+
+
+def edit_distance(a, b, max_distance=None):
+    """Damerau-Levenshtein (optimal string alignment) distance; stops early past max_distance"""
+    if a == b:
+        return 0
+    if max_distance is not None and abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def name_similarity(a, b):
+    """Edit-distance similarity of two company names in [0, 1]"""
+    a, b = normalize_brand_name(a), normalize_brand_name(b)
+    if not a or not b:
+        return 0.0
+    return 1.0 - edit_distance(a, b) / max(len(a), len(b))
+
+
+class FuzzyNameMatcher:
+    """Trigram-indexed brand list that flags near-miss spellings of known employers"""
+    
+    def __init__(self, brands=None, threshold=0.8, min_brand_length=4, short_brand_length=5, shortlist=8,
+                 allowlist=None):
+        self.threshold = threshold
+        self.min_brand_length = min_brand_length
+        # Brands shorter than this only match a doubled letter ("Uberr"): one edit of a 4-letter
+        # brand is too often an ordinary word ("Metal" -> Meta, "Della" -> Dell)
+        self.short_brand_length = short_brand_length
+        # Words that are never an impersonation, however close to a brand
+        self.allowlist = LOOKALIKE_ALLOWLIST if allowlist is None else {w.upper() for w in allowlist}
+        self.shortlist = shortlist
+        self._build(brands or KNOWN_EMPLOYERS)
+    
+    def _build(self, brands):
+        """Inverted trigram index: trigram -> array of brand ids"""
+        self.brands = list(brands)
+        self._normalized = [normalize_brand_name(b) for b in self.brands]
+        
+        postings = {}
+        gram_counts = []
+        for brand_id, name in enumerate(self._normalized):
+            grams = self._trigrams(name)
+            gram_counts.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(brand_id)
+        self._postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self._gram_counts = np.array(gram_counts, dtype=np.float32)
+        self._exact = {name: brand_id for brand_id, name in enumerate(self._normalized)}
+    
+    @staticmethod
+    def _trigrams(name):
+        padded = f' {name} '
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+    
+    def _shortlist(self, name):
+        """Brand ids ranked by trigram Dice overlap with name, computed over the whole list at once"""
+        grams = self._trigrams(name)
+        hits = [self._postings[g] for g in grams if g in self._postings]
+        if not hits:
+            return []
+        shared = np.bincount(np.concatenate(hits), minlength=len(self.brands))
+        dice = 2.0 * shared / (len(grams) + self._gram_counts)
+        top = np.argsort(-dice)[:self.shortlist]
+        return [int(i) for i in top if shared[i] > 0]
+    
+    @staticmethod
+    def _is_doubled_letter(probe, brand):
+        """probe is brand with one letter typed twice ("GOOOGLE")"""
+        if len(probe) != len(brand) + 1:
+            return False
+        return any(probe[i] == probe[i + 1] and probe[:i] + probe[i + 1:] == brand for i in range(len(brand)))
+    
+    def match(self, company_name):
+        """
+        Closest known employer to a company name.
+        Returns None when nothing is close, otherwise brand, similarity, edit_distance,
+        exact (the name is the brand itself) and impersonation (a near-miss spelling).
+        """
+        name = normalize_brand_name(company_name)
+        if not name:
+            return None
+        
+        brand_id = self._exact.get(name)
+        if brand_id is not None:
+            return self._result(brand_id, 0, 1.0)
+        
+        # The whole name, plus each word so "Amazone Jobs Portal" is compared as "AMAZONE"
+        probes = [name] + [w for w in name.split() if len(w) >= self.min_brand_length and w != name]
+        probes = [p for p in probes if p not in self.allowlist]
+        best = None
+        for probe in probes:
+            brand_id = self._exact.get(probe)
+            if brand_id is not None:
+                return self._result(brand_id, 0, 1.0)
+            for brand_id in self._shortlist(probe):
+                brand = self._normalized[brand_id]
+                if len(brand) < self.min_brand_length:
+                    continue
+                longest = max(len(probe), len(brand))
+                if len(brand) >= self.short_brand_length:
+                    max_distance = int(round(longest * (1 - self.threshold), 6))
+                else:
+                    max_distance = 1 if self._is_doubled_letter(probe, brand) else 0
+                distance = edit_distance(probe, brand, max_distance)
+                if distance > max_distance:
+                    continue
+                similarity = 1.0 - distance / longest
+                if best is None or similarity > best[2]:
+                    best = (brand_id, distance, similarity)
+        
+        return self._result(*best) if best else None
+    
+    def _result(self, brand_id, distance, similarity):
+        return {
+            'brand': self.brands[brand_id],
+            'similarity': round(similarity, 4),
+            'edit_distance': distance,
+            'exact': distance == 0,
+            'impersonation': distance > 0
+        }
+    
+    def check(self, company_name):
+        """Impersonation details if the name is a near-miss of a known employer, else None"""
+        result = self.match(company_name)
+        return result if result and result['impersonation'] else None
+
+
+_default_matcher = None
+
+
+def get_default_name_matcher():
+    """Process-wide matcher over KNOWN_EMPLOYERS"""
+    global _default_matcher
+    if _default_matcher is None:
+        _default_matcher = FuzzyNameMatcher()
+    return _default_matcher
@@ -0,0 +1,133 @@
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class HttpClientError(Exception):
+    """Base error for HttpClient policy failures"""
+
+
+class ResponseTooLarge(HttpClientError):
+    """Response body exceeded the configured size cap"""
+
+
+class HostBusy(HttpClientError):
+    """No per-host connection slot became free within the timeout"""
+
+
+class HttpClient:
+    """Shared HTTP session with connection pooling, per-host limits, retries and a response size cap"""
+    
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    
+    def __init__(self, pool_size=20, per_host_limit=8, max_retries=2, backoff_base=0.25,
+                 backoff_max=4.0, max_response_bytes=5 * 1024 * 1024, user_agent=None, session=None):
+        self.per_host_limit = per_host_limit
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_response_bytes = max_response_bytes
+        
+        # Keep-alive connections are reused across requests to the same host
+        self.session = session or requests.Session()
+        if session is None:
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+        if user_agent:
+            self.session.headers['User-Agent'] = user_agent
+        
+        self._host_slots = {}
+        self._lock = threading.Lock()
+    
+    def _slot(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+        return host, slot
+    
+    def get(self, url, params=None, headers=None, timeout=10, max_bytes=None):
+        """
+        GET with retries on connection errors and 429/5xx responses.
+        timeout is the total budget across attempts, backoff sleeps included.
+        The body is read fully (up to max_bytes) before returning.
+        """
+        deadline = time.monotonic() + timeout
+        max_bytes = max_bytes or self.max_response_bytes
+        host, slot = self._slot(url)
+        attempt = 0
+        
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise requests.exceptions.Timeout(f'Request to {host} exceeded {timeout}s budget')
+            if not slot.acquire(timeout=remaining):
+                raise HostBusy(f'Too many concurrent requests to {host}')
+            try:
+                response = self.session.get(url, params=params, headers=headers,
+                                            timeout=deadline - time.monotonic(), stream=True)
+                try:
+                    self._read_body(response, max_bytes)
+                finally:
+                    response.close()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                response = None
+            finally:
+                slot.release()
+            
+            if response is not None and (response.status_code not in self.RETRY_STATUSES
+                                         or attempt >= self.max_retries):
+                return response
+            
+            delay = self._backoff(attempt, response)
+            if time.monotonic() + delay >= deadline:
+                if response is not None:
+                    return response
+                raise requests.exceptions.Timeout(f'Request to {host} exceeded {timeout}s budget')
+            time.sleep(delay)
+            attempt += 1
+    
+    def _read_body(self, response, max_bytes):
+        """Read the body into response.content, enforcing the size cap"""
+        declared = response.headers.get('Content-Length')
+        if declared and declared.isdigit() and int(declared) > max_bytes:
+            raise ResponseTooLarge(f'Response of {declared} bytes exceeds {max_bytes} byte limit')
+        
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            size += len(chunk)
+            if size > max_bytes:
+                raise ResponseTooLarge(f'Response exceeds {max_bytes} byte limit')
+            chunks.append(chunk)
+        response._content = b''.join(chunks)
+    
+    def _backoff(self, attempt, response=None):
+        """Full-jitter exponential backoff, honouring Retry-After when the server sends it"""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+    
+    def close(self):
+        self.session.close()
+
+
+_default_client = None
+
+
+def get_default_http_client():
+    """Process-wide client used when none is injected"""
+    global _default_client
+    if _default_client is None:
+        _default_client = HttpClient()
+    return _default_client
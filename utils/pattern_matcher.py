@@ -0,0 +1,114 @@
+from collections import deque
+
+
+def lower_preserving_offsets(text):
+    """Lowercase text without changing its length so match offsets map back to the original"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    # A few characters (e.g. 'İ') expand when lowercased; keep those as-is
+    return ''.join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+
+class AhoCorasickMatcher:
+    """Multi-pattern substring matcher backed by an Aho-Corasick automaton"""
+    
+    def __init__(self, patterns=None, ignore_case=True):
+        self.ignore_case = ignore_case
+        self.patterns = []
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        self._delta = [{}]
+        self._built = True
+        for pattern in patterns or []:
+            self.add(pattern)
+    
+    def add(self, pattern):
+        """Add a pattern and return its id (ids follow insertion order)"""
+        if not pattern:
+            raise ValueError('Pattern must be a non-empty string')
+        if self.ignore_case:
+            pattern = pattern.lower()
+        self.patterns.append(pattern)
+        self._built = False
+        return len(self.patterns) - 1
+    
+    def build(self):
+        """Compile the trie, failure links and output sets"""
+        goto = [{}]
+        outputs = [[]]
+        
+        # Trie of all patterns
+        for pattern_id, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append(pattern_id)
+        
+        # Failure links, breadth first so shorter suffixes are resolved first
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(char, 0)
+                outputs[next_state].extend(outputs[fail[next_state]])
+        
+        self._goto = goto
+        self._fail = fail
+        self._output = [tuple(out) for out in outputs]
+        self._lengths = [len(pattern) for pattern in self.patterns]
+        # Full transition table, filled lazily so each (state, char) walks failure links only once
+        self._delta = [dict(transitions) for transitions in goto]
+        self._built = True
+    
+    def _transition(self, state, char):
+        """Resolve and memoize the transition for a (state, char) pair not seen before"""
+        goto = self._goto
+        fallback = state
+        while fallback and char not in goto[fallback]:
+            fallback = self._fail[fallback]
+        next_state = goto[fallback].get(char, 0)
+        self._delta[state][char] = next_state
+        return next_state
+    
+    def find_all(self, text):
+        """Return (start, end, pattern_id) for every pattern occurrence, overlaps included"""
+        if not self._built:
+            self.build()
+        if not text or not self.patterns:
+            return []
+        if self.ignore_case:
+            text = lower_preserving_offsets(text)
+        
+        delta = self._delta
+        output = self._output
+        lengths = self._lengths
+        matches = []
+        state = 0
+        
+        for index, char in enumerate(text):
+            next_state = delta[state].get(char)
+            if next_state is None:
+                next_state = self._transition(state, char)
+            state = next_state
+            if output[state]:
+                end = index + 1
+                for pattern_id in output[state]:
+                    matches.append((end - lengths[pattern_id], end, pattern_id))
+        
+        return matches
+    
+    def __len__(self):
+        return len(self.patterns)
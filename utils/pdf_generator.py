@@ -5,95 +5,144 @@ from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from datetime import datetime
+from threading import Lock
+from xml.sax.saxutils import escape
 import os
-import re
+
+from utils.scam_lexicon import get_default_lexicon
+
+# Table styles are immutable once built, so every report shares them
+METADATA_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#4A90E2')),
+    ('TEXTCOLOR', (0, 0), (0, -1), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+    ('TOPPADDING', (0, 0), (-1, -1), 12),
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#E1E8ED'))
+])
+
+COMPONENT_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4A90E2')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+    ('TOPPADDING', (0, 0), (-1, -1), 10),
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#E1E8ED')),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F8FAFB')])
+])
+
+_stylesheet = None
+_stylesheet_lock = Lock()
+
+
+def get_report_styles():
+    """Process-wide stylesheet: ReportLab's sample styles plus the report's custom styles"""
+    global _stylesheet
+    with _stylesheet_lock:
+        if _stylesheet is None:
+            styles = getSampleStyleSheet()
+            _add_custom_styles(styles)
+            _stylesheet = styles
+    return _stylesheet
+
+
+def _add_custom_styles(styles):
+    """Setup custom paragraph styles"""
+    styles.add(ParagraphStyle(
+        name='CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#2C3E50'),
+        spaceAfter=30,
+        alignment=TA_CENTER,
+        fontName='Helvetica-Bold'
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='RiskHigh',
+        parent=styles['Normal'],
+        fontSize=14,
+        textColor=colors.HexColor('#E74C3C'),
+        fontName='Helvetica-Bold'
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='RiskMedium',
+        parent=styles['Normal'],
+        fontSize=14,
+        textColor=colors.HexColor('#F39C12'),
+        fontName='Helvetica-Bold'
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='RiskLow',
+        parent=styles['Normal'],
+        fontSize=14,
+        textColor=colors.HexColor('#27AE60'),
+        fontName='Helvetica-Bold'
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='ScamHighlight',
+        parent=styles['Normal'],
+        fontSize=10,
+        textColor=colors.HexColor('#2C3E50'),
+        backColor=colors.HexColor('#FFE5E5'),
+        leading=14
+    ))
 
 class ForensicReportGenerator:
     """Generate PDF forensic reports for scam analysis"""
     
-    def __init__(self, output_dir='reports'):
+    def __init__(self, output_dir='reports', lexicon=None):
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
-        self.styles = getSampleStyleSheet()
-        self._setup_custom_styles()
+        self.styles = get_report_styles()
         
         # Scam keywords to highlight
-        self.scam_keywords = [
-            'pay', 'fee', 'registration', 'processing', 'verification', 'deposit',
-            'urgent', 'immediately', 'hurry', 'limited time', 'expires', 'last chance',
-            'whatsapp only', 'telegram only', 'no interview', 'direct selection',
-            'guaranteed', 'earn lakhs', 'work from home', 'no experience',
-            'freshers', 'lpa', 'salary', 'package', 'selected', 'congratulations',
-            'wallet', 'transfer', 'send money', 'payment', 'charges'
-        ]
+        self.lexicon = lexicon or get_default_lexicon()
     
-    def _setup_custom_styles(self):
-        """Setup custom paragraph styles"""
-        self.styles.add(ParagraphStyle(
-            name='CustomTitle',
-            parent=self.styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#2C3E50'),
-            spaceAfter=30,
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold'
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='RiskHigh',
-            parent=self.styles['Normal'],
-            fontSize=14,
-            textColor=colors.HexColor('#E74C3C'),
-            fontName='Helvetica-Bold'
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='RiskMedium',
-            parent=self.styles['Normal'],
-            fontSize=14,
-            textColor=colors.HexColor('#F39C12'),
-            fontName='Helvetica-Bold'
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='RiskLow',
-            parent=self.styles['Normal'],
-            fontSize=14,
-            textColor=colors.HexColor('#27AE60'),
-            fontName='Helvetica-Bold'
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='ScamHighlight',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            textColor=colors.HexColor('#2C3E50'),
-            backColor=colors.HexColor('#FFE5E5'),
-            leading=14
-        ))
+    @property
+    def scam_keywords(self):
+        """Highlight vocabulary from the shared scam lexicon"""
+        return list(self.lexicon.vocabulary('report').get('highlight', ()))
     
-    def _highlight_scam_text(self, text):
-        """Highlight scam-related keywords in text"""
-        highlighted_text = text
+    def _highlight_scam_text(self, text, match_index=None):
+        """Highlight scam-related keywords in text; returns Paragraph markup with the text XML-escaped"""
+        # Reuse the posting's match index when text is (a prefix of) the matched text
+        if match_index is None or not match_index.text.startswith(text):
+            match_index = self.lexicon.match(text)
         
-        # Sort keywords by length (longest first) to avoid partial matches
-        sorted_keywords = sorted(self.scam_keywords, key=len, reverse=True)
+        # Longest match wins at each position; overlapping shorter keywords are skipped
+        matches = sorted(
+            (m for m in match_index.get('report') if m.end <= len(text)),
+            key=lambda m: (m.start, m.start - m.end)
+        )
         
-        for keyword in sorted_keywords:
-            # Case-insensitive replacement with highlighting
-            pattern = re.compile(re.escape(keyword), re.IGNORECASE)
-            highlighted_text = pattern.sub(
-                lambda m: f'<font color="#E74C3C"><b>{m.group()}</b></font>',
-                highlighted_text
-            )
+        parts = []
+        last_end = 0
+        for match in matches:
+            if match.start < last_end:
+                continue
+            parts.append(escape(text[last_end:match.start]))
+            parts.append(f'<font color="#E74C3C"><b>{escape(text[match.start:match.end])}</b></font>')
+            last_end = match.end
+        parts.append(escape(text[last_end:]))
         
-        return highlighted_text
+        return ''.join(parts)
     
-    def generate_report(self, analysis_result, job_text):
-        """Generate comprehensive forensic report"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f'fraud_analysis_{timestamp}.pdf'
-        filepath = os.path.join(self.output_dir, filename)
+    def generate_report(self, analysis_result, job_text, match_index=None, filepath=None,
+                        analysis_id=None, generated_at=None):
+        """Generate comprehensive forensic report (at filepath, or a timestamped file in output_dir)"""
+        generated_at = generated_at or datetime.now()
+        timestamp = generated_at.strftime('%Y%m%d_%H%M%S')
+        if filepath is None:
+            filepath = os.path.join(self.output_dir, f'fraud_analysis_{timestamp}.pdf')
         
         doc = SimpleDocTemplate(filepath, pagesize=letter,
                                topMargin=0.75*inch, bottomMargin=0.75*inch)
@@ -106,22 +155,12 @@ class ForensicReportGenerator:
         
         # Report metadata
         metadata = [
-            ['Report Generated:', datetime.now().strftime('%Y-%m-%d %H:%M:%S')],
-            ['Analysis ID:', timestamp],
+            ['Report Generated:', generated_at.strftime('%Y-%m-%d %H:%M:%S')],
+            ['Analysis ID:', analysis_id or timestamp],
             ['Input Type:', analysis_result.get('input_type', 'text').upper()]
         ]
         t = Table(metadata, colWidths=[2*inch, 4*inch])
-        t.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#4A90E2')),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('TOPPADDING', (0, 0), (-1, -1), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#E1E8ED'))
-        ]))
+        t.setStyle(METADATA_TABLE_STYLE)
         story.append(t)
         story.append(Spacer(1, 0.4*inch))
         
@@ -139,7 +178,7 @@ class ForensicReportGenerator:
         
         # Recommendation Box
         story.append(Paragraph("Recommendation", self.styles['Heading3']))
-        recommendation_text = f"<b>{analysis_result['recommendation']}</b>"
+        recommendation_text = f"<b>{escape(analysis_result['recommendation'])}</b>"
         story.append(Paragraph(recommendation_text, self.styles['Normal']))
         story.append(Spacer(1, 0.3*inch))
         
@@ -158,17 +197,7 @@ class ForensicReportGenerator:
             ])
         
         comp_table = Table(comp_data, colWidths=[2.5*inch, 1.5*inch, 1.5*inch])
-        comp_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4A90E2')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-            ('TOPPADDING', (0, 0), (-1, -1), 10),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#E1E8ED')),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F8FAFB')])
-        ]))
+        comp_table.setStyle(COMPONENT_TABLE_STYLE)
         story.append(comp_table)
         story.append(Spacer(1, 0.3*inch))
         
@@ -179,9 +208,9 @@ class ForensicReportGenerator:
             
             for i, exp in enumerate(analysis_result['explanations'], 1):
                 severity_color = '#E74C3C' if exp['severity'] == 'high' else '#F39C12' if exp['severity'] == 'medium' else '#27AE60'
-                bullet = f"<font color='{severity_color}'><b>{i}. {exp['factor']}</b></font> ({exp['severity'].upper()})"
+                bullet = f"<font color='{severity_color}'><b>{i}. {escape(exp['factor'])}</b></font> ({exp['severity'].upper()})"
                 story.append(Paragraph(bullet, self.styles['Normal']))
-                story.append(Paragraph(f"   {exp['detail']}", self.styles['Normal']))
+                story.append(Paragraph(f"   {escape(exp['detail'])}", self.styles['Normal']))
                 story.append(Spacer(1, 0.1*inch))
             story.append(Spacer(1, 0.2*inch))
         
@@ -193,7 +222,7 @@ class ForensicReportGenerator:
             for i, rule in enumerate(analysis_result['triggered_rules'], 1):
                 rule_text = f"<font color='#E74C3C'><b>{i}. {rule['category'].replace('_', ' ').title()}</b></font>"
                 story.append(Paragraph(rule_text, self.styles['Normal']))
-                story.append(Paragraph(f"   Pattern: \"{rule['pattern']}\" (Severity: {rule['severity']})", self.styles['Normal']))
+                story.append(Paragraph(f"   Pattern: \"{escape(rule['pattern'])}\" (Severity: {rule['severity']})", self.styles['Normal']))
                 story.append(Spacer(1, 0.1*inch))
             story.append(Spacer(1, 0.2*inch))
         
@@ -206,13 +235,13 @@ class ForensicReportGenerator:
             if cv.get('found'):
                 status_text = f"<font color='#27AE60'><b>✓ Company Found in Registry</b></font>"
                 story.append(Paragraph(status_text, self.styles['Normal']))
-                story.append(Paragraph(f"Company: {cv.get('company_name', 'N/A')}", self.styles['Normal']))
+                story.append(Paragraph(f"Company: {escape(str(cv.get('company_name', 'N/A')))}", self.styles['Normal']))
                 story.append(Paragraph(f"Confidence: {cv.get('confidence', 0)}%", self.styles['Normal']))
-                story.append(Paragraph(f"Source: {cv.get('verification_source', 'Registry')}", self.styles['Normal']))
+                story.append(Paragraph(f"Source: {escape(str(cv.get('verification_source', 'Registry')))}", self.styles['Normal']))
             else:
                 status_text = f"<font color='#E74C3C'><b>✗ Company Not Found</b></font>"
                 story.append(Paragraph(status_text, self.styles['Normal']))
-                story.append(Paragraph(f"Message: {cv.get('message', 'Not verified')}", self.styles['Normal']))
+                story.append(Paragraph(f"Message: {escape(str(cv.get('message', 'Not verified')))}", self.styles['Normal']))
             story.append(Spacer(1, 0.3*inch))
         
         # Spam Lines Detection (if available)
@@ -224,7 +253,7 @@ class ForensicReportGenerator:
             for i, spam_line in enumerate(spam_lines, 1):
                 line_text = spam_line['line']
                 score = spam_line['score']
-                patterns = ', '.join(spam_line['patterns'][:5])  # Show first 5 patterns
+                patterns = escape(', '.join(spam_line['patterns'][:5]))  # Show first 5 patterns
                 
                 # Highlight the line
                 highlighted_line = self._highlight_scam_text(line_text)
@@ -242,7 +271,7 @@ class ForensicReportGenerator:
         story.append(Spacer(1, 0.2*inch))
         
         # Highlight scam keywords in the text
-        highlighted_text = self._highlight_scam_text(job_text[:3000])
+        highlighted_text = self._highlight_scam_text(job_text[:3000], match_index)
         
         # Split into paragraphs for better formatting
         paragraphs = highlighted_text.split('\n')
@@ -260,6 +289,20 @@ class ForensicReportGenerator:
         doc.build(story)
         return filepath
     
+    def generate_reports(self, items):
+        """
+        Render many reports with this generator's shared styles and lexicon.
+        items are dicts of generate_report keyword arguments; returns one path (or None on failure) per item.
+        """
+        paths = []
+        for item in items:
+            try:
+                paths.append(self.generate_report(**item))
+            except Exception as e:
+                print(f"PDF generation error: {e}")
+                paths.append(None)
+        return paths
+    
     def _get_risk_style(self, risk_tier):
         """Get style based on risk tier"""
         if 'CRITICAL' in risk_tier or 'HIGH' in risk_tier:
@@ -0,0 +1,169 @@
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+REPORT_MODES = ('lazy', 'background', 'sync')
+REPORT_FILENAME_PATTERN = re.compile(r'fraud_analysis_([0-9a-f]{64})\.pdf')
+
+# Per-process state of bulk render workers
+_worker_generator = None
+_worker_store = None
+
+
+def _init_render_worker(root):
+    """Bulk render worker setup: one generator (styles, lexicon) and store handle reused for every report"""
+    global _worker_generator, _worker_store
+    from utils.pdf_generator import ForensicReportGenerator
+    from utils.report_store import ReportStore
+    _worker_store = ReportStore(root, max_age_seconds=float('inf'), max_bytes=None, sweep_interval=float('inf'))
+    _worker_generator = ForensicReportGenerator(output_dir=root)
+
+
+def _render_chunk(analysis_ids):
+    """Render a chunk of stored analyses to temporary files; returns (analysis_id, tmp_path or None) pairs"""
+    items = []
+    rendered_ids = []
+    for analysis_id in analysis_ids:
+        record = _worker_store.get_analysis(analysis_id)
+        if record is None:
+            continue
+        rendered_ids.append(analysis_id)
+        items.append({
+            'analysis_result': record['analysis_result'],
+            'job_text': record['job_text'],
+            'filepath': f'{_worker_store.pdf_path(analysis_id)}.{os.getpid()}.tmp',
+            'analysis_id': analysis_id,
+            'generated_at': datetime.fromtimestamp(record['created_at'])
+        })
+    return list(zip(rendered_ids, _worker_generator.generate_reports(items)))
+
+
+class ReportService:
+    """
+    Keeps PDF rendering off the /analyze request path.
+    Each analysis is persisted in a ReportStore under its content-hash ID; its PDF is rendered from
+    that record on first download (mode='lazy'), right away on a worker thread (mode='background') or inline
+    (mode='sync', the old behaviour). Concurrent requests for one report render it once.
+    """
+    
+    def __init__(self, generator, store, mode='lazy', workers=2):
+        if mode not in REPORT_MODES:
+            raise ValueError(f"Unknown report mode: {mode}")
+        self.generator = generator
+        self.store = store
+        self.mode = mode
+        # Threads are started lazily on first submit
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='report')
+        self._pending = {}  # analysis_id -> Future of the render in progress
+        self._lock = threading.Lock()
+        self._stats = {'rendered': 0, 'render_errors': 0}
+    
+    @staticmethod
+    def report_filename(analysis_id):
+        return f'fraud_analysis_{analysis_id}.pdf'
+    
+    def submit(self, analysis_result, job_text):
+        """Persist an analysis and return the report filename to hand to the client"""
+        # Identical analyses share one ID, and a PDF that already exists is not rendered again
+        analysis_id = self.store.put_analysis(analysis_result, job_text)
+        if self.mode == 'sync':
+            self._render(analysis_id)
+        elif self.mode == 'background':
+            self._schedule(analysis_id)
+        return self.report_filename(analysis_id)
+    
+    def _schedule(self, analysis_id):
+        """The render of analysis_id in progress, or a newly started one"""
+        with self._lock:
+            future = self._pending.get(analysis_id)
+            if future is None:
+                future = self._executor.submit(self._render, analysis_id)
+                self._pending[analysis_id] = future
+                future.add_done_callback(lambda _: self._forget(analysis_id))
+            return future
+    
+    def _forget(self, analysis_id):
+        with self._lock:
+            self._pending.pop(analysis_id, None)
+    
+    def _render(self, analysis_id):
+        path = self.store.pdf_path(analysis_id)
+        if os.path.exists(path):
+            return path
+        try:
+            record = self.store.get_analysis(analysis_id)
+            if record is None:
+                raise ValueError(f'Analysis {analysis_id} is no longer stored')
+            # Rendered under a temporary name so a download never sees a partial file
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            self.generator.generate_report(
+                record['analysis_result'],
+                record['job_text'],
+                filepath=tmp_path,
+                analysis_id=analysis_id,
+                generated_at=datetime.fromtimestamp(record['created_at'])
+            )
+            self.store.add_pdf(analysis_id, tmp_path)
+            self._stats['rendered'] += 1
+            return path
+        except Exception as e:
+            self._stats['render_errors'] += 1
+            print(f"PDF generation error: {e}")
+            raise
+    
+    def resolve(self, filename, timeout=30):
+        """
+        Path of a report ready to send, rendering it first if needed.
+        Returns None for unknown reports; raises if rendering fails.
+        """
+        match = REPORT_FILENAME_PATTERN.fullmatch(filename)
+        if match is None:
+            # Timestamped reports written before analyses were persisted
+            path = os.path.join(self.store.root, os.path.basename(filename))
+            return path if filename.endswith('.pdf') and os.path.isfile(path) else None
+        
+        analysis_id = match.group(1)
+        path = self.store.pdf_path(analysis_id)
+        if not os.path.exists(path):
+            if not self.store.has_analysis(analysis_id):
+                return None
+            path = self._schedule(analysis_id).result(timeout=timeout)
+        self.store.touch(analysis_id)
+        return path
+    
+    def render_all(self, analysis_ids=None, processes=None, chunk_size=25):
+        """
+        Bulk mode: render many stored analyses (default: every one without a PDF) in a process pool.
+        Each worker builds its generator once and renders whole chunks; returns a summary dict.
+        """
+        analysis_ids = self.store.missing_pdfs() if analysis_ids is None else list(analysis_ids)
+        chunks = [analysis_ids[i:i + chunk_size] for i in range(0, len(analysis_ids), chunk_size)]
+        summary = {'requested': len(analysis_ids), 'rendered': 0, 'failed': 0}
+        if not chunks:
+            return summary
+        
+        processes = min(processes or os.cpu_count() or 1, len(chunks))
+        ctx = multiprocessing.get_context('spawn')
+        with ctx.Pool(processes, initializer=_init_render_worker, initargs=(self.store.root,)) as pool:
+            for results in pool.imap_unordered(_render_chunk, chunks):
+                for analysis_id, tmp_path in results:
+                    if tmp_path is None:
+                        summary['failed'] += 1
+                        continue
+                    self.store.add_pdf(analysis_id, tmp_path)
+                    summary['rendered'] += 1
+        summary['failed'] += summary['requested'] - summary['rendered'] - summary['failed']
+        self._stats['rendered'] += summary['rendered']
+        self._stats['render_errors'] += summary['failed']
+        return summary
+    
+    def stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        return dict(self._stats, mode=self.mode, pending=pending, store=self.store.stats())
+    
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,179 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from utils.ttl_cache import content_hash
+
+
+class ReportStore:
+    """
+    Content-addressed storage for persisted analyses and their PDF reports.
+    An analysis ID is the sha256 of the analysis and posting text, so identical analyses are
+    stored once. Files live at <root>/<id[:2]>/<id[2:4]>/<id>.{json,pdf} (lookup is a path join,
+    never a directory scan) and a small SQLite index tracks age, last access and size for
+    retention: entries older than max_age_seconds are deleted, then the least recently accessed
+    until the store fits in max_bytes.
+    """
+    
+    def __init__(self, root='reports', max_age_seconds=30 * 86400, max_bytes=1024 * 1024 * 1024,
+                 sweep_interval=300):
+        self.root = root
+        self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self._lock = threading.Lock()
+        # Opened on first use, so importing the app creates no files
+        self._connection = None
+        self._last_sweep = 0.0
+        self._stats = {'stored': 0, 'deduplicated': 0, 'evicted': 0}
+    
+    @property
+    def _conn(self):
+        # Always read under self._lock, which also serializes the first open
+        if self._connection is None:
+            self._connection = self._open()
+        return self._connection
+    
+    def _open(self):
+        os.makedirs(self.root, exist_ok=True)
+        conn = sqlite3.connect(os.path.join(self.root, 'index.db'), check_same_thread=False, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS reports (id TEXT PRIMARY KEY, created_at REAL NOT NULL, '
+            'accessed_at REAL NOT NULL, bytes INTEGER NOT NULL DEFAULT 0)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS reports_created ON reports (created_at)')
+        conn.execute('CREATE INDEX IF NOT EXISTS reports_accessed ON reports (accessed_at)')
+        conn.commit()
+        return conn
+    
+    def reopen(self):
+        """Fresh connection for a forked worker; the inherited one is held, not closed"""
+        self._lock = threading.Lock()
+        if self._connection is not None:
+            self._inherited_conn = self._connection
+            self._connection = sqlite3.connect(os.path.join(self.root, 'index.db'), check_same_thread=False, timeout=30)
+    
+    @staticmethod
+    def analysis_id_for(analysis_result, job_text):
+        """Content hash identifying an analysis"""
+        result = {k: v for k, v in analysis_result.items() if k != 'pdf_report'}
+        return content_hash(json.dumps(result, sort_keys=True, default=str), job_text or '')
+    
+    def _directory(self, analysis_id):
+        return os.path.join(self.root, analysis_id[:2], analysis_id[2:4])
+    
+    def analysis_path(self, analysis_id):
+        return os.path.join(self._directory(analysis_id), f'{analysis_id}.json')
+    
+    def pdf_path(self, analysis_id):
+        return os.path.join(self._directory(analysis_id), f'{analysis_id}.pdf')
+    
+    def put_analysis(self, analysis_result, job_text):
+        """Store an analysis unless an identical one is already stored; returns its ID"""
+        analysis_id = self.analysis_id_for(analysis_result, job_text)
+        now = time.time()
+        path = self.analysis_path(analysis_id)
+        if os.path.exists(path):
+            self._stats['deduplicated'] += 1
+            self.touch(analysis_id)
+            return analysis_id
+        
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        record = {
+            'analysis_id': analysis_id,
+            'created_at': now,
+            'analysis_result': analysis_result,
+            'job_text': job_text
+        }
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f, default=str)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR IGNORE INTO reports (id, created_at, accessed_at, bytes) VALUES (?, ?, ?, ?)',
+                (analysis_id, now, now, os.path.getsize(path))
+            )
+            self._conn.commit()
+        self._stats['stored'] += 1
+        self._maybe_sweep()
+        return analysis_id
+    
+    def get_analysis(self, analysis_id):
+        """The stored analysis record, or None"""
+        try:
+            with open(self.analysis_path(analysis_id), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def has_analysis(self, analysis_id):
+        return os.path.exists(self.analysis_path(analysis_id))
+    
+    def add_pdf(self, analysis_id, rendered_path):
+        """Move a rendered PDF into place and account for its size"""
+        path = self.pdf_path(analysis_id)
+        os.replace(rendered_path, path)
+        size = os.path.getsize(path) + os.path.getsize(self.analysis_path(analysis_id))
+        with self._lock:
+            self._conn.execute('UPDATE reports SET bytes = ? WHERE id = ?', (size, analysis_id))
+            self._conn.commit()
+        return path
+    
+    def missing_pdfs(self):
+        """IDs of stored analyses whose PDF has not been rendered yet"""
+        with self._lock:
+            ids = [row[0] for row in self._conn.execute('SELECT id FROM reports ORDER BY created_at').fetchall()]
+        return [analysis_id for analysis_id in ids if not os.path.exists(self.pdf_path(analysis_id))]
+    
+    def touch(self, analysis_id):
+        """Mark an entry as recently used so size-based eviction keeps it"""
+        with self._lock:
+            self._conn.execute('UPDATE reports SET accessed_at = ? WHERE id = ?', (time.time(), analysis_id))
+            self._conn.commit()
+    
+    def _maybe_sweep(self):
+        if time.time() - self._last_sweep >= self.sweep_interval:
+            self.sweep()
+    
+    def sweep(self):
+        """Apply the age and size limits; returns the number of entries removed"""
+        self._last_sweep = time.time()
+        cutoff = time.time() - self.max_age_seconds
+        with self._lock:
+            victims = [row[0] for row in self._conn.execute(
+                'SELECT id FROM reports WHERE created_at < ?', (cutoff,)
+            ).fetchall()]
+            if self.max_bytes is not None:
+                total = self._conn.execute(
+                    'SELECT COALESCE(SUM(bytes), 0) FROM reports WHERE created_at >= ?', (cutoff,)
+                ).fetchone()[0]
+                if total > self.max_bytes:
+                    # Least recently used first
+                    for analysis_id, size in self._conn.execute(
+                        'SELECT id, bytes FROM reports WHERE created_at >= ? ORDER BY accessed_at', (cutoff,)
+                    ).fetchall():
+                        if total <= self.max_bytes:
+                            break
+                        victims.append(analysis_id)
+                        total -= size
+            
+            for analysis_id in victims:
+                for path in (self.analysis_path(analysis_id), self.pdf_path(analysis_id)):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+            self._conn.executemany('DELETE FROM reports WHERE id = ?', [(v,) for v in victims])
+            self._conn.commit()
+        self._stats['evicted'] += len(victims)
+        return len(victims)
+    
+    def stats(self):
+        with self._lock:
+            count, total = self._conn.execute('SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM reports').fetchone()
+        return dict(self._stats, entries=count, bytes=total, max_bytes=self.max_bytes,
+                    max_age_seconds=self.max_age_seconds)
@@ -1,3 +1,5 @@
+import numpy as np
+
 class RiskFusionEngine:
     """Fuse multiple risk signals into unified fraud score"""
     
@@ -57,6 +59,48 @@ class RiskFusionEngine:
             }
         }
     
+    def calculate_risk_scores(self, signals_list):
+        """Calculate unified risk scores for many signal sets at once"""
+        if not signals_list:
+            return []
+        
+        ml_prob = np.array([s.get('ml_probability', 50) for s in signals_list], dtype=float)
+        rule_score = np.array([s.get('rule_score', 0) for s in signals_list], dtype=float)
+        company_conf = np.array([s.get('company_confidence', 50) for s in signals_list], dtype=float)
+        salary_anomaly = np.array([s.get('salary_anomaly_score', 0) for s in signals_list], dtype=float)
+        recruiter_trust = np.array([s.get('recruiter_trust_score', 50) for s in signals_list], dtype=float)
+        
+        company_risk = 100 - company_conf
+        recruiter_risk = 100 - recruiter_trust
+        
+        risk_scores = (
+            ml_prob * self.weights['ml_probability'] +
+            rule_score * self.weights['rule_score'] +
+            company_risk * self.weights['company_verification'] +
+            salary_anomaly * self.weights['salary_anomaly'] +
+            recruiter_risk * self.weights['recruiter_trust']
+        )
+        risk_scores = np.clip(risk_scores, 0, 100)
+        
+        results = []
+        for i, signals in enumerate(signals_list):
+            risk_score = float(risk_scores[i])
+            risk_tier = self._classify_risk_tier(risk_score)
+            results.append({
+                'risk_score': round(risk_score, 2),
+                'risk_tier': risk_tier,
+                'recommendation': self._generate_recommendation(risk_score, risk_tier),
+                'component_scores': {
+                    'ml_probability': signals.get('ml_probability', 50),
+                    'rule_score': signals.get('rule_score', 0),
+                    'company_risk': 100 - signals.get('company_confidence', 50),
+                    'salary_anomaly': signals.get('salary_anomaly_score', 0),
+                    'recruiter_risk': 100 - signals.get('recruiter_trust_score', 50)
+                }
+            })
+        
+        return results
+    
     def _classify_risk_tier(self, score):
         """Classify risk into tiers"""
         if score >= 75:
@@ -0,0 +1,205 @@
+from bisect import bisect_right
+from collections import namedtuple
+from threading import Lock
+from types import MappingProxyType
+
+from utils.pattern_matcher import AhoCorasickMatcher
+
+# Every scam vocabulary used by the detectors, in one place.
+# Vocabulary -> category -> keywords. Matching is case-insensitive substring matching.
+SCAM_VOCABULARIES = {
+    # MLScamClassifier feature engineering and spam line detection.
+    # The per-category counts are model inputs: retrain after changing them.
+    'classifier': {
+        'payment': ['pay', 'fee', 'registration', 'processing', 'verification', 'deposit', 'charges', 'wallet', 'transfer', 'send money'],
+        'urgency': ['urgent', 'immediately', 'hurry', 'limited time', 'expires', 'last chance', 'act now', 'closing soon', 'final call'],
+        'contact': ['whatsapp only', 'telegram only', 'no email', 'no calls', 'contact via whatsapp'],
+        'selection': ['no interview', 'direct selection', 'selected without', 'hired without', 'guaranteed'],
+        'money': ['earn lakhs', 'work from home', 'easy money', 'guaranteed income', 'lpa for freshers'],
+        'suspicious': ['congratulations', 'selected', 'hired', 'won', 'lottery']
+    },
+    # TextPreprocessor risk features
+    'preprocessor': {
+        'urgency': ['urgent', 'immediate', 'asap', '24 hours', 'today', 'now'],
+        'payment': ['fee', 'payment', 'deposit', 'registration', 'processing fee', 'wallet'],
+        'promise': ['guaranteed', 'no experience', 'work from home', 'easy money', 'high salary']
+    },
+    # FraudRuleEngine patterns
+    'rules': {
+        'payment_request': ['pay registration fee', 'interview fee', 'processing fee', 'deposit required', 'send money', 'wallet transfer'],
+        'instant_offer': ['instant offer', 'no interview', 'selected without', 'congratulations you are selected'],
+        'urgency': ['join within 24 hours', 'urgent joining', 'immediate start', 'offer expires today'],
+        'suspicious_contact': ['whatsapp only', 'telegram only', 'contact via whatsapp', 'no email communication'],
+        'unrealistic_salary': ['earn lakhs', 'guaranteed income', 'no work high pay', 'easy money']
+    },
+    # ForensicReportGenerator highlighting
+    'report': {
+        'highlight': [
+            'pay', 'fee', 'registration', 'processing', 'verification', 'deposit',
+            'urgent', 'immediately', 'hurry', 'limited time', 'expires', 'last chance',
+            'whatsapp only', 'telegram only', 'no interview', 'direct selection',
+            'guaranteed', 'earn lakhs', 'work from home', 'no experience',
+            'freshers', 'lpa', 'salary', 'package', 'selected', 'congratulations',
+            'wallet', 'transfer', 'send money', 'payment', 'charges'
+        ]
+    }
+}
+
+# order is the keyword's position in its vocabulary table, used to report matches in table order
+LexiconMatch = namedtuple('LexiconMatch', ['vocabulary', 'category', 'keyword', 'start', 'end', 'line', 'order'])
+
+
+class MatchIndex:
+    """All lexicon matches found in one text, shared by every detector"""
+    
+    def __init__(self, text, raw_matches, entries, lexicon=None):
+        self.text = text
+        # The ScamLexicon that produced these matches
+        self.lexicon = lexicon
+        # (start, end, entry_id) from the automaton; LexiconMatch objects are built on first use
+        self._raw_matches = raw_matches
+        self._entries = entries
+        self._by_vocabulary = None
+    
+    def _build(self):
+        line_starts = [0]
+        index = self.text.find('\n')
+        while index != -1:
+            line_starts.append(index + 1)
+            index = self.text.find('\n', index + 1)
+        
+        by_vocabulary = {}
+        for start, end, entry_id in self._raw_matches:
+            name, category, keyword, order = self._entries[entry_id]
+            by_vocabulary.setdefault(name, []).append(LexiconMatch(
+                name, category, keyword, start, end, bisect_right(line_starts, start) - 1, order))
+        self._by_vocabulary = by_vocabulary
+    
+    @property
+    def matches(self):
+        """Every match across all vocabularies"""
+        if self._by_vocabulary is None:
+            self._build()
+        return sorted((m for matches in self._by_vocabulary.values() for m in matches),
+                      key=lambda m: (m.start, m.end))
+    
+    def get(self, vocabulary, category=None):
+        """Matches for a vocabulary (optionally one category), in text order"""
+        if self._by_vocabulary is None:
+            self._build()
+        matches = self._by_vocabulary.get(vocabulary, [])
+        if category is not None:
+            matches = [m for m in matches if m.category == category]
+        return matches
+    
+    def keywords(self, vocabulary, category=None):
+        """Distinct keywords of a vocabulary present in the text"""
+        return {m.keyword for m in self.get(vocabulary, category)}
+    
+    def category_counts(self, vocabulary):
+        """Number of distinct table keywords present per category, straight from the raw matches"""
+        counts = {}
+        for entry_id in {entry_id for _, _, entry_id in self._raw_matches}:
+            name, category, _, _ = self._entries[entry_id]
+            if name == vocabulary:
+                counts[category] = counts.get(category, 0) + 1
+        return counts
+    
+    def count(self, vocabulary, category):
+        """Number of distinct keywords of a category present in the text"""
+        return self.category_counts(vocabulary).get(category, 0)
+    
+    def by_line(self, vocabulary):
+        """Group a vocabulary's matches by line number (0-based, split on newlines)"""
+        lines = {}
+        for match in self.get(vocabulary):
+            lines.setdefault(match.line, []).append(match)
+        return lines
+    
+    def positions(self, vocabulary):
+        """Map (category, keyword) to its [start, end] offsets, in vocabulary table order"""
+        found = {}
+        for match in sorted(self.get(vocabulary), key=lambda m: (m.order, m.start)):
+            found.setdefault((match.category, match.keyword), []).append([match.start, match.end])
+        return found
+
+
+class ScamLexicon:
+    """Single compiled automaton over every scam vocabulary"""
+    
+    def __init__(self, vocabularies=None):
+        self._lock = Lock()
+        self._vocabularies = {}
+        self._compiled = None
+        for name, categories in (vocabularies or SCAM_VOCABULARIES).items():
+            self._set(name, categories)
+    
+    def _set(self, name, categories):
+        self._vocabularies[name] = MappingProxyType({
+            category: tuple(keywords) for category, keywords in categories.items()
+        })
+        self._compiled = None
+    
+    def copy(self):
+        """Independent lexicon with the same vocabularies"""
+        with self._lock:
+            return ScamLexicon({name: dict(categories) for name, categories in self._vocabularies.items()})
+    
+    def vocabulary(self, name):
+        """Read-only view of one vocabulary: category -> keywords"""
+        return self._vocabularies.get(name, MappingProxyType({}))
+    
+    def set_vocabulary(self, name, categories):
+        """Replace a vocabulary; the automaton is rebuilt on next match"""
+        with self._lock:
+            self._set(name, categories)
+    
+    def add_keywords(self, name, category, keywords):
+        """Add keywords to a vocabulary category (created if new)"""
+        with self._lock:
+            categories = dict(self.vocabulary(name))
+            existing = categories.get(category, ())
+            categories[category] = existing + tuple(k for k in keywords if k not in existing)
+            self._set(name, categories)
+    
+    def remove_keyword(self, name, category, keyword):
+        """Remove one keyword from a vocabulary category"""
+        with self._lock:
+            categories = dict(self.vocabulary(name))
+            categories[category] = tuple(k for k in categories.get(category, ()) if k != keyword)
+            self._set(name, categories)
+    
+    def _compile(self):
+        """Compile all vocabularies into one automaton, rebuilding after changes"""
+        compiled = self._compiled
+        if compiled is None:
+            with self._lock:
+                matcher = AhoCorasickMatcher()
+                entries = []
+                for name, categories in self._vocabularies.items():
+                    order = 0
+                    for category, keywords in categories.items():
+                        for keyword in keywords:
+                            matcher.add(keyword)
+                            entries.append((name, category, keyword, order))
+                            order += 1
+                matcher.build()
+                compiled = self._compiled = (matcher, entries)
+        return compiled
+    
+    def match(self, text):
+        """Scan text once and return the MatchIndex for every vocabulary"""
+        text = text or ''
+        matcher, entries = self._compile()
+        return MatchIndex(text, matcher.find_all(text), entries, lexicon=self)
+
+
+_default_lexicon = None
+
+
+def get_default_lexicon():
+    """Process-wide lexicon shared by all detectors"""
+    global _default_lexicon
+    if _default_lexicon is None:
+        _default_lexicon = ScamLexicon()
+    return _default_lexicon
@@ -1,20 +1,154 @@
+import json
 import re
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
+from functools import lru_cache
+
+from utils.scam_lexicon import get_default_lexicon
+from utils.ttl_cache import TTLCache, content_hash
+
+DEFAULT_LEMMA_TABLE_PATH = 'models/saved/lemmas.json'
+
+URL_PATTERN = re.compile(r'http\S+|www\S+|https\S+', flags=re.MULTILINE)
+PHONE_PATTERN = re.compile(r'\+?\d[\d\s\-\(\)]{7,}\d')
+EMAIL_PATTERN = re.compile(r'\S+@\S+')
+SPECIAL_CHAR_PATTERN = re.compile(r'[^\w\s]')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# NLTK's English stopword list (apostrophe forms dropped: clean_text never leaves apostrophes)
+ENGLISH_STOP_WORDS = frozenset('''
+    i me my myself we our ours ourselves you your yours yourself yourselves he him his himself
+    she her hers herself it its itself they them their theirs themselves what which who whom
+    this that these those am is are was were be been being have has had having do does did
+    doing a an the and but if or because as until while of at by for with about against
+    between into through during before after above below to from up down in out on off over
+    under again further then once here there when where why how all any both each few more
+    most other some such no nor not only own same so than too very s t can will just don
+    should now d ll m o re ve y ain aren couldn didn doesn hadn hasn haven isn ma mightn
+    mustn needn shan shouldn wasn weren won wouldn
+'''.split())
+
+# Words word_tokenize splits in two (Treebank contractions that survive clean_text)
+TREEBANK_SPLITS = {
+    'cannot': ('can', 'not'),
+    'gimme': ('gim', 'me'),
+    'gonna': ('gon', 'na'),
+    'gotta': ('got', 'ta'),
+    'lemme': ('lem', 'me'),
+    'wanna': ('wan', 'na')
+}
+
+
+def _load_nltk():
+    """Import NLTK and its corpora on demand, downloading them if missing"""
+    import nltk
+    from nltk.corpus import stopwords
+    from nltk.tokenize import word_tokenize
+    from nltk.stem import WordNetLemmatizer
+    try:
+        stop_words = set(stopwords.words('english'))
+        lemmatizer = WordNetLemmatizer()
+    except LookupError:
+        nltk.download('stopwords')
+        nltk.download('punkt')
+        nltk.download('wordnet')
+        stop_words = set(stopwords.words('english'))
+        lemmatizer = WordNetLemmatizer()
+    return stop_words, lemmatizer, word_tokenize
+
+
+def build_lemma_table(terms):
+    """
+    WordNet lemmas for the words of a fitted vectorizer's vocabulary and their plural forms.
+    Only tokens whose lemma differs are stored; everything else maps to itself.
+    """
+    _, lemmatizer, _ = _load_nltk()
+    words = {word for term in terms for word in term.split()}
+    candidates = set(words)
+    for word in words:
+        candidates.update((word + 's', word + 'es'))
+        if word.endswith('y'):
+            candidates.add(word[:-1] + 'ies')
+    
+    table = {}
+    for token in candidates:
+        lemma = lemmatizer.lemmatize(token)
+        if lemma != token and (token in words or lemma in words):
+            table[token] = lemma
+    return table
+
+
+def load_lemma_table(path):
+    """Lemma table saved alongside the model, or None if there is none"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
 
 class TextPreprocessor:
-    def __init__(self):
-        try:
-            self.stop_words = set(stopwords.words('english'))
-            self.lemmatizer = WordNetLemmatizer()
-        except LookupError:
-            nltk.download('stopwords')
-            nltk.download('punkt')
-            nltk.download('wordnet')
-            self.stop_words = set(stopwords.words('english'))
-            self.lemmatizer = WordNetLemmatizer()
+    """
+    Text cleaning, tokenization and lemmatization.
+    mode='nltk' uses word_tokenize and WordNet; mode='fast' uses a regex tokenizer, a frozen
+    stopword list and the lemma table saved with the model, and never loads NLTK corpora.
+    mode='auto' is fast while the loaded model ships a lemma table and nltk otherwise.
+    """
+    
+    def __init__(self, lexicon=None, cache=None, lemma_cache_size=50000, mode='nltk',
+                 lemma_table_path=DEFAULT_LEMMA_TABLE_PATH, lemma_table=None):
+        if mode not in ('fast', 'nltk', 'auto'):
+            raise ValueError(f"Unknown preprocessing mode: {mode}")
+        self.lexicon = lexicon or get_default_lexicon()
+        self.requested_mode = mode
+        # Effective mode; 'auto' resolves to 'fast' or 'nltk' whenever the lemma table is (re)loaded
+        self.mode = 'nltk' if mode == 'auto' else mode
+        self.lemma_table_path = lemma_table_path
+        self.lemma_cache_size = lemma_cache_size
+        # Identical messages (forwarded scams) are preprocessed once, keyed by content hash
+        self.cache = cache if cache is not None else TTLCache(maxsize=10000, max_bytes=32 * 1024 * 1024)
+        self._lemmatize = None
+        self.lemma_table = None
+        
+        if mode == 'nltk':
+            self._init_nltk()
+        elif lemma_table is not None:
+            # A table not yet saved to disk (training preprocesses with the one it just built)
+            self.mode = 'fast'
+            self.stop_words = ENGLISH_STOP_WORDS
+            self.lemma_table = lemma_table
+        else:
+            self.reload_lemma_table()
+    
+    def _init_nltk(self):
+        self._nltk_stop_words, self.lemmatizer, self._word_tokenize = _load_nltk()
+        self.stop_words = self._nltk_stop_words
+        # The token vocabulary is small, so most WordNet lookups repeat
+        self._lemmatize = lru_cache(maxsize=self.lemma_cache_size)(self.lemmatizer.lemmatize)
+    
+    def _ensure_nltk(self):
+        """Load NLTK for auto mode; False (fast mode, identity lemmas) if its corpora are unavailable"""
+        if self._lemmatize is None:
+            try:
+                self._init_nltk()
+            except Exception as e:
+                print(f"NLTK unavailable ({type(e).__name__}); auto mode falls back to fast preprocessing")
+                return False
+        return True
+    
+    def reload_lemma_table(self):
+        """Pick up the lemma table written by the last training run"""
+        lemma_table = load_lemma_table(self.lemma_table_path)
+        if self.requested_mode == 'auto' and lemma_table is None and self._ensure_nltk():
+            # Legacy models were trained on WordNet lemmas; NLTK is loaded here rather than on a request
+            self.stop_words = self._nltk_stop_words
+            self.mode = 'nltk'
+        elif self.requested_mode != 'nltk':
+            if lemma_table is None:
+                print(f"Lemma table not found at {self.lemma_table_path}; fast mode will not lemmatize until models are retrained")
+            self.lemma_table = lemma_table
+            self.stop_words = ENGLISH_STOP_WORDS
+            self.mode = 'fast'
+        self.lemma_table = lemma_table
+        self.cache.clear()
     
     def clean_text(self, text):
         """Normalize and clean text"""
@@ -25,50 +159,81 @@ class TextPreprocessor:
         text = text.lower()
         
         # Remove URLs
-        text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
+        text = URL_PATTERN.sub('', text)
         
         # Remove phone numbers
-        text = re.sub(r'\+?\d[\d\s\-\(\)]{7,}\d', '', text)
+        text = PHONE_PATTERN.sub('', text)
         
         # Remove email addresses
-        text = re.sub(r'\S+@\S+', '', text)
+        text = EMAIL_PATTERN.sub('', text)
         
         # Remove emojis and special characters
-        text = re.sub(r'[^\w\s]', ' ', text)
+        text = SPECIAL_CHAR_PATTERN.sub(' ', text)
         
         # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
+        text = WHITESPACE_PATTERN.sub(' ', text).strip()
         
         return text
     
     def tokenize_and_lemmatize(self, text):
         """Tokenize and lemmatize text"""
-        tokens = word_tokenize(text)
-        tokens = [self.lemmatizer.lemmatize(token) for token in tokens 
+        if self.mode == 'fast':
+            return self._fast_tokenize_and_lemmatize(text)
+        tokens = self._word_tokenize(text)
+        tokens = [self._lemmatize(token) for token in tokens
                   if token not in self.stop_words and len(token) > 2]
         return tokens
     
+    def _fast_tokenize_and_lemmatize(self, text):
+        """Regex equivalent of word_tokenize on clean_text output, lemmas from the saved table"""
+        # Without a table (legacy models) tokens are their own lemmas: WordNet is never loaded on a request
+        lemma_table = self.lemma_table if self.lemma_table is not None else {}
+        stop_words = self.stop_words
+        tokens = []
+        for token in TOKEN_PATTERN.findall(text):
+            for part in TREEBANK_SPLITS.get(token, (token,)):
+                if part not in stop_words and len(part) > 2:
+                    tokens.append(lemma_table.get(part, part))
+        return tokens
+    
     def preprocess(self, text):
         """Full preprocessing pipeline"""
+        key = content_hash(text or '')
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        
         cleaned = self.clean_text(text)
         tokens = self.tokenize_and_lemmatize(cleaned)
-        return ' '.join(tokens)
+        result = ' '.join(tokens)
+        self.cache.set(key, result)
+        return result
+    
+    def cache_stats(self):
+        """Preprocessing and lemma cache counters"""
+        stats = self.cache.stats()
+        stats['mode'] = self.mode
+        if self.mode == 'nltk':
+            lemma = self._lemmatize.cache_info()
+            stats['lemma_cache'] = {'size': lemma.currsize, 'maxsize': lemma.maxsize,
+                                    'hits': lemma.hits, 'misses': lemma.misses}
+        else:
+            stats['lemma_table_size'] = len(self.lemma_table or {})
+        return stats
     
-    def extract_features(self, text):
+    def extract_features(self, text, match_index=None):
         """Extract risk-related features"""
+        if match_index is None:
+            match_index = self.lexicon.match(text)
         features = {}
-        text_lower = text.lower()
         
         # Urgency indicators
-        urgency_keywords = ['urgent', 'immediate', 'asap', '24 hours', 'today', 'now']
-        features['urgency_score'] = sum(1 for kw in urgency_keywords if kw in text_lower)
+        features['urgency_score'] = match_index.count('preprocessor', 'urgency')
         
         # Payment indicators
-        payment_keywords = ['fee', 'payment', 'deposit', 'registration', 'processing fee', 'wallet']
-        features['payment_score'] = sum(1 for kw in payment_keywords if kw in text_lower)
+        features['payment_score'] = match_index.count('preprocessor', 'payment')
         
         # Unrealistic promises
-        promise_keywords = ['guaranteed', 'no experience', 'work from home', 'easy money', 'high salary']
-        features['promise_score'] = sum(1 for kw in promise_keywords if kw in text_lower)
+        features['promise_score'] = match_index.count('preprocessor', 'promise')
         
         return features
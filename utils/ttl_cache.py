@@ -0,0 +1,179 @@
+import hashlib
+import json
+import sqlite3
+import sys
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+def content_hash(*parts):
+    """Stable sha256 key for cache entries derived from content"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode('utf-8', 'surrogatepass'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+def estimate_size(value):
+    """Approximate memory footprint of a value in bytes, containers included"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item) for item in value)
+    return size
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry expiry, hit/miss counters and an optional persistent backend"""
+    
+    def __init__(self, maxsize=10000, backend=None, max_bytes=None, sizeof=estimate_size):
+        self.maxsize = maxsize
+        self.backend = backend
+        # Optional memory ceiling; entries are evicted LRU-first once the estimated total exceeds it
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key, default=None):
+        """Return the cached value, or default if missing or expired"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] is None or entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                self._discard(key)
+        
+        # Fall back to the persistent store and promote the entry into memory
+        if self.backend is not None:
+            entry = self.backend.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > now):
+                with self._lock:
+                    self._store(key, entry)
+                    self.hits += 1
+                return entry[0]
+        
+        with self._lock:
+            self.misses += 1
+        return default
+    
+    def set(self, key, value, ttl=None):
+        """Cache a value for ttl seconds (None = no expiry)"""
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._store(key, (value, expires_at))
+        if self.backend is not None:
+            self.backend.set(key, value, expires_at)
+    
+    def _store(self, key, entry):
+        if self.max_bytes is not None:
+            size = self.sizeof(entry[0])
+            if size > self.max_bytes:
+                # Never worth evicting everything else for one oversized value
+                self._discard(key)
+                return
+            self._bytes += size - self._sizes.get(key, 0)
+            self._sizes[key] = size
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize or (self.max_bytes is not None and self._bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+            self.evictions += 1
+    
+    def _discard(self, key):
+        self._entries.pop(key, None)
+        self._bytes -= self._sizes.pop(key, 0)
+    
+    def delete(self, key):
+        with self._lock:
+            self._discard(key)
+        if self.backend is not None:
+            self.backend.delete(key)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._bytes = 0
+        if self.backend is not None:
+            self.backend.clear()
+    
+    def stats(self):
+        """Cache counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'bytes': self._bytes if self.max_bytes is not None else None,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'persistent': self.backend is not None
+            }
+    
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """SQLite store for TTLCache entries so they survive restarts (values must be JSON-serializable)"""
+    
+    def __init__(self, path):
+        self.path = path
+        self._lock = Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)'
+            )
+        self.purge_expired()
+    
+    def reopen(self):
+        """Reconnect in a forked child; the parent's connection is left open, since closing it could disturb its WAL"""
+        self._lock = Lock()
+        self._inherited_conn = self._conn
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+    
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute('SELECT value, expires_at FROM cache WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+    
+    def set(self, key, value, expires_at):
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, json.dumps(value), expires_at)
+            )
+    
+    def delete(self, key):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+    
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM cache')
+    
+    def purge_expired(self):
+        """Drop expired rows"""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?', (time.time(),))